@@ -1,17 +1,33 @@
-from argparse import ArgumentParser, Namespace
+import os
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from typing import List, Optional
 
-from benchmark.app import Benchmark
+from benchmark.app import Benchmark, RunOptions
+from benchmark.common import MatchMode
+from benchmark.common.bootstrap import UNITS
+from benchmark.common.profiler import StageProfiler
 
 SCANNER_LIST = [
     "credsweeper", "credential_digger", "detect_secrets", "gitleaks", "shhgit", "trufflehog", "trufflehog3", "wraith"
 ]
 
 
+def jobs_list(value: str) -> List[int]:
+    try:
+        jobs = [int(x) for x in value.split(',')]
+    except ValueError:
+        jobs = []
+    if not jobs or any(1 > x for x in jobs):
+        raise ArgumentTypeError(f"positive numbers are expected: '{value}'")
+    return jobs
+
+
 def get_arguments() -> Namespace:
     parser = ArgumentParser(prog="python -m benchmark")
     parser.add_argument("--scanner",
                         nargs="?",
-                        help=f"scanner name to benchmark (support: {SCANNER_LIST})",
+                        help=f"scanner name to benchmark (support: {SCANNER_LIST})"
+                             f", comma separated names or 'all' to compare the scanners",
                         dest="scanner",
                         metavar="SCANNER",
                         required=True)
@@ -21,16 +37,135 @@ def get_arguments() -> Namespace:
     parser.add_argument("--fix",
                         help=f"add/update markup for unknown credetials",
                         action="store_true")
+    parser.add_argument("--match",
+                        help=f"match of reported lines with markup (default: {MatchMode.EXACT})",
+                        choices=[str(x) for x in MatchMode],
+                        default=str(MatchMode.EXACT))
+    parser.add_argument("--concurrency",
+                        help=f"number of scanners which run at the same time in comparison (default: CPU number)",
+                        type=int,
+                        default=os.cpu_count() or 1)
+    parser.add_argument("--shards",
+                        help=f"split data into N parts by size which are scanned at the same time"
+                             f" (detect_secrets, shhgit, trufflehog3; default: 1)",
+                        type=int,
+                        default=1,
+                        metavar="N")
+    parser.add_argument("--jobs",
+                        help=f"parallel jobs of the scanner (credsweeper, wraith)"
+                             f", comma separated values are swept in --perf mode (default: 1, 2, 4, ... CPU number)",
+                        dest="jobs",
+                        type=jobs_list,
+                        default=[],
+                        metavar="N")
+    parser.add_argument("--perf",
+                        help=f"measure wall time of the scanner runs instead of the evaluation",
+                        action="store_true")
+    parser.add_argument("--repeat",
+                        help=f"number of measured runs in --perf mode (default: 5)",
+                        type=int,
+                        default=5,
+                        metavar="K")
+    parser.add_argument("--warmup",
+                        help=f"number of not measured runs before the measured runs in --perf mode (default: 1)",
+                        type=int,
+                        default=1,
+                        metavar="W")
+    parser.add_argument("--perf-json",
+                        help=f"write the runs and statistics of --perf mode to JSON file",
+                        dest="perf_json",
+                        metavar="FILE")
+    parser.add_argument("--incremental",
+                        help=f"rescan and evaluate only repos with changed data or markup"
+                             f", results of other repos are taken from the previous run",
+                        action="store_true")
+    parser.add_argument("--bootstrap",
+                        help=f"print 95%% confidence intervals of precision, recall, F1 and FPR"
+                             f" for N resamples of the data (default: 0 - no intervals)",
+                        type=int,
+                        default=0,
+                        metavar="N")
+    parser.add_argument("--bootstrap-unit",
+                        help=f"unit of data which is resampled in --bootstrap (default: repo)",
+                        dest="bootstrap_unit",
+                        choices=list(UNITS),
+                        default="repo")
+    parser.add_argument("--seed",
+                        help=f"seed of random resamples in --bootstrap (default: 0)",
+                        type=int,
+                        default=0)
+    parser.add_argument("--no-cache",
+                        help=f"do not use cached reports and results of the scanners",
+                        dest="no_cache",
+                        action="store_true")
+    parser.add_argument("--timing",
+                        help=f"write wall time, CPU time and peak memory of benchmark stages to JSON file",
+                        dest="timing",
+                        metavar="FILE")
+    parser.add_argument("--profile",
+                        help=f"dump cProfile statistics of each benchmark stage to DIR/<stage>.prof",
+                        dest="profile",
+                        metavar="DIR")
+    parser.add_argument("--quiet",
+                        help=f"do not print diagnostics of lost and unmatched credentials",
+                        action="store_true")
+    parser.add_argument("--diagnostics",
+                        help=f"write diagnostics to JSONL file (render: python -m benchmark.common.diagnostics FILE)",
+                        dest="diagnostics",
+                        metavar="FILE")
     return parser.parse_args()
 
 
+def check_arguments(args: Namespace, scanners: List[str]) -> Optional[str]:
+    """Returns the message about unsupported combination of the arguments or None"""
+    if not scanners or any(x not in SCANNER_LIST for x in scanners):
+        return f"Please check scanner name (support: {SCANNER_LIST})"
+    if args.perf:
+        if 1 != len(scanners) or args.load or args.fix:
+            return "--perf is supported only for single scanner without --load and --fix"
+        return None
+    if 1 < len(args.jobs):
+        return "Several jobs values are supported only in --perf mode"
+    if args.incremental and (1 != len(scanners) or args.load or args.fix or args.no_cache):
+        return "--incremental is supported only for single scanner without --load, --fix and --no-cache"
+    if 0 < args.bootstrap and (1 != len(scanners) or args.fix or args.incremental):
+        return "--bootstrap is supported only for single scanner without --fix and --incremental"
+    if 1 < len(scanners) and (args.load or args.fix):
+        return "--load and --fix are supported only for single scanner"
+    return None
+
+
 def main() -> None:
     args = get_arguments()
-    benchmark = Benchmark()
-    if args.scanner in SCANNER_LIST:
-        benchmark.run(args.scanner, args.load, args.fix)
+    profiler = StageProfiler(args.profile)
+    scanners = SCANNER_LIST if "all" == args.scanner else [x.strip() for x in args.scanner.split(',')]
+    if message := check_arguments(args, scanners):
+        print(message)
+    elif args.perf:
+        Benchmark().perf(scanners[0],
+                         repeat=args.repeat,
+                         warmup=args.warmup,
+                         jobs=args.jobs,
+                         perf_json=args.perf_json,
+                         profiler=profiler,
+                         shards=args.shards)
     else:
-        print(f"Please check scanner name (support: {SCANNER_LIST})")
+        options = RunOptions(match_mode=MatchMode(args.match),
+                             quiet=args.quiet,
+                             diagnostics=args.diagnostics,
+                             use_cache=not args.no_cache,
+                             shards=args.shards,
+                             jobs=args.jobs[0] if args.jobs else None,
+                             incremental=args.incremental,
+                             bootstrap=args.bootstrap,
+                             bootstrap_unit=args.bootstrap_unit,
+                             seed=args.seed)
+        if 1 == len(scanners):
+            Benchmark().run(scanners[0], output=args.load, fix=args.fix, options=options, profiler=profiler)
+        else:
+            Benchmark().compare(scanners, options=options, concurrency=args.concurrency, profiler=profiler)
+    if args.timing:
+        profiler.save(args.timing)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,44 @@
+import dataclasses
+import json
 import os
 import subprocess
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Any
 
-from benchmark.common import ScannerType
+import tabulate
+
+from benchmark.common import ScannerType, MatchMode
+from benchmark.common.diagnostics import Diagnostics
+from benchmark.common.perf import PerfSeries, jobs_sweep
+from benchmark.common.profiler import StageProfiler
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import PERFORMANCE_HEADER, PERFORMANCE_FLOATFMT, Scanner
 from benchmark.scanner.scanner_factory import ScannerFactory
 
 
+@dataclasses.dataclass
+class RunOptions:
+    """Options of the scanners in a benchmark run and in a comparison"""
+    match_mode: MatchMode = MatchMode.EXACT
+    quiet: bool = False
+    diagnostics: Optional[str] = None  # JSONL file, a file per scanner in comparison
+    use_cache: bool = True
+    shards: int = 1
+    jobs: Optional[int] = None  # the default of the adapter is used when it is None
+    incremental: bool = False  # single scanner run only
+    bootstrap: int = 0  # resamples for confidence intervals, single scanner run only
+    bootstrap_unit: str = "repo"
+    seed: Optional[int] = 0
+
+    def apply(self, scanner: Scanner, diagnostics: Optional[str]) -> None:
+        scanner.match_mode = self.match_mode
+        scanner.diagnostics = Diagnostics(self.quiet, diagnostics, scanner.line_cache)
+        if not self.use_cache:
+            scanner.report_cache = None
+        scanner.shards = self.shards
+        scanner.jobs = self.jobs
+
+
 class Benchmark:
     def __init__(self) -> None:
         ScannerFactory()
@@ -35,15 +68,169 @@ class Benchmark:
             subprocess.call(["./venv/bin/python", "download_data.py", "--data_dir", "data"], cwd=cred_data_path)
         return cred_data_path
 
-    def run(self, scanner_type: str, output: Optional[str] = None, fix: Optional[bool] = None) -> None:
+    def run(self,
+            scanner_type: str,
+            output: Optional[str] = None,
+            fix: Optional[bool] = None,
+            options: Optional[RunOptions] = None,
+            profiler: Optional[StageProfiler] = None) -> None:
+        options = options if options is not None else RunOptions()
         if _scanner_type := getattr(ScannerType, scanner_type.strip().upper(), None):
             scanner = ScannerFactory.create_scanner(_scanner_type,
                                                     self.working_dir,
                                                     self.cred_data_path,
                                                     bool(output),
-                                                    bool(fix))
+                                                    bool(fix),
+                                                    Markup(self.cred_data_path, profiler))
         else:
             raise RuntimeError(f"Wrong scanner_type='{scanner_type}'")
         if output:
             scanner.output_dir = output
-        scanner.run_benchmark(bool(output))
+        options.apply(scanner, options.diagnostics)
+        scanner.bootstrap = options.bootstrap
+        scanner.bootstrap_unit = options.bootstrap_unit
+        scanner.seed = options.seed
+        if options.incremental:
+            scanner.run_incremental()
+        else:
+            scanner.run_benchmark(bool(output))
+        if performance_row := scanner.performance_row():
+            print(tabulate.tabulate([performance_row], PERFORMANCE_HEADER, floatfmt=PERFORMANCE_FLOATFMT), flush=True)
+
+    def compare(self,
+                scanner_types: List[str],
+                options: Optional[RunOptions] = None,
+                concurrency: int = 1,
+                profiler: Optional[StageProfiler] = None) -> None:
+        """Runs the scanners with the markup loaded once and prints comparison of the results.
+
+        Up to concurrency scanners are run at the same time. Results are evaluated one by one in the given order.
+        """
+        options = options if options is not None else RunOptions()
+        _scanner_types = []
+        for scanner_type in scanner_types:
+            if _scanner_type := getattr(ScannerType, scanner_type.strip().upper(), None):
+                _scanner_types.append(_scanner_type)
+            else:
+                raise RuntimeError(f"Wrong scanner_type='{scanner_type}'")
+        markup = Markup(self.cred_data_path, profiler)
+        scanners = []
+        for _scanner_type in _scanner_types:
+            scanner = ScannerFactory.create_scanner(_scanner_type,
+                                                    self.working_dir,
+                                                    self.cred_data_path,
+                                                    False,
+                                                    False,
+                                                    markup)
+            if options.diagnostics:
+                # each scanner has own diagnostics file
+                diagnostics_root, diagnostics_ext = os.path.splitext(options.diagnostics)
+                scanner_diagnostics = f"{diagnostics_root}.{_scanner_type.value}{diagnostics_ext}"
+            else:
+                scanner_diagnostics = None
+            options.apply(scanner, scanner_diagnostics)
+            scanners.append(scanner)
+
+        rows: List[List[Any]] = []
+        performance_rows: List[List[Any]] = []
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = [executor.submit(x.prepare_report) for x in scanners]
+            for scanner, future in zip(scanners, futures):
+                try:
+                    future.result()
+                    summary_row = scanner.run_benchmark(True)
+                except Exception as exc:
+                    print(f"{scanner.scanner_type.value} failure: {exc}", flush=True)
+                    continue
+                # positives and negatives of the markup are the same for all scanners
+                rows.append([scanner.scanner_type.value] + summary_row[3:])
+                if performance_row := scanner.performance_row():
+                    performance_rows.append(performance_row)
+        header = ["Scanner", "Reported", "TP", "FP", "TN", "FN", "FPR", "FNR", "ACC", "PRC", "RCL", "F1"]
+        print(tabulate.tabulate(rows, header, floatfmt=".6f"), flush=True)
+        if performance_rows:
+            # scanners which were run concurrently share CPU, so the throughput is lower than alone
+            print(tabulate.tabulate(performance_rows, PERFORMANCE_HEADER, floatfmt=PERFORMANCE_FLOATFMT), flush=True)
+
+    def perf(self,
+             scanner_type: str,
+             repeat: int = 5,
+             warmup: int = 1,
+             jobs: Optional[List[int]] = None,
+             perf_json: Optional[str] = None,
+             profiler: Optional[StageProfiler] = None,
+             shards: int = 1) -> None:
+        """Runs the scanner warmup + repeat times for each jobs value and prints wall time statistics of the runs.
+
+        Jobs are swept 1, 2, 4, ... CPU number by default for scanners which support the parameter.
+        Reports are not evaluated and the cache is not used.
+        """
+        if _scanner_type := getattr(ScannerType, scanner_type.strip().upper(), None):
+            markup = Markup(self.cred_data_path, profiler)
+            scanner = ScannerFactory.create_scanner(_scanner_type,
+                                                    self.working_dir,
+                                                    self.cred_data_path,
+                                                    False,
+                                                    False,
+                                                    markup)
+        else:
+            raise RuntimeError(f"Wrong scanner_type='{scanner_type}'")
+        scanner.report_cache = None
+        scanner.shards = shards
+        if not scanner.jobs_supported:
+            if jobs:
+                print(f"{_scanner_type.value} has no jobs parameter", flush=True)
+            jobs_list: List[Optional[int]] = [None]
+        else:
+            jobs_list = list(jobs or jobs_sweep(os.cpu_count() or 1))
+        series_list: List[PerfSeries] = []
+        for _jobs in jobs_list:
+            scanner.jobs = _jobs
+            # the scanner is installed once for the runs of the jobs value
+            scanner.scanner_initialized = False
+            series = PerfSeries(_jobs)
+            for n in range(warmup + max(1, repeat)):
+                scanner.prepare_report()
+                if scanner.process_stat is None:
+                    raise RuntimeError(f"{_scanner_type.value} runs no process to measure")
+                if warmup <= n:
+                    series.add(scanner.process_stat)
+            series_list.append(series)
+
+        header = ["Jobs", "Runs", "Median, s", "P95, s", "Min, s", "CPU, s", "PeakRSS, MiB", "Speedup", "Efficiency",
+                  "Lines/s"]
+        rows: List[List[Any]] = []
+        base = series_list[0]
+        for series in series_list:
+            speedup = base.median / series.median if series.median else None
+            efficiency = speedup * (base.jobs or 1) / series.jobs if speedup and series.jobs else None
+            rows.append([series.jobs,
+                         len(series.wall_times),
+                         series.median,
+                         series.p95,
+                         min(series.wall_times),
+                         series.cpu_median,
+                         series.peak_rss / (1 << 20),
+                         speedup,
+                         efficiency,
+                         markup.total_data_valid_lines / series.median if series.median else None])
+        print(f"{_scanner_type.value} performance: warmup {warmup}, data {markup.total_data_files} files"
+              f", {markup.total_data_valid_lines} lines, {markup.total_data_size} bytes", flush=True)
+        floatfmt = ("", "", ".3f", ".3f", ".3f", ".3f", ".1f", ".3f", ".3f", ".1f")
+        print(tabulate.tabulate(rows, header, floatfmt=floatfmt), flush=True)
+        if perf_json:
+            with open(perf_json, "w") as f:
+                json.dump({
+                    "scanner": _scanner_type.value,
+                    "warmup": warmup,
+                    "repeat": max(1, repeat),
+                    "cpu_count": os.cpu_count(),
+                    "data": {
+                        "files": markup.total_data_files,
+                        "lines": markup.total_data_valid_lines,
+                        "bytes": markup.total_data_size
+                    },
+                    "series": [x.to_dict() for x in series_list]
+                },
+                    f,
+                    indent=4)
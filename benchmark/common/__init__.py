@@ -1,3 +1,3 @@
-from benchmark.common.constants import ScannerType, LineStatus, URL
+from benchmark.common.constants import ScannerType, LineStatus, URL, MatchMode
 from benchmark.common.git_service import GitService
 from benchmark.common.result import Result
@@ -0,0 +1,142 @@
+import random
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from benchmark.common.perf import percentile
+from constants import LABEL_TRUE
+from meta_table import MetaTable, StringTable
+
+UNITS = ("repo", "file")
+METRICS = ("precision", "recall", "f1", "fpr")
+# counters of a group of findings: true positives, false positives, positives and negatives of markup
+FIELDS_NUMBER = 4
+
+
+def unit_of(data_path: str, unit: str) -> str:
+    """Resampled unit of the path like data/<repo>/..."""
+    if "repo" == unit:
+        parts = data_path.split('/', maxsplit=2)
+        return parts[1] if 1 < len(parts) else data_path
+    return data_path
+
+
+def metrics(tp: int, fp: int, positives: int, negatives: int) -> Tuple[Optional[float], ...]:
+    """Precision, recall, F1 and FPR like in Result. None when a metric is not defined"""
+    precision = tp / (tp + fp) if tp + fp else None
+    recall = tp / positives if positives else None
+    if precision is None or recall is None or not precision + recall:
+        f1 = None
+    else:
+        f1 = 2 * precision * recall / (precision + recall)
+    fpr = fp / negatives if negatives else None
+    return precision, recall, f1, fpr
+
+
+class Outcomes:
+    """Compact per-candidate arrays of evaluated findings and of the markup: unit, rule and whether it is True.
+
+    Counters of each unit are packed to one integer, so a resample is a sum of integers instead of an evaluation.
+    """
+
+    def __init__(self, unit: str = "repo"):
+        if unit not in UNITS:
+            raise ValueError(f"Unit must be in {UNITS}")
+        self.unit_name = unit
+        self.units = StringTable()
+        self.rules = StringTable()
+        self.unit = array('I')
+        self.rule = array('I')
+        self.true_markup = bytearray()
+        # a markup row is counted for each rule of its category like in total counters of the benchmark
+        self.markup_unit = array('I')
+        self.markup_rule = array('I')
+        self.markup_true = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.unit)
+
+    def add(self, data_path: str, rule: str, is_true: bool) -> None:
+        self.unit.append(self.units.intern(unit_of(data_path, self.unit_name)))
+        self.rule.append(self.rules.intern(rule))
+        self.true_markup.append(1 if is_true else 0)
+
+    def add_markup(self, meta_table: MetaTable) -> None:
+        """Adds positives and negatives of the markup to the units"""
+        strings = meta_table.strings.values
+        unit_ids: Dict[int, int] = {}
+        rule_ids: Dict[int, List[int]] = {}
+        true_label = ord(LABEL_TRUE)
+        for file_path, category, ground_truth in zip(meta_table.file_path, meta_table.category,
+                                                     meta_table.ground_truth):
+            if (unit_id := unit_ids.get(file_path)) is None:
+                unit_id = unit_ids[file_path] = self.units.intern(unit_of(strings[file_path], self.unit_name))
+            if (category_rule_ids := rule_ids.get(category)) is None:
+                category_rule_ids = rule_ids[category] = [self.rules.intern(x) for x in strings[category].split(':')]
+            for rule_id in category_rule_ids:
+                self.markup_unit.append(unit_id)
+                self.markup_rule.append(rule_id)
+                self.markup_true.append(1 if true_label == ground_truth else 0)
+
+    def _pack(self) -> Tuple[List[int], int]:
+        """Returns counters of each unit packed to an integer with fixed width fields and the width.
+
+        Group 0 is the total and group N + 1 is the rule N. A sum of packed integers is the sum of all counters.
+        """
+        groups_number = 1 + len(self.rules)
+        units_number = len(self.units)
+        counters = [[0] * (FIELDS_NUMBER * groups_number) for _ in range(units_number)]
+        for unit_id, rule_id, is_true in zip(self.unit, self.rule, self.true_markup):
+            field = 0 if is_true else 1
+            counters[unit_id][field] += 1
+            counters[unit_id][FIELDS_NUMBER * (1 + rule_id) + field] += 1
+        for unit_id, rule_id, is_true in zip(self.markup_unit, self.markup_rule, self.markup_true):
+            field = 2 if is_true else 3
+            counters[unit_id][field] += 1
+            counters[unit_id][FIELDS_NUMBER * (1 + rule_id) + field] += 1
+        max_value = max((max(x) for x in counters), default=0)
+        # a field of a sum of units_number drawn units does not overflow
+        width = (max_value * units_number).bit_length() + 1
+        packed = []
+        for unit_counters in counters:
+            value = 0
+            for field_value in reversed(unit_counters):
+                value = (value << width) | field_value
+            packed.append(value)
+        return packed, width
+
+    def bootstrap(self,
+                  resamples: int,
+                  seed: Optional[int] = None,
+                  confidence: float = 0.95) -> Dict[str, Dict[str, Tuple[Optional[float], Optional[float]]]]:
+        """Percentile confidence intervals of the metrics for resampling of the units with replacement.
+
+        Returns rule ("" is the total): metric: (low, high).
+        """
+        packed, width = self._pack()
+        groups = [""] + self.rules.values
+        samples: Dict[str, Dict[str, List[float]]] = {x: {y: [] for y in METRICS} for x in groups}
+        if packed:
+            rng = random.Random(seed)
+            population = range(len(packed))
+            field_mask = (1 << width) - 1
+            for _ in range(resamples):
+                total = sum(map(packed.__getitem__, rng.choices(population, k=len(packed))))
+                for group in groups:
+                    fields = []
+                    for _ in range(FIELDS_NUMBER):
+                        fields.append(total & field_mask)
+                        total >>= width
+                    group_samples = samples[group]
+                    for metric, value in zip(METRICS, metrics(*fields)):
+                        if value is not None:
+                            group_samples[metric].append(value)
+        alpha = 100 * (1 - confidence) / 2
+        intervals: Dict[str, Dict[str, Tuple[Optional[float], Optional[float]]]] = {}
+        for group, group_samples in samples.items():
+            intervals[group] = {}
+            for metric, values in group_samples.items():
+                if values:
+                    intervals[group][metric] = (percentile(values, alpha), percentile(values, 100 - alpha))
+                else:
+                    intervals[group][metric] = (None, None)
+        return intervals
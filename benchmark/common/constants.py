@@ -25,6 +25,16 @@ class LineStatus(Enum):
     CHECKED = "checked"
 
 
+class MatchMode(Enum):
+    """How a reported line range is matched with markup"""
+    EXACT = "exact"  # the same LineStart and LineEnd
+    CONTAIN = "contain"  # markup includes all reported lines
+    OVERLAP = "overlap"  # markup has a common line with reported ones
+
+    def __str__(self):
+        return self.value
+
+
 class URL:
     CREDSWEEPER = "https://github.com/Samsung/CredSweeper.git"
     DETECT_SECRETS = "detect_secrets"
@@ -0,0 +1,126 @@
+import json
+import sys
+from argparse import ArgumentParser
+from enum import Enum
+from typing import Optional, TextIO, Iterable, Dict, Any
+
+from colorama import Fore, Style
+
+from line_cache import LineCache
+
+
+class DiagnosticKind(Enum):
+    NOT_FOUND = "NOT_FOUND"  # no markup for the lines
+    LOST = "LOST"  # markup for the lines exists but not for the value
+    UNMATCH = "UNMATCH"  # value start of markup is not matched
+    ALMOST = "ALMOST"  # value start of markup is matched but value end is not
+    NEARBY = "NEARBY"  # value end of markup differs a little
+    DUPLICATE = "DUPLICATE"  # True markup was already checked
+    WARNING = "WARNING"  # markup may be wrong
+
+    def __str__(self):
+        return self.value
+
+
+def get_colored_line(line_cache: LineCache, file_path: str, line_start: int, line_end: int, value_start: int,
+                     value_end: int) -> str:
+    """get line with color highlighted value for quick review"""
+    try:
+        lines_number = line_cache.lines_number(file_path)
+    except Exception:
+        # no file
+        return f"Cannot read '{Fore.LIGHTMAGENTA_EX}{file_path}{Style.RESET_ALL}' file"
+    if line_start == line_end <= lines_number and 0 <= value_start < value_end:
+        # normal single line value
+        _line = line_cache.get_line(file_path, line_start)
+        colored_line = (_line[:value_start] + Fore.LIGHTYELLOW_EX +
+                        _line[value_start:value_end] + Style.RESET_ALL + _line[value_end:])
+    elif line_start < line_end <= lines_number:
+        # multiline
+        colored_line = '\n'.join(line_cache.get_lines(file_path, line_start, line_end))
+    else:
+        # wrong line numeration (.xml e.g.)
+        colored_line = ''
+    return colored_line
+
+
+def render_record(record: Dict[str, Any], line_cache: LineCache) -> str:
+    """Text of a diagnostic record. The source line is read and colored only here"""
+    if "file_path" in record:
+        colored_line = get_colored_line(line_cache, record["file_path"], record["line_start"], record["line_end"],
+                                        record["value_start"], record["value_end"])
+        return f"{record['message']}\n{colored_line}"
+    return record["message"]
+
+
+class Diagnostics:
+    """Sink of benchmark diagnostics.
+
+    Records are printed to stdout as text unless quiet and are written to JSONL file when the path is given.
+    Both outputs are buffered - the order of records is kept but they are not flushed one by one.
+    """
+
+    def __init__(self, quiet: bool = False, path: Optional[str] = None, line_cache: Optional[LineCache] = None):
+        self.quiet = quiet
+        self.path = path
+        self.line_cache = line_cache if line_cache is not None else LineCache()
+        self._file: Optional[TextIO] = open(path, "w", buffering=1 << 20) if path else None
+        self.counters: Dict[DiagnosticKind, int] = {}
+
+    def report(self,
+               kind: DiagnosticKind,
+               message: str,
+               file_path: Optional[str] = None,
+               line_start: int = -1,
+               line_end: int = -1,
+               value_start: int = -1,
+               value_end: int = -1) -> None:
+        """Registers a diagnostic. Location of a finding is given to show the source line after the message"""
+        self.counters[kind] = 1 + self.counters.get(kind, 0)
+        if self.quiet and self._file is None:
+            return
+        record: Dict[str, Any] = {"kind": str(kind), "message": message}
+        if file_path is not None:
+            record.update(file_path=file_path,
+                          line_start=line_start,
+                          line_end=line_end,
+                          value_start=value_start,
+                          value_end=value_end)
+        if not self.quiet:
+            sys.stdout.write(f"{render_record(record, self.line_cache)}\n")
+        if self._file is not None:
+            self._file.write(f"{json.dumps(record)}\n")
+
+    def close(self) -> None:
+        sys.stdout.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def render(lines: Iterable[str], kinds: Optional[Iterable[str]] = None, output: TextIO = sys.stdout) -> None:
+    """Prints JSONL diagnostics in the same format as the benchmark does"""
+    kinds = set(kinds) if kinds else None
+    line_cache = LineCache()
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if kinds is None or record["kind"] in kinds:
+            output.write(f"{render_record(record, line_cache)}\n")
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="python -m benchmark.common.diagnostics")
+    parser.add_argument("path", help="JSONL diagnostics file of the benchmark")
+    parser.add_argument("--kind",
+                        help="show only the kind of diagnostics (may be repeated)",
+                        choices=[str(x) for x in DiagnosticKind],
+                        action="append")
+    args = parser.parse_args()
+    with open(args.path) as f:
+        render(f, args.kind)
+
+
+if __name__ == "__main__":
+    main()
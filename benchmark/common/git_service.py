@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 import git
 
@@ -12,6 +13,14 @@ class GitService:
     def pull(cls, scanner_dir: str) -> None:
         git.Git(scanner_dir).pull()
 
+    @classmethod
+    def get_version(cls, scanner_dir: str) -> Optional[str]:
+        """Returns commit of the scanner repository or None when the directory is not a repository"""
+        try:
+            return git.Repo(scanner_dir).head.commit.hexsha
+        except Exception:
+            return None
+
     @classmethod
     def set_scanner_up_to_date(cls, working_dir: str, scanner_url: str, preload: bool) -> str:
         scanner_dir = working_dir + "/temp/" + scanner_url.split("/")[-1].split(".")[0]
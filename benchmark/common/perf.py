@@ -0,0 +1,62 @@
+import dataclasses
+import math
+import statistics
+from typing import Any, Dict, List, Optional
+
+from benchmark.common.process_monitor import ProcessStat
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile, so it is one of the measured values"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def jobs_sweep(max_jobs: int) -> List[int]:
+    """1, 2, 4, ... and max_jobs"""
+    sweep = []
+    jobs = 1
+    while jobs < max_jobs:
+        sweep.append(jobs)
+        jobs *= 2
+    sweep.append(max(1, max_jobs))
+    return sweep
+
+
+@dataclasses.dataclass
+class PerfSeries:
+    """Measured runs of a scanner with the same jobs parameter. None jobs is the default of the scanner"""
+    jobs: Optional[int]
+    wall_times: List[float] = dataclasses.field(default_factory=list)
+    cpu_times: List[float] = dataclasses.field(default_factory=list)
+    peak_rss: int = 0  # bytes, the largest of the runs
+
+    def add(self, process_stat: ProcessStat) -> None:
+        self.wall_times.append(process_stat.wall_time)
+        self.cpu_times.append(process_stat.cpu_time)
+        self.peak_rss = max(self.peak_rss, process_stat.peak_rss)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.wall_times)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.wall_times, 95)
+
+    @property
+    def cpu_median(self) -> float:
+        return statistics.median(self.cpu_times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobs": self.jobs,
+            "wall_times": self.wall_times,
+            "cpu_times": self.cpu_times,
+            "median": self.median,
+            "p95": self.p95,
+            "min": min(self.wall_times),
+            "cpu_median": self.cpu_median,
+            "peak_rss": self.peak_rss,
+        }
@@ -0,0 +1,178 @@
+import contextlib
+import dataclasses
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Generator, List, Optional, Set, Tuple
+
+PROC_DIR = "/proc"
+
+
+def _max_rss_bytes(max_rss: int) -> int:
+    """ru_maxrss is in kilobytes on Linux"""
+    return max_rss if "darwin" == sys.platform else 1024 * max_rss
+
+
+@dataclasses.dataclass
+class ProcessStat:
+    wall_time: float = 0.0  # seconds
+    cpu_time: float = 0.0  # seconds of all processes of the tree
+    peak_rss: int = 0  # bytes, the largest sum of resident memory peaks of processes of the tree
+    read_bytes: int = 0  # bytes which were read by the tree including page cache hits
+
+    def add(self, other: "ProcessStat") -> None:
+        """Accumulates statistics of commands which were run one after another"""
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.peak_rss = max(self.peak_rss, other.peak_rss)
+        self.read_bytes += other.read_bytes
+
+    def add_concurrent(self, other: "ProcessStat") -> None:
+        """Accumulates statistics of commands which were run at the same time. Peak RSS is the upper bound"""
+        self.wall_time = max(self.wall_time, other.wall_time)
+        self.cpu_time += other.cpu_time
+        self.peak_rss += other.peak_rss
+        self.read_bytes += other.read_bytes
+
+
+def _read_children(pid: int) -> List[int]:
+    children = []
+    try:
+        for tid in os.listdir(f"{PROC_DIR}/{pid}/task"):
+            with open(f"{PROC_DIR}/{pid}/task/{tid}/children") as f:
+                children.extend(int(x) for x in f.read().split())
+    except (OSError, ValueError):
+        # the process has exited or the kernel has no children file
+        pass
+    return children
+
+
+def _read_peak_rss(pid: int) -> int:
+    """High-water mark of resident memory of the process since its start, so short peaks between samples are seen"""
+    try:
+        with open(f"{PROC_DIR}/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return 1024 * int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _read_rchar(pid: int) -> Optional[int]:
+    try:
+        with open(f"{PROC_DIR}/{pid}/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class ProcessTreeSampler:
+    """Samples resident memory and read bytes of a process and its descendants from /proc.
+
+    Values between the samples are lost for short-lived processes. Nothing is sampled without /proc.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        # a waited descendant is added to read bytes of its parent, so the sum of the current tree is enough
+        self.read_bytes = 0
+        self.sampled = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree(self) -> List[int]:
+        tree = [self.pid]
+        seen: Set[int] = {self.pid}
+        for pid in tree:
+            for child in _read_children(pid):
+                if child not in seen:
+                    seen.add(child)
+                    tree.append(child)
+        return tree
+
+    def sample(self) -> None:
+        rss = read_bytes = 0
+        for pid in self._tree():
+            rss += _read_peak_rss(pid)
+            read_bytes += _read_rchar(pid) or 0
+        self.peak_rss = max(self.peak_rss, rss)
+        self.read_bytes = max(self.read_bytes, read_bytes)
+        self.sampled = True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        if os.path.isdir(PROC_DIR):
+            self.sample()
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def run_monitored(args: List[str],
+                  cwd: Optional[str] = None,
+                  capture_output: bool = False,
+                  discard_stderr: bool = False) -> Tuple[int, Optional[bytes], ProcessStat]:
+    """Runs the command like subprocess.call and measures its process tree.
+
+    Returns exit code, stdout when it is captured and the statistics. stderr is inherited unless it is discarded.
+    CPU time is exact for descendants which were waited for by their parents. Other values are sampled.
+    """
+    wall_start = time.perf_counter()
+    proc = subprocess.Popen(args,
+                            cwd=cwd,
+                            stdout=subprocess.PIPE if capture_output else None,
+                            stderr=subprocess.DEVNULL if discard_stderr else None)
+    sampler = ProcessTreeSampler(proc.pid)
+    sampler.start()
+    output = None
+    try:
+        if proc.stdout is not None:
+            output = proc.stdout.read()
+            proc.stdout.close()
+        if hasattr(os, "waitid"):
+            # the exited process is kept as zombie for the last sample which includes its waited descendants
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            sampler.sample()
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        sampler.stop()
+        if proc.returncode is None:
+            proc.kill()
+            proc.wait()
+    # ru_maxrss of a child includes memory of the benchmark process which was forked, so it is the last resort
+    peak_rss = sampler.peak_rss if sampler.sampled else _max_rss_bytes(rusage.ru_maxrss)
+    return proc.returncode, output, ProcessStat(wall_time=time.perf_counter() - wall_start,
+                                                cpu_time=rusage.ru_utime + rusage.ru_stime,
+                                                peak_rss=peak_rss,
+                                                read_bytes=sampler.read_bytes)
+
+
+@contextlib.contextmanager
+def monitor_self(stat: ProcessStat) -> Generator[None, None, None]:
+    """Measures a scanner which works in the benchmark process. Peak RSS is the high-water mark of the process"""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    rchar_start = _read_rchar(os.getpid()) or 0
+    try:
+        yield
+    finally:
+        stat.add(ProcessStat(wall_time=time.perf_counter() - wall_start,
+                             cpu_time=time.process_time() - cpu_start,
+                             peak_rss=_max_rss_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+                             read_bytes=max(0, (_read_rchar(os.getpid()) or 0) - rchar_start)))
@@ -0,0 +1,88 @@
+import contextlib
+import cProfile
+import dataclasses
+import json
+import os
+import resource
+import sys
+import time
+from typing import Generator, List, Optional
+
+
+def _peak_rss(who: int) -> int:
+    """Peak resident set size in bytes. Linux reports kilobytes"""
+    max_rss = resource.getrusage(who).ru_maxrss
+    return max_rss if "darwin" == sys.platform else 1024 * max_rss
+
+
+@dataclasses.dataclass
+class StageStat:
+    name: str
+    wall_time: float  # seconds
+    cpu_time: float  # seconds of the process
+    children_cpu_time: float  # seconds of finished subprocesses e.g. a scanner
+    # ru_maxrss never decreases, so the values at the end of the stage are of the process lifetime
+    max_rss_so_far: int  # bytes, high-water mark of the process
+    children_max_rss_so_far: int  # bytes, the largest finished subprocess
+    # the stage has raised the high-water mark by the bytes. 0 means the peak was reached before the stage
+    peak_rss_growth: int
+    children_peak_rss_growth: int
+
+
+class StageProfiler:
+    """Measures stages of the benchmark. cProfile statistics of each stage are dumped when profile_dir is given"""
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.stages: List[StageStat] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        profile = None
+        if self.profile_dir:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # a stage in other thread is being profiled
+                profile = None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        times_start = os.times()
+        max_rss_start = _peak_rss(resource.RUSAGE_SELF)
+        children_max_rss_start = _peak_rss(resource.RUSAGE_CHILDREN)
+        try:
+            yield
+        finally:
+            times_end = os.times()
+            cpu_end = time.process_time()
+            wall_end = time.perf_counter()
+            if profile is not None:
+                profile.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            max_rss = _peak_rss(resource.RUSAGE_SELF)
+            children_max_rss = _peak_rss(resource.RUSAGE_CHILDREN)
+            self.stages.append(
+                StageStat(name=name,
+                          wall_time=wall_end - wall_start,
+                          cpu_time=cpu_end - cpu_start,
+                          children_cpu_time=(times_end.children_user - times_start.children_user) +
+                          (times_end.children_system - times_start.children_system),
+                          max_rss_so_far=max_rss,
+                          children_max_rss_so_far=children_max_rss,
+                          peak_rss_growth=max_rss - max_rss_start,
+                          children_peak_rss_growth=children_max_rss - children_max_rss_start))
+
+    def save(self, path: str) -> None:
+        """Writes JSON summary of the stages"""
+        summary = {
+            "stages": [dataclasses.asdict(x) for x in self.stages],
+            "wall_time": sum(x.wall_time for x in self.stages),
+            "cpu_time": sum(x.cpu_time for x in self.stages),
+            "children_cpu_time": sum(x.children_cpu_time for x in self.stages),
+            "peak_rss": max((x.max_rss_so_far for x in self.stages), default=0),
+            "children_peak_rss": max((x.children_max_rss_so_far for x in self.stages), default=0),
+        }
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=4)
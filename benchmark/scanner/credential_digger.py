@@ -1,15 +1,25 @@
+import importlib.metadata
 import os
 import sqlite3
 import subprocess
+from typing import Generator, Optional
 
 from benchmark.common.constants import URL, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.process_monitor import ProcessStat, monitor_self
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
 
 
 class CredentialDigger(Scanner):
 
-    def __init__(self, working_dir: str, cred_data_dir: str, preload: bool, fix: bool) -> None:
-        super().__init__(ScannerType.CREDENTIAL_DIGGER, URL.CREDENTIAL_DIGGER, working_dir, cred_data_dir, preload, fix)
+    def __init__(self,
+                 working_dir: str,
+                 cred_data_dir: str,
+                 preload: bool,
+                 fix: bool,
+                 markup: Optional[Markup] = None) -> None:
+        super().__init__(ScannerType.CREDENTIAL_DIGGER, URL.CREDENTIAL_DIGGER, working_dir, cred_data_dir, preload, fix,
+                         markup)
         self.output_dir: str = f"{self.scanner_dir}/output.db"
         self.working_dir: str = working_dir
 
@@ -51,11 +61,26 @@ class CredentialDigger(Scanner):
         subprocess.call([f"{self.working_dir}/venv/bin/python", "-m", "credentialdigger", "download", "snippet_model"],
                         cwd=self.scanner_dir)
 
+    def _scanner_version(self) -> Optional[str]:
+        # the scanner works in the benchmark process with its rules
+        try:
+            package_version = importlib.metadata.version("credentialdigger")
+        except importlib.metadata.PackageNotFoundError:
+            return None
+        rules_path = f"{self.working_dir}/benchmark/scanner/bin/credential_digger/rules.yml"
+        if rules_version := self._files_version(rules_path):
+            return f"{package_version} {rules_version}"
+        return None
+
     def run_scanner(self) -> None:
-        self.init_scanner()
-        self.client.scan_path(scan_path=f"{self.cred_data_dir}/data", models=["PathModel", "SnippetModel"], force=True)
+        self.init_scanner_once()
+        # the scanner works in the benchmark process
+        self.process_stat = ProcessStat()
+        with monitor_self(self.process_stat):
+            self.client.scan_path(scan_path=f"{self.cred_data_dir}/data", models=["PathModel", "SnippetModel"],
+                                  force=True)
 
-    def parse_result(self) -> None:
+    def iter_findings(self) -> Generator[Finding, None, None]:
         conn = sqlite3.connect(self.output_dir)
         cursor = conn.cursor()
         cursor.execute("SELECT id, file_name, line_number FROM discoveries WHERE state = 'new'")
@@ -64,5 +89,4 @@ class CredentialDigger(Scanner):
             line_data = {"file_name": data[1], "line_number": data[2]}
             if line_data["file_name"].split("/")[-1] == "LICENSE" or "COPYING" in line_data["file_name"].split("/")[-1]:
                 continue
-            _, _, _ = self.check_line_from_meta(line_data["file_name"], line_data["line_number"],
-                                                line_data["line_number"])
+            yield line_data["file_name"], line_data["line_number"], line_data["line_number"], -1, -1, ""
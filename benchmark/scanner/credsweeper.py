@@ -1,8 +1,10 @@
-import json
 import subprocess
+from typing import Generator, List, Optional
 
 from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
+from json_stream import JsonStream
 from meta_cred import MetaCred
 
 
@@ -12,8 +14,13 @@ class CredSweeper(Scanner):
                    LineStatus.NOT_IN_DB: 'N',
                    LineStatus.CHECKED: 'C'}
 
-    def __init__(self, working_dir: str, cred_data_dir: str, preload: bool, fix:bool) -> None:
-        super().__init__(ScannerType.CREDSWEEPER, URL.CREDSWEEPER, working_dir, cred_data_dir, preload, fix)
+    def __init__(self,
+                 working_dir: str,
+                 cred_data_dir: str,
+                 preload: bool,
+                 fix: bool,
+                 markup: Optional[Markup] = None) -> None:
+        super().__init__(ScannerType.CREDSWEEPER, URL.CREDSWEEPER, working_dir, cred_data_dir, preload, fix, markup)
         self.output_dir: str = f"{self.scanner_dir}/output.json"
 
     @property
@@ -24,43 +31,57 @@ class CredSweeper(Scanner):
     def output_dir(self, output_dir: str) -> None:
         self._output_dir = output_dir
 
+    @property
+    def jobs_supported(self) -> bool:
+        return True
+
     def init_scanner(self) -> None:
         subprocess.call(["virtualenv", "venv"], cwd=self.scanner_dir)
         subprocess.call(["./venv/bin/python", "-m", "pip", "install", "-qr", "requirements.txt"], cwd=self.scanner_dir)
 
+    @property
+    def sharding_supported(self) -> bool:
+        # CredSweeper scans with own jobs
+        return False
+
     def run_scanner(self) -> None:
-        self.init_scanner()
-        subprocess.call([
-            "./venv/bin/python", "-m", "credsweeper", "--banner", "--path", f"{self.cred_data_dir}/data", "--jobs", "4",
-            "--save-json", self.output_dir, "--sort", "--subtext"
+        self.init_scanner_once()
+        self._scan_shard(None, self.output_dir)
+
+    @property
+    def partial_scan_supported(self) -> bool:
+        return True
+
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        data_dir = f"{self.cred_data_dir}/data"
+        paths = [data_dir] if repos is None else [f"{data_dir}/{x}" for x in repos]
+        self._run_command(["./venv/bin/python", "-m", "credsweeper", "--banner", "--path"] + paths + [
+            "--jobs", str(self.jobs or 4), "--save-json", output_path, "--sort", "--subtext"
         ],
             cwd=self.scanner_dir)
 
-    def parse_result(self) -> None:
-        with open(self.output_dir, "r") as f:
-            data = json.load(f)
-
+    def iter_findings(self) -> Generator[Finding, None, None]:
         cred_set = set()
-        for cred in data:
-            meta_cred = MetaCred(cred)
-            # path will be same for all line_data_list
-            path_upper = meta_cred.path.upper()
-            if any(i in path_upper for i in ["/COPYING", "/LICENSE"]):
-                continue
-            uniq_cred_key = (meta_cred.line_start, meta_cred.line_end,
-                        meta_cred.value_start, meta_cred.value_end,
-                        meta_cred.path, meta_cred.rule)
-            if uniq_cred_key in cred_set:
-                # after value sanitize there may be duplicated coordinates - skip them
-                continue
-            cred_set.add(uniq_cred_key)
+        with open(self.output_dir, "r") as f:
+            for cred in JsonStream(f).iter_array():
+                meta_cred = MetaCred(cred)
+                # path will be same for all line_data_list
+                path_upper = meta_cred.path.upper()
+                if any(i in path_upper for i in ["/COPYING", "/LICENSE"]):
+                    continue
+                uniq_cred_key = (meta_cred.line_start, meta_cred.line_end,
+                            meta_cred.value_start, meta_cred.value_end,
+                            meta_cred.path, meta_cred.rule)
+                if uniq_cred_key in cred_set:
+                    # after value sanitize there may be duplicated coordinates - skip them
+                    continue
+                cred_set.add(uniq_cred_key)
 
-            self.reported[meta_cred.rule] = 1 + self.reported.get(meta_cred.rule, 0)
+                self.reported[meta_cred.rule] = 1 + self.reported.get(meta_cred.rule, 0)
 
-            check_line_result, project_id, file_id = \
-                self.check_line_from_meta(file_path=meta_cred.path,
-                                          line_start=meta_cred.line_start,
-                                          line_end=meta_cred.line_end,
-                                          value_start=meta_cred.value_start,
-                                          value_end=meta_cred.value_end,
-                                          rule=meta_cred.rule)
+                yield (meta_cred.path,
+                       meta_cred.line_start,
+                       meta_cred.line_end,
+                       meta_cred.value_start,
+                       meta_cred.value_end,
+                       meta_cred.rule)
@@ -1,16 +1,22 @@
 import json
-import linecache
-import os
 import subprocess
-from typing import Tuple
+from typing import Any, Dict, Generator, List, Optional
 
-from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.constants import URL, ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
+from json_stream import JsonStream
 
 
 class DetectSecrets(Scanner):
-    def __init__(self, working_dir, cred_data_dir, preload: bool, fix: bool):
-        super().__init__(ScannerType.DETECT_SECRETS, URL.DETECT_SECRETS, working_dir, cred_data_dir, preload, fix)
+    def __init__(self,
+                 working_dir,
+                 cred_data_dir,
+                 preload: bool,
+                 fix: bool,
+                 markup: Optional[Markup] = None):
+        super().__init__(ScannerType.DETECT_SECRETS, URL.DETECT_SECRETS, working_dir, cred_data_dir, preload, fix,
+                         markup)
         self.output_dir: str = f"{self.scanner_dir}/output.json"
 
     @property
@@ -25,38 +31,51 @@ class DetectSecrets(Scanner):
         subprocess.call(["virtualenv", "venv"], cwd=self.scanner_dir)
         subprocess.call(["./venv/bin/python", "-m", "pip", "install", "detect-secrets"], cwd=self.scanner_dir)
 
+    def _scanner_version(self) -> Optional[str]:
+        return self._venv_package_version("detect-secrets")
+
     def run_scanner(self) -> None:
-        self.init_scanner()
-        proc = subprocess.Popen(
-            [f"{self.scanner_dir}/venv/bin/detect-secrets", "scan", "--all-files", f"{self.cred_data_dir}/data"],
+        self.init_scanner_once()
+        self._scan_data()
+
+    @property
+    def partial_scan_supported(self) -> bool:
+        return True
+
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        data_dir = f"{self.cred_data_dir}/data"
+        paths = [data_dir] if repos is None else [f"{data_dir}/{x}" for x in repos]
+        _, out = self._run_command(
+            [f"{self.scanner_dir}/venv/bin/detect-secrets", "scan", "--all-files"] + paths,
             cwd=self.scanner_dir + "/../../",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
-        out = proc.communicate()
+            capture_output=True,
+            discard_stderr=True)
+        with open(output_path, "w") as f:
+            f.write(out.decode("utf8"))
+
+    def _merge_shards(self, shard_paths: List[str]) -> None:
+        # detect-secrets writes results sorted by file names
+        report: Dict[str, Any] = {}
+        results: Dict[str, Any] = {}
+        for shard_path in shard_paths:
+            with open(shard_path, "r") as f:
+                shard_report = json.load(f)
+            if not report:
+                report = shard_report
+            results.update(shard_report.get("results", {}))
+        report["results"] = {x: results[x] for x in sorted(results)}
         with open(self.output_dir, "w") as f:
-            f.write(out[0].decode("utf8"))
+            f.write(json.dumps(report, indent=2) + "\n")
 
-    def parse_result(self) -> None:
+    def iter_findings(self) -> Generator[Finding, None, None]:
         with open(self.output_dir, "r") as f:
-            data = json.load(f)
-
-        for path in data["results"]:
-            for line_data in data["results"][path]:
-                if line_data["filename"].split("/")[-1] == "LICENSE":
+            json_stream = JsonStream(f)
+            for key in json_stream.iter_object():
+                if "results" != key:
+                    json_stream.read_value()
                     continue
-                check_line_result, line_data["project_id"], line_data["per_repo_file_id"] = self.check_line_from_meta(
-                    line_data["filename"], line_data["line_number"], line_data["line_number"])
-                if check_line_result == LineStatus.TRUE:
-                    line_data["TP"] = "O"
-                elif check_line_result == LineStatus.FALSE:
-                    line_data["TP"] = "X"
-                elif check_line_result == LineStatus.NOT_IN_DB:
-                    line_data["TP"] = "N"
-                elif check_line_result == LineStatus.CHECKED:
-                    line_data["TP"] = "C"
-                else:
-                    line_data["TP"] = ""
-
-                line_data["line"] = linecache.getline(f"{os.getcwd()}/temp/{line_data['filename']}",
-                                                      line_data["line_number"])
-                line_data["filename"] = line_data["filename"].split("/")[-1]
+                for _ in json_stream.iter_object():
+                    for line_data in json_stream.iter_array():
+                        if line_data["filename"].split("/")[-1] == "LICENSE":
+                            continue
+                        yield line_data["filename"], line_data["line_number"], line_data["line_number"], -1, -1, ""
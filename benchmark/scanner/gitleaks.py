@@ -1,15 +1,15 @@
-import json
 import os
-import subprocess
-from typing import Tuple
+from typing import Generator, Optional
 
-from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.constants import URL, ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
+from json_stream import JsonStream
 
 
 class Gitleaks(Scanner):
-    def __init__(self, working_dir, cred_data_dir, preload: bool, fix: bool):
-        super().__init__(ScannerType.GITLEAKS, URL.GITLEAKS, working_dir, cred_data_dir, preload, fix)
+    def __init__(self, working_dir, cred_data_dir, preload: bool, fix: bool, markup: Optional[Markup] = None):
+        super().__init__(ScannerType.GITLEAKS, URL.GITLEAKS, working_dir, cred_data_dir, preload, fix, markup)
         self.output_dir: str = f"{self.scanner_dir}/output.json"
 
     @property
@@ -23,17 +23,20 @@ class Gitleaks(Scanner):
     def init_scanner(self) -> None:
         self.gitleaks_path = f"{os.path.dirname(os.path.realpath(__file__))}/bin/gitleaks/gitleaks"
 
+    def _scanner_version(self) -> Optional[str]:
+        # paths of the binary are set in init_scanner
+        self.init_scanner_once()
+        return self._files_version(self.gitleaks_path)
+
     def run_scanner(self) -> None:
-        self.init_scanner()
-        subprocess.call([self.gitleaks_path, "--no-git", "-p"
-                                                         f"{self.cred_data_dir}/data", "-o", self.output_dir],
-                        cwd=self.scanner_dir)
+        self.init_scanner_once()
+        self._run_command([self.gitleaks_path, "--no-git", "-p"
+                                                           f"{self.cred_data_dir}/data", "-o", self.output_dir],
+                          cwd=self.scanner_dir)
 
-    def parse_result(self) -> None:
+    def iter_findings(self) -> Generator[Finding, None, None]:
         with open(self.output_dir, "r") as f:
-            data = json.load(f)
-
-        for line_data in data:
-            if line_data["file"].split("/")[-1] == "LICENSE":
-                continue
-            _, _, _ = self.check_line_from_meta(line_data["file"], line_data["lineNumber"], line_data["lineNumber"])
+            for line_data in JsonStream(f).iter_array():
+                if line_data["file"].split("/")[-1] == "LICENSE":
+                    continue
+                yield line_data["file"], line_data["lineNumber"], line_data["lineNumber"], -1, -1, ""
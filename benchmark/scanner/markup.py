@@ -0,0 +1,162 @@
+import binascii
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import tabulate
+
+from benchmark.common.profiler import StageProfiler
+from benchmark.scanner.file_type_stat import FileTypeStat
+from constants import LABEL_TRUE
+from data_manifest import DataManifest
+from line_cache import LineCache, line_cache_path
+from meta_index import MetaIntervalIndex
+from meta_row import read_meta, MetaRow
+from meta_table import MetaTable, StringTable
+
+
+class Markup:
+    """Markup with statistics of data. It is loaded once and shared by scanners of a benchmark run"""
+
+    def __init__(self, cred_data_dir: str, profiler: Optional[StageProfiler] = None) -> None:
+        self.cred_data_dir = cred_data_dir
+        # stages of the benchmark are measured for the whole run
+        self.profiler = profiler if profiler is not None else StageProfiler()
+        self.total_true_cnt = 0
+        self.total_false_cnt = 0
+        self.rules_markup_counters: Dict[str, Tuple[int, int]] = {}  # category: true_cnt, false_cnt
+        self.meta_next_id = 0  # used in suggestion
+        self.file_types: Dict[str, FileTypeStat] = {}
+        self.total_data_valid_lines = 0
+        self.total_data_files = 0
+        self.total_data_size = 0  # bytes
+        # top directory of data (a repo) or a file in data: size in bytes. It is used to balance shards of a scan
+        self.repo_sizes: Dict[str, int] = {}
+        # the same for number of files and valid lines. Throughput of a scan of some repos is computed with them
+        self.repo_files: Dict[str, int] = {}
+        self.repo_valid_lines: Dict[str, int] = {}
+        # repo: checksum of its data files and checksum of meta/<repo>.csv. Used for incremental benchmark
+        self.repo_data_checksums: Dict[str, str] = {}
+        self.repo_meta_checksums: Dict[str, str] = {}
+        self.meta_checksum = ""
+        self.data_checksum = ""
+        # interned FilePath of markup and reports are used in keys of the markup: (path id, LineStart, LineEnd)
+        self.paths = StringTable()
+        self.meta: Dict[Tuple[int, int, int], List[MetaRow]] = {}
+        self.meta_table = MetaTable()
+        # the interval index is built on demand for not exact match modes
+        self._meta_index: Optional[MetaIntervalIndex] = None
+        # lines of data files for diagnostics. Indexes of the files are kept near the data manifest
+        self.line_cache = LineCache(line_cache_path(Path(f"{self.cred_data_dir}/data")))
+        self._prepare_meta()
+
+    def _meta_checksum(self, meta_location) -> str:
+        checksum = hashlib.md5(b'').digest()
+        for root, dirs, files in os.walk(meta_location):
+            for file in files:
+                if not file.endswith(".csv"):
+                    continue
+                with open(os.path.join(root, file), "rb") as f:
+                    cvs_checksum = hashlib.md5(f.read()).digest()
+                checksum = bytes(a ^ b for a, b in zip(checksum, cvs_checksum))
+                self.repo_meta_checksums[file[:-len(".csv")]] = binascii.hexlify(cvs_checksum).decode()
+        return binascii.hexlify(checksum).decode()
+
+    def _prepare_meta(self):
+        meta_path = Path(f"{self.cred_data_dir}/meta")
+        with self.profiler.stage("meta_parse"):
+            meta_rows = read_meta(meta_path)
+            for meta_row in meta_rows:
+                self.index_meta_row(meta_row)
+            self.meta_table = MetaTable(meta_rows)
+            if self.meta_table.id:
+                self.meta_next_id = max(self.meta_table.id) + 1
+            # all not TRUE marked up cases are FALSE
+            true_mask = self.meta_table.label_mask(LABEL_TRUE)
+            false_mask = self.meta_table.all_mask ^ true_mask
+            for rule in self.meta_table.rule_names:
+                rule_mask = self.meta_table.rule_mask(rule)
+                self.rules_markup_counters[rule] = (MetaTable.count(rule_mask & true_mask),
+                                                    MetaTable.count(rule_mask & false_mask))
+                self.total_true_cnt += self.rules_markup_counters[rule][0]
+                self.total_false_cnt += self.rules_markup_counters[rule][1]
+            # a row is counted for each rule mentioned in the markup
+            rules_number_masks = self.meta_table.rules_number_masks()
+            for file_type in self.meta_table.extension_names:
+                file_type_mask = self.meta_table.extension_mask(file_type)
+                type_stat = FileTypeStat(0, 0, 0, 0)
+                for rules_number, rules_number_mask in rules_number_masks.items():
+                    mask = file_type_mask & rules_number_mask
+                    type_stat.true_markup += rules_number * MetaTable.count(mask & true_mask)
+                    type_stat.false_markup += rules_number * MetaTable.count(mask & false_mask)
+                self.file_types[file_type] = type_stat
+            self.meta_checksum = self._meta_checksum(meta_path)
+
+        with self.profiler.stage("data_walk"):
+            data_checksum = hashlib.md5(b'').digest()
+            # getting count of all not-empty lines. Only new or changed files are read with all cores
+            data_manifest = DataManifest(Path(f"{self.cred_data_dir}/data"))
+            for data_file_entry in data_manifest.scan(jobs=os.cpu_count() or 1):
+                file_type_stat = self.file_types.get(data_file_entry.extension, FileTypeStat(0, 0, 0, 0))
+                file_type_stat.files_number += 1
+                file_type_stat.valid_lines += data_file_entry.valid_lines
+                self.file_types[data_file_entry.extension] = file_type_stat
+                data_checksum = bytes(a ^ b for a, b in zip(data_checksum, data_file_entry.md5))
+                self.total_data_valid_lines += data_file_entry.valid_lines
+                self.total_data_files += 1
+                self.total_data_size += data_file_entry.size
+            repo_checksums: Dict[str, Any] = {}
+            for relative_path, data_file_entry in sorted(data_manifest.entries.items()):
+                repo = relative_path.split(os.sep, maxsplit=1)[0]
+                self.repo_sizes[repo] = self.repo_sizes.get(repo, 0) + data_file_entry.size
+                self.repo_files[repo] = self.repo_files.get(repo, 0) + 1
+                self.repo_valid_lines[repo] = self.repo_valid_lines.get(repo, 0) + data_file_entry.valid_lines
+                repo_checksum = repo_checksums.setdefault(repo, hashlib.md5())
+                repo_checksum.update(relative_path.encode())
+                repo_checksum.update(data_file_entry.md5)
+            self.repo_data_checksums = {k: v.hexdigest() for k, v in repo_checksums.items()}
+            data_manifest.save()
+        self.data_checksum = binascii.hexlify(data_checksum).decode()
+
+        print(f"META MD5 {self.meta_checksum}", flush=True)
+        print(f"DATA MD5 {self.data_checksum}", flush=True)
+        print(f"DATA: {self.total_data_valid_lines} interested lines. MARKUP: {len(self.meta)} items", flush=True)
+        types_headers = ["FileType", "FileNumber", "ValidLines", "Positives", "Negatives", "Templates"]
+        types_rows = []
+        check_files_number = 0
+        check_data_valid_lines = 0
+        check_true_cnt = 0
+        check_false_cnt = 0
+        for key, val in self.file_types.items():
+            types_rows.append([key,
+                               val.files_number or None,
+                               val.valid_lines or None,
+                               val.true_markup or None,
+                               val.false_markup or None])
+            check_files_number += val.files_number
+            check_data_valid_lines += val.valid_lines
+            check_true_cnt += val.true_markup
+            check_false_cnt += val.false_markup
+        types_rows.sort()
+        types_rows.append(["TOTAL:",
+                           check_files_number,
+                           check_data_valid_lines,
+                           check_true_cnt,
+                           check_false_cnt])
+        print(tabulate.tabulate(types_rows, types_headers), flush=True)
+
+    def index_meta_row(self, meta_row: MetaRow) -> None:
+        meta_key = (self.paths.intern(meta_row.FilePath), meta_row.LineStart, meta_row.LineEnd)
+        if meta_rows_by_key := self.meta.get(meta_key):
+            meta_rows_by_key.append(meta_row)
+        else:
+            self.meta[meta_key] = [meta_row]
+        if self._meta_index is not None:
+            self._meta_index.add(meta_row)
+
+    @property
+    def meta_index(self) -> MetaIntervalIndex:
+        if self._meta_index is None:
+            self._meta_index = MetaIntervalIndex(row for rows in self.meta.values() for row in rows)
+        return self._meta_index
@@ -0,0 +1,105 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+
+def find_first(text: str, patterns: Iterable[str]) -> Dict[str, int]:
+    """Returns offsets of the first occurrences of the patterns in the text found in one pass with Aho-Corasick
+    automaton. Patterns which are not in the text are absent in the result"""
+    patterns = [x for x in set(patterns) if x]
+    result: Dict[str, int] = {}
+    if not patterns:
+        return result
+    # trie of the patterns: transitions, failure links and patterns which end in the state
+    goto: List[Dict[str, int]] = [{}]
+    outputs: List[List[int]] = [[]]
+    for n, pattern in enumerate(patterns):
+        state = 0
+        for char in pattern:
+            if (next_state := goto[state].get(char)) is None:
+                next_state = goto[state][char] = len(goto)
+                goto.append({})
+                outputs.append([])
+            state = next_state
+        outputs[state].append(n)
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for state in queue:
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fail_state = fail[state]
+            while fail_state and char not in goto[fail_state]:
+                fail_state = fail[fail_state]
+            fail[next_state] = goto[fail_state].get(char, 0) if goto[fail_state].get(char) != next_state else 0
+            outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+    # the automaton in the root skips to the next possible start of a pattern with the regular expression
+    root_skip = re.compile('[' + ''.join(re.escape(x) for x in goto[0]) + ']')
+    remaining = len(patterns)
+    state = 0
+    pos = 0
+    size = len(text)
+    while pos < size:
+        if 0 == state:
+            if not (root_match := root_skip.search(text, pos)):
+                break
+            pos = root_match.start()
+        char = text[pos]
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        for n in outputs[state]:
+            pattern = patterns[n]
+            if pattern not in result:
+                # the first end of a pattern is the end of its first occurrence
+                result[pattern] = pos + 1 - len(pattern)
+                remaining -= 1
+        if not remaining:
+            break
+        pos += 1
+    return result
+
+
+class MatchLineResolver:
+    """Finds the first line of a text file which contains a match.
+
+    Matches are added before the lookup, so the file is read once and all of them are found in one pass.
+    Lines of the found offsets are counted in the order of the offsets. The text is not kept after that.
+    Result is the same as a search in lines of open(file_path, "r").readlines() - the lines keep '\\n' at the end.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._pending: Set[str] = set()
+        self._line_nums: Dict[str, int] = {}
+
+    def add(self, match: str) -> None:
+        """Registers the match to be found together with others"""
+        if match not in self._line_nums:
+            self._pending.add(match)
+
+    def _resolve(self) -> None:
+        matches, self._pending = self._pending, set()
+        with open(self.file_path, "r") as f:
+            text = f.read()
+        for match in matches:
+            # no lines or the match cannot be in one line
+            self._line_nums[match] = -1
+        if not text:
+            return
+        if "" in matches:
+            self._line_nums[""] = 1
+        offsets = find_first(text, (x for x in matches if '\n' not in x[:-1]))
+        # the first occurrence in the text is in the first line which contains the match
+        line_num = 1
+        line_offset = 0
+        for match, offset in sorted(offsets.items(), key=lambda x: x[1]):
+            line_num += text.count('\n', line_offset, offset)
+            line_offset = offset
+            self._line_nums[match] = line_num
+
+    def line_num(self, match: str) -> int:
+        """Returns 1-based number of the first line with the match or -1"""
+        if (line_num := self._line_nums.get(match)) is None:
+            self._pending.add(match)
+            self._resolve()
+            line_num = self._line_nums[match]
+        return line_num
@@ -0,0 +1,149 @@
+import dataclasses
+import functools
+import hashlib
+import io
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+
+@functools.cache
+def code_checksum() -> str:
+    """Checksum of the benchmark code and root modules which are used for evaluation"""
+    root = Path(__file__).parent.parent.parent
+    checksum = hashlib.md5()
+    for path in sorted(root.glob("*.py")) + sorted((root / "benchmark").rglob("*.py")):
+        if path.is_file() and not path.name.startswith("test_"):
+            checksum.update(path.read_bytes())
+    return checksum.hexdigest()
+
+
+def file_checksum(path: str) -> str:
+    checksum = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def make_key(*items: Any) -> str:
+    return hashlib.md5('\0'.join(str(x) for x in items).encode()).hexdigest()
+
+
+@dataclasses.dataclass
+class RepoCounters:
+    """Counters of evaluation of findings in a repo. They are summed for whole data"""
+    result_cnt: int = 0
+    lost_cnt: int = 0
+    true_cnt: int = 0
+    false_cnt: int = 0
+    rules: Dict[str, Tuple[int, int]] = dataclasses.field(default_factory=dict)  # rule: true_cnt, false_cnt
+
+
+@dataclasses.dataclass
+class RepoPartial:
+    """Findings of a scanner in a repo and counters of their evaluation.
+
+    The findings are valid for data_key - the scanner and data of the repo. The counters are valid for meta_key -
+    markup of the repo and the evaluation.
+    """
+    data_key: str
+    findings: List[tuple]
+    reported: Dict[str, int]  # rule: number of reported credentials, when the adapter counts them
+    meta_key: str = ""
+    counters: Optional[RepoCounters] = None
+
+
+class OutputTee(io.TextIOBase):
+    """Passes text to the stream and keeps a copy of the text written by the thread which created it"""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.thread_id = threading.get_ident()
+        self.captured = io.StringIO()
+
+    def write(self, text: str) -> int:
+        if threading.get_ident() == self.thread_id:
+            self.captured.write(text)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class ReportCache:
+    """Content-addressed storage of scanner reports and evaluation results.
+
+    A report is stored under a key of the scanner, its version, data and adapter code.
+    A result is the printed output with summary row of the evaluation and it is stored under a key of the report
+    content, the markup, data, evaluation code and options.
+    Partials of a scanner are results of each repo for incremental benchmark.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.reports_dir = cache_dir / "reports"
+        self.results_dir = cache_dir / "results"
+        self.partials_dir = cache_dir / "partials"
+
+    @staticmethod
+    def _store(src: Path, dst: Path) -> None:
+        tmp_path = dst.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.makedirs(dst.parent, exist_ok=True)
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dst)
+        except OSError as exc:
+            # read-only location is not a reason to fail
+            print(f"WARNING: cannot save {dst}: {exc}", flush=True)
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def get_report(self, key: str, output_path: str) -> bool:
+        """Copies cached report to the output path. Returns False when the report is not cached"""
+        report_path = self.reports_dir / key
+        if not report_path.exists():
+            return False
+        shutil.copyfile(report_path, output_path)
+        return True
+
+    def put_report(self, key: str, output_path: str) -> None:
+        if os.path.exists(output_path):
+            self._store(Path(output_path), self.reports_dir / key)
+
+    def get_result(self, key: str) -> Optional[Tuple[str, List[Any]]]:
+        """Returns printed output and summary row of the evaluation"""
+        try:
+            with open(self.results_dir / f"{key}.pickle", "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _dump(obj: Any, path: Path) -> None:
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            os.makedirs(path.parent, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"WARNING: cannot save {path}: {exc}", flush=True)
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def put_result(self, key: str, output: str, summary_row: List[Any]) -> None:
+        self._dump((output, summary_row), self.results_dir / f"{key}.pickle")
+
+    def get_partials(self, scanner: str) -> Dict[str, RepoPartial]:
+        """Returns repo: partial of the scanner"""
+        try:
+            with open(self.partials_dir / f"{scanner}.pickle", "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return {}
+
+    def put_partials(self, scanner: str, partials: Dict[str, RepoPartial]) -> None:
+        self._dump(partials, self.partials_dir / f"{scanner}.pickle")
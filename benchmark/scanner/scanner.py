@@ -1,27 +1,50 @@
-import binascii
 import contextlib
-import hashlib
+import glob
+import heapq
+import importlib.metadata
+import inspect
 import os
-import subprocess
+import shutil
+import sys
+import threading
 from abc import ABC, abstractmethod
-from functools import cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Dict, List, Any
+from typing import Tuple, Dict, List, Any, Optional, Iterable, Iterator, Sequence
 
 import tabulate
-from colorama import Fore, Style
 
-from benchmark.common import GitService, LineStatus, Result, ScannerType
-from benchmark.scanner.file_type_stat import FileTypeStat
+from benchmark.common import GitService, LineStatus, Result, ScannerType, MatchMode
+from benchmark.common.bootstrap import Outcomes, METRICS
+from benchmark.common.diagnostics import Diagnostics, DiagnosticKind
+from benchmark.common.process_monitor import ProcessStat, run_monitored
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.report_cache import ReportCache, OutputTee, RepoCounters, RepoPartial, make_key, \
+    file_checksum, code_checksum
 from benchmark.scanner.true_false_counter import TrueFalseCounter
-from constants import LABEL_FALSE, LABEL_TRUE
-from meta_key import MetaKey
-from meta_row import _get_source_gen, MetaRow
+from constants import LABEL_FALSE, LABEL_TRUE, CACHE_DIR
+from meta_index import MetaIntervalIndex
+from meta_row import MetaRow
+from meta_writer import MetaWriter
+
+
+# normalized finding of a scanner: file_path, line_start, line_end, value_start, value_end, rule
+Finding = Tuple[str, int, int, int, int, str]
+# match of a finding with markup before it is counted: status, kind and suggestion of a lost finding,
+# warnings (kind, message) which are reported before the result, whether lost markup was added in fix mode
+Resolution = Tuple[LineStatus, Optional[DiagnosticKind], str, Optional[List[Tuple[DiagnosticKind, str]]], bool]
+# clean matches share the resolution. Status of a true positive is FALSE like in CredSweeper report
+_TRUE_RESOLUTION: Resolution = (LineStatus.FALSE, None, "", None, False)
+_FALSE_RESOLUTION: Resolution = (LineStatus.TRUE, None, "", None, False)
+_CHECKED_RESOLUTION: Resolution = (LineStatus.CHECKED, None, "", None, False)
+
+PERFORMANCE_HEADER = ["Scanner", "Time, s", "CPU, s", "PeakRSS, MiB", "Read, MiB", "Files/s", "Lines/s", "MB/s"]
+PERFORMANCE_FLOATFMT = ("", ".3f", ".3f", ".1f", ".1f", ".1f", ".1f", ".3f")
 
 
 class Scanner(ABC):
     def __init__(self, scanner_type: ScannerType, scanner_url: str, working_dir: str, cred_data_dir: str,
-                 preload: bool, fix: bool) -> None:
+                 preload: bool, fix: bool, markup: Optional[Markup] = None) -> None:
         self.scanner_type = scanner_type
         self.scanner_dir: str = GitService.set_scanner_up_to_date(working_dir, scanner_url, preload)
         self.cred_data_dir: str = cred_data_dir
@@ -32,15 +55,52 @@ class Scanner(ABC):
         self.true_cnt: int = 0
         self.false_cnt: int = 0
         self.result_dict: dict = {}
-        self.total_true_cnt = 0
-        self.total_false_cnt = 0
-        self.rules_markup_counters: Dict[str, Tuple[int, int]] = {}  # category: true_cnt, false_cnt
-        self.meta_next_id = 0  # used in suggestion
-        self.file_types: Dict[str, FileTypeStat] = {}
-        self.total_data_valid_lines = 0
-        self.meta: Dict[MetaKey, List[MetaRow]] = {}
+        # markup and statistics of data are shared with other scanners in the same run
+        self.markup = markup if markup is not None else Markup(cred_data_dir)
+        self.total_true_cnt = self.markup.total_true_cnt
+        self.total_false_cnt = self.markup.total_false_cnt
+        # category: true_cnt, false_cnt. Rules which were reported without markup are added here
+        self.rules_markup_counters: Dict[str, Tuple[int, int]] = dict(self.markup.rules_markup_counters)
+        # the same as rules_markup_counters but with markup added during the benchmark
+        self.rules_total_counters: Dict[str, TrueFalseCounter] = {}
+        for rule, (true_cnt, false_cnt) in self.markup.rules_markup_counters.items():
+            rule_total_counter = self.rules_total_counters[rule] = TrueFalseCounter()
+            rule_total_counter.true_cnt, rule_total_counter.false_cnt = true_cnt, false_cnt
+        self.meta_next_id = self.markup.meta_next_id  # used in suggestion
+        self.paths = self.markup.paths
+        self.meta = self.markup.meta
+        # file path in report: data_path, repo_name, file_name, file_id, path id
+        self._path_items: Dict[str, Tuple[str, str, str, str, int]] = {}
+        # exact match of lines by default. The interval index is built on demand for other modes
+        self.match_mode = MatchMode.EXACT
+        self.line_cache = self.markup.line_cache
+        # printed to stdout by default
+        self.diagnostics = Diagnostics(line_cache=self.line_cache)
         self.reported: Dict[str, int] = {}  # counter of reported credentials by rules
-        self._prepare_meta()
+        # changes of markup in fix mode are written at the end
+        self.meta_writer = MetaWriter(f"{cred_data_dir}/meta")
+        # reports and results for the same inputs are reused
+        self.report_cache: Optional[ReportCache] = ReportCache(Path(cred_data_dir) / CACHE_DIR / "benchmark")
+        # top entries of data which were scanned in the last run. None is whole data
+        self.scanned_repos: Optional[List[str]] = None
+        # init_scanner was called, e.g. virtualenv of the scanner is installed
+        self.scanner_initialized = False
+        # resources of the scanner processes. It is None when the scanner was not run
+        self.process_stat: Optional[ProcessStat] = None
+        # resources of a shard are collected in the thread of the shard
+        self._shard_local = threading.local()
+        # number of scanner processes which scan parts of data at the same time. Used when the adapter supports it
+        self.shards = 1
+        # parallel jobs of the scanner. The default of the adapter is used when it is None
+        self.jobs: Optional[int] = None
+        # top entry of data: position in os.walk of data
+        self._repos_order: Dict[str, int] = {}
+        # resamples of data for confidence intervals of the metrics. The intervals are not computed when it is 0
+        self.bootstrap = 0
+        self.bootstrap_unit = "repo"
+        self.seed: Optional[int] = 0
+        # true and false positives of the evaluation which are resampled
+        self.outcomes: Optional[Outcomes] = None
 
     @property
     @abstractmethod
@@ -52,99 +112,6 @@ class Scanner(ABC):
     def output_dir(self, output_dir: str) -> None:
         raise NotImplementedError()
 
-    @staticmethod
-    def _meta_checksum(meta_location) -> str:
-        checksum = hashlib.md5(b'').digest()
-        for root, dirs, files in os.walk(meta_location):
-            for file in files:
-                if not file.endswith(".csv"):
-                    continue
-                with open(os.path.join(root, file), "rb") as f:
-                    cvs_checksum = hashlib.md5(f.read()).digest()
-                checksum = bytes(a ^ b for a, b in zip(checksum, cvs_checksum))
-        return binascii.hexlify(checksum).decode()
-
-    def _prepare_meta(self):
-        meta_path = Path(f"{self.cred_data_dir}/meta")
-        for _row in _get_source_gen(meta_path):
-            meta_row = MetaRow(_row)
-            meta_key = MetaKey(meta_row)
-            if meta_rows := self.meta.get(meta_key):
-                meta_rows.append(meta_row)
-            else:
-                self.meta[meta_key] = [meta_row]
-            # get file extension like in CredSweeper
-            _, file_type = os.path.splitext(meta_row.FilePath)
-            file_type_lower = file_type.lower()
-            type_stat = self.file_types.get(file_type_lower, FileTypeStat(0, 0, 0, 0))
-            rules = meta_row.Category.split(':')
-            for rule in rules:
-                true_cnt, false_cnt = self.rules_markup_counters.get(rule, (0, 0))
-                if LABEL_TRUE == meta_row.GroundTruth:
-                    true_cnt += 1
-                    self.total_true_cnt += 1
-                    type_stat.true_markup += 1
-                else:
-                    # all not TRUE marked up cases are FALSE
-                    self.total_false_cnt += 1
-                    false_cnt += 1
-                    type_stat.false_markup += 1
-                self.rules_markup_counters[rule] = (true_cnt, false_cnt)
-            self.file_types[file_type_lower] = type_stat
-            if self.meta_next_id <= meta_row.Id:
-                self.meta_next_id = meta_row.Id + 1
-
-        data_checksum = hashlib.md5(b'').digest()
-        # getting count of all not-empty lines
-        data_dir = f"{self.cred_data_dir}/data"
-        for root, dirs, files in os.walk(data_dir):
-            for file in files:
-                file_name, file_ext = os.path.splitext(str(file))
-                file_ext_lower = file_ext.lower()
-                file_type_stat = self.file_types.get(file_ext_lower, FileTypeStat(0, 0, 0, 0))
-                file_type_stat.files_number += 1
-                self.file_types[file_ext_lower] = file_type_stat
-                with open(os.path.join(root, file), "rb") as f:
-                    data = f.read()
-                    file_checksum = hashlib.md5(data).digest()
-                    data_checksum = bytes(a ^ b for a, b in zip(data_checksum, file_checksum))
-                    with contextlib.suppress(UnicodeDecodeError):
-                        lines = data.decode().replace("\r\n", '\n').replace('\r', '\n').split('\n')
-                        file_data_valid_lines = 0
-                        for line in lines:
-                            # minimal length of detection is 7 e.g. pw:X3d!
-                            if 7 <= len(line.strip()):
-                                file_data_valid_lines += 1
-                        self.total_data_valid_lines += file_data_valid_lines
-                        self.file_types[file_ext_lower].valid_lines += file_data_valid_lines
-
-        print(f"META MD5 {self._meta_checksum(meta_path)}", flush=True)
-        print(f"DATA MD5 {binascii.hexlify(data_checksum).decode()}", flush=True)
-        print(f"DATA: {self.total_data_valid_lines} interested lines. MARKUP: {len(self.meta)} items", flush=True)
-        types_headers = ["FileType", "FileNumber", "ValidLines", "Positives", "Negatives", "Templates"]
-        types_rows = []
-        check_files_number = 0
-        check_data_valid_lines = 0
-        check_true_cnt = 0
-        check_false_cnt = 0
-        for key, val in self.file_types.items():
-            types_rows.append([key,
-                               val.files_number or None,
-                               val.valid_lines or None,
-                               val.true_markup or None,
-                               val.false_markup or None])
-            check_files_number += val.files_number
-            check_data_valid_lines += val.valid_lines
-            check_true_cnt += val.true_markup
-            check_false_cnt += val.false_markup
-        types_rows.sort()
-        types_rows.append(["TOTAL:",
-                           check_files_number,
-                           check_data_valid_lines,
-                           check_true_cnt,
-                           check_false_cnt])
-        print(tabulate.tabulate(types_rows, types_headers), flush=True)
-
     @property
     def scanner_type(self) -> ScannerType:
         return self._scanner_type
@@ -227,15 +194,356 @@ class Scanner(ABC):
     def run_scanner(self) -> None:
         pass
 
+    def init_scanner_once(self) -> None:
+        """Initializes the scanner for the first run. Repeated runs use the same installation"""
+        if not self.scanner_initialized:
+            self.init_scanner()
+            self.scanner_initialized = True
+
     @abstractmethod
+    def iter_findings(self) -> Iterator[Finding]:
+        """Yields normalized findings of the scanner report.
+
+        An adapter which counts reported credentials in self.reported increases the counter of the rule before the
+        finding is yielded, so the counters are split by repos in incremental benchmark.
+        """
+        raise NotImplementedError()
+
     def parse_result(self) -> None:
-        pass
+        self.check_lines_from_meta(self.iter_findings())
 
-    def run_benchmark(self, is_output_given: bool) -> None:
-        if not is_output_given:
+    def _scanner_version(self) -> Optional[str]:
+        """Version of the installed scanner. Commit of the scanner repository by default, None when it is unknown"""
+        return GitService.get_version(self.scanner_dir)
+
+    @staticmethod
+    def _files_version(*paths: str) -> Optional[str]:
+        """Version of a binary scanner: checksum of the binary and its configuration. None when a file is absent"""
+        if all(os.path.isfile(x) for x in paths):
+            return make_key(*map(file_checksum, paths))
+        return None
+
+    def _venv_package_version(self, package: str) -> Optional[str]:
+        """Version of the package which is installed in the virtual environment of the scanner"""
+        site_packages = glob.glob(f"{self.scanner_dir}/venv/lib/python*/site-packages")
+        for distribution in importlib.metadata.distributions(name=package, path=site_packages):
+            return distribution.version
+        return None
+
+    def _scanner_key(self) -> Optional[str]:
+        """The scanner and its version. Arguments of the scanner are in the adapter"""
+        if scanner_version := self._scanner_version():
+            return make_key(self.scanner_type.value, scanner_version, file_checksum(inspect.getfile(type(self))))
+        print(f"WARNING: version of {self.scanner_type.value} is unknown - its reports are not cached", flush=True)
+        return None
+
+    def _report_key(self) -> Optional[str]:
+        """The report depends on the scanner and the data"""
+        if scanner_key := self._scanner_key():
+            return make_key(scanner_key, self.markup.data_checksum)
+        return None
+
+    def _result_key(self) -> str:
+        """The result depends on the report, the markup, the data, the evaluation and the adapter which parses it"""
+        return make_key(self.scanner_type.value,
+                        file_checksum(inspect.getfile(type(self))),
+                        file_checksum(self.output_dir),
+                        self.markup.meta_checksum,
+                        self.markup.data_checksum,
+                        self.match_mode,
+                        self.diagnostics.quiet,
+                        code_checksum())
+
+    def _stage(self, name: str):
+        return self.markup.profiler.stage(f"{self.scanner_type.value}.{name}")
+
+    def _run_command(self, args: Sequence[str], cwd: Optional[str] = None, capture_output: bool = False,
+                     discard_stderr: bool = False) -> Tuple[int, Optional[bytes]]:
+        """Runs the scanner process like subprocess.call and accumulates resources of its process tree"""
+        returncode, output, process_stat = run_monitored(list(args), cwd, capture_output, discard_stderr)
+        if (shard_stat := getattr(self._shard_local, "process_stat", None)) is not None:
+            shard_stat.add(process_stat)
+        else:
+            if self.process_stat is None:
+                self.process_stat = ProcessStat()
+            self.process_stat.add(process_stat)
+        return returncode, output
+
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        """Scans the repos (top entries of data) to the output path. Whole data is scanned when repos is None.
+
+        Scanners which scan a part of data implement it and set partial_scan_supported. The default is one scan of
+        whole data with run_scanner, so the output holds all repos whatever the repos are.
+        """
+        self.run_scanner()
+        if output_path != self.output_dir:
+            shutil.copyfile(self.output_dir, output_path)
+
+    def _merge_shards(self, shard_paths: List[str]) -> None:
+        """Writes the output of the scanner from the outputs of the shards like from one process.
+
+        Scanners which set sharding_supported implement it. Each output of the default _scan_shard is whole data.
+        """
+        if shard_paths[0] != self.output_dir:
+            shutil.copyfile(shard_paths[0], self.output_dir)
+
+    @property
+    def jobs_supported(self) -> bool:
+        """Scanners which have an option of parallel jobs use self.jobs"""
+        return False
+
+    @property
+    def partial_scan_supported(self) -> bool:
+        """The scanner may scan a part of data with _scan_shard"""
+        return False
+
+    @property
+    def sharding_supported(self) -> bool:
+        """The scanner may scan parts of data at the same time and join them with _merge_shards"""
+        return self.partial_scan_supported
+
+    def _repo_index(self, file_path: str) -> int:
+        """Position of the repo of the file in the scan of whole data. Unknown files are the last"""
+        repo = os.path.relpath(file_path, f"{self.cred_data_dir}/data").split(os.sep, maxsplit=1)[0]
+        return self._repos_order.get(repo, len(self._repos_order))
+
+    def _list_repos(self) -> List[str]:
+        """Top entries of data in the order of data scan"""
+        # os.walk of the scanners lists the directory in the same order
+        repos = os.listdir(f"{self.cred_data_dir}/data")
+        self._repos_order = {x: n for n, x in enumerate(repos)}
+        return repos
+
+    def make_shards(self, shards_number: int) -> List[List[str]]:
+        """Splits the repos into shards balanced by size of files. Repos of a shard are in the order of data scan"""
+        self._list_repos()
+        repo_sizes = {x: self.markup.repo_sizes.get(x, 0) for x in self._repos_order}
+        shards: List[List[str]] = [[] for _ in range(max(1, min(shards_number, len(repo_sizes))))]
+        # the largest repo goes to the smallest shard
+        heap = [(0, n) for n in range(len(shards))]
+        for repo in sorted(repo_sizes, key=lambda x: (-repo_sizes[x], self._repos_order[x])):
+            shard_size, n = heapq.heappop(heap)
+            shards[n].append(repo)
+            heapq.heappush(heap, (shard_size + repo_sizes[repo], n))
+        for shard in shards:
+            shard.sort(key=self._repos_order.__getitem__)
+        return shards
+
+    def _scan_shard_monitored(self, repos: List[str], output_path: str) -> ProcessStat:
+        self._shard_local.process_stat = ProcessStat()
+        try:
+            self._scan_shard(repos, output_path)
+            return self._shard_local.process_stat
+        finally:
+            self._shard_local.process_stat = None
+
+    def _scan_data(self) -> None:
+        """Scans the data with one process or with the shards at the same time"""
+        if 1 >= self.shards or not self.sharding_supported:
+            self._scan_shard(None, self.output_dir)
+            return
+        shards = self.make_shards(self.shards)
+        shard_paths = [f"{self.output_dir}.{n}.shard" for n in range(len(shards))]
+        try:
+            with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                shard_stats = list(executor.map(self._scan_shard_monitored, shards, shard_paths))
+            self._merge_shards(shard_paths)
+        finally:
+            for shard_path in shard_paths:
+                if os.path.exists(shard_path):
+                    os.remove(shard_path)
+        process_stat = ProcessStat()
+        for shard_stat in shard_stats:
+            process_stat.add_concurrent(shard_stat)
+        if self.process_stat is None:
+            self.process_stat = ProcessStat()
+        self.process_stat.add(process_stat)
+
+    def _run_scanner(self) -> None:
+        self.process_stat = None
+        self.scanned_repos = None
+        with self._stage("run_scanner"):
             self.run_scanner()
-        self.parse_result()
-        self.analyze_result()
+
+    def prepare_report(self) -> None:
+        """Runs the scanner or takes the same report from the cache"""
+        if self.report_cache is None or self.fix or (report_key := self._report_key()) is None:
+            self._run_scanner()
+        elif not self.report_cache.get_report(report_key, self.output_dir):
+            self._run_scanner()
+            # the scanner may be installed or updated during the run
+            if report_key := self._report_key():
+                self.report_cache.put_report(report_key, self.output_dir)
+
+    def performance_row(self) -> Optional[List[Any]]:
+        """Resources and throughput of the scanner against the data manifest. None when the scanner was not run"""
+        if self.process_stat is None:
+            return None
+        if self.scanned_repos is None:
+            files, valid_lines, size = (self.markup.total_data_files,
+                                        self.markup.total_data_valid_lines,
+                                        self.markup.total_data_size)
+        else:
+            # only a part of data was scanned
+            files = sum(self.markup.repo_files.get(x, 0) for x in self.scanned_repos)
+            valid_lines = sum(self.markup.repo_valid_lines.get(x, 0) for x in self.scanned_repos)
+            size = sum(self.markup.repo_sizes.get(x, 0) for x in self.scanned_repos)
+        wall_time = max(self.process_stat.wall_time, 1e-9)
+        return [
+            self.scanner_type.value,
+            self.process_stat.wall_time,
+            self.process_stat.cpu_time,
+            self.process_stat.peak_rss / (1 << 20),
+            self.process_stat.read_bytes / (1 << 20),
+            files / wall_time,
+            valid_lines / wall_time,
+            size / 1e6 / wall_time,
+        ]
+
+    def _evaluate(self) -> List[Any]:
+        if self.bootstrap:
+            self.outcomes = Outcomes(self.bootstrap_unit)
+        try:
+            with self._stage("parse_result"):
+                self.parse_result()
+        finally:
+            # markup changes are written even the evaluation fails
+            self.meta_writer.flush()
+            self.diagnostics.close()
+            self.line_cache.save()
+            self.line_cache.close()
+        with self._stage("analyze_result"):
+            summary_row = self.analyze_result()
+        if self.outcomes is not None:
+            with self._stage("bootstrap"):
+                self.analyze_bootstrap()
+        return summary_row
+
+    def run_benchmark(self, is_output_given: bool) -> List[Any]:
+        """Returns summary row of the result table"""
+        if not is_output_given:
+            self.prepare_report()
+        if self.report_cache is None or self.fix or self.diagnostics.path or self.bootstrap:
+            # the markup or diagnostics file are changed or the findings are resampled
+            return self._evaluate()
+        result_key = self._result_key()
+        if cached_result := self.report_cache.get_result(result_key):
+            output, summary_row = cached_result
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            return summary_row
+        output_tee = OutputTee(sys.stdout)
+        with contextlib.redirect_stdout(output_tee):
+            summary_row = self._evaluate()
+        self.report_cache.put_result(result_key, output_tee.captured.getvalue(), summary_row)
+        return summary_row
+
+    def _group_findings(self, output_path: str) -> Dict[str, Tuple[List[Finding], Dict[str, int]]]:
+        """Reads findings of the report and splits them by repo together with reported counters of the adapter"""
+        output_dir = self.output_dir
+        self.output_dir = output_path
+        groups: Dict[str, Tuple[List[Finding], Dict[str, int]]] = {}
+        reported = dict(self.reported)
+        try:
+            for finding in self.iter_findings():
+                data_path = self._get_path_items(finding[0])[0]
+                repo = data_path.split('/')[1] if '/' in data_path else ""
+                findings, repo_reported = groups.setdefault(repo, ([], {}))
+                findings.append(finding)
+                # an adapter counts a reported credential of the rule before the finding is yielded
+                rule = finding[5]
+                if (reported_cnt := self.reported.get(rule, 0)) != reported.get(rule, 0):
+                    repo_reported[rule] = repo_reported.get(rule, 0) + reported_cnt - reported.get(rule, 0)
+                    reported[rule] = reported_cnt
+        finally:
+            self.output_dir = output_dir
+        return groups
+
+    def _evaluate_repo(self, findings: List[Finding]) -> RepoCounters:
+        self.result_cnt = self.lost_cnt = self.true_cnt = self.false_cnt = 0
+        self.result_dict = {}
+        self.check_lines_from_meta(findings)
+        return RepoCounters(result_cnt=self.result_cnt,
+                            lost_cnt=self.lost_cnt,
+                            true_cnt=self.true_cnt,
+                            false_cnt=self.false_cnt,
+                            rules={k: (v.true_cnt, v.false_cnt) for k, v in self.result_dict.items()})
+
+    def run_incremental(self) -> List[Any]:
+        """Rescans repos with changed data and evaluates repos with changed data or markup of meta/<repo>.csv.
+
+        Findings and counters of other repos are taken from the previous run, so diagnostics are printed only for
+        evaluated repos. The summary is the same as of full run. Returns summary row of the result table.
+        """
+        if self.report_cache is None or self.fix or (scanner_key := self._scanner_key()) is None:
+            return self.run_benchmark(False)
+        whole_data_key = make_key(scanner_key, self.markup.data_checksum)
+        partials = self.report_cache.get_partials(self.scanner_type.value)
+        repos = self._list_repos()
+        data_keys = {x: make_key(scanner_key, self.markup.repo_data_checksums.get(x, "")) for x in repos}
+        # findings out of the repos are valid while whole data is the same
+        for repo, partial in partials.items():
+            if repo not in data_keys and partial.data_key == whole_data_key:
+                repos.append(repo)
+                data_keys[repo] = whole_data_key
+        if stale := [x for x in repos if x not in partials or partials[x].data_key != data_keys[x]]:
+            output_path = self.output_dir
+            if self.partial_scan_supported:
+                output_path = f"{self.output_dir}.partial"
+                self.process_stat = None
+                self.scanned_repos = stale
+                with self._stage("run_scanner"):
+                    self.init_scanner_once()
+                    self._scan_shard(stale, output_path)
+            else:
+                self.prepare_report()
+            try:
+                groups = self._group_findings(output_path)
+            finally:
+                if output_path != self.output_dir and os.path.exists(output_path):
+                    os.remove(output_path)
+            for repo in groups.keys() - data_keys.keys():
+                repos.append(repo)
+                data_keys[repo] = whole_data_key
+                stale.append(repo)
+            for repo in stale:
+                findings, reported = groups.get(repo, ([], {}))
+                partials[repo] = RepoPartial(data_keys[repo], findings, reported)
+
+        total = RepoCounters()
+        reported_total: Dict[str, int] = {}
+        try:
+            with self._stage("parse_result"):
+                for repo in repos:
+                    partial = partials[repo]
+                    meta_key = make_key(self.markup.repo_meta_checksums.get(repo, ""), self.match_mode, code_checksum())
+                    if partial.counters is None or partial.meta_key != meta_key:
+                        partial.counters = self._evaluate_repo(partial.findings)
+                        partial.meta_key = meta_key
+                    total.result_cnt += partial.counters.result_cnt
+                    total.lost_cnt += partial.counters.lost_cnt
+                    total.true_cnt += partial.counters.true_cnt
+                    total.false_cnt += partial.counters.false_cnt
+                    for rule, (true_cnt, false_cnt) in partial.counters.rules.items():
+                        rule_true_cnt, rule_false_cnt = total.rules.get(rule, (0, 0))
+                        total.rules[rule] = (rule_true_cnt + true_cnt, rule_false_cnt + false_cnt)
+                    for rule, reported_cnt in partial.reported.items():
+                        reported_total[rule] = reported_total.get(rule, 0) + reported_cnt
+        finally:
+            self.diagnostics.close()
+            self.line_cache.save()
+            self.line_cache.close()
+        # partials of removed repos are dropped
+        self.report_cache.put_partials(self.scanner_type.value, {x: partials[x] for x in repos})
+        self.result_cnt, self.lost_cnt = total.result_cnt, total.lost_cnt
+        self.true_cnt, self.false_cnt = total.true_cnt, total.false_cnt
+        self.result_dict = {}
+        for rule, (true_cnt, false_cnt) in total.rules.items():
+            rule_counter = self.result_dict[rule] = TrueFalseCounter()
+            rule_counter.true_cnt, rule_counter.false_cnt = true_cnt, false_cnt
+        self.reported = reported_total
+        with self._stage("analyze_result"):
+            return self.analyze_result()
 
     @staticmethod
     def get_items_from_path(file_path: str) -> Tuple[str, str, str, str]:
@@ -245,50 +553,82 @@ class Scanner(ABC):
         file_id = file_name.split('.')[0]
         return data_path, repo_name, file_name, file_id
 
-    @staticmethod
-    @cache
-    def read_cache(file_path: str) -> list[str]:
-        with contextlib.suppress(Exception):
-            with open(file_path, "r", encoding="utf8") as f:
-                return f.read().replace("\r\n", '\n').replace('\r', '\n').split('\n')
-        return []
+    def _get_path_items(self, file_path: str) -> Tuple[str, str, str, str, int]:
+        """get_items_from_path with interned data path. Reports have many lines for the same file"""
+        if (path_items := self._path_items.get(file_path)) is None:
+            data_path, repo_name, file_name, file_id = self.get_items_from_path(file_path)
+            path_items = (data_path, repo_name, file_name, file_id, self.paths.intern(data_path))
+            self._path_items[file_path] = path_items
+        return path_items
+
+    def _add_meta_row(self, meta_row: MetaRow) -> None:
+        """Adds markup which was created during the benchmark"""
+        self.markup.index_meta_row(meta_row)
+        for rule in meta_row.rules:
+            if rule not in self.rules_total_counters:
+                self.rules_total_counters[rule] = TrueFalseCounter()
+            self.rules_total_counters[rule].increase(LABEL_TRUE == meta_row.GroundTruth)
 
-    @staticmethod
-    def get_colored_line(file_path: str, line_start: int, line_end: int, value_start: int, value_end: int) -> str:
-        """get line with color highlighted value for quick review"""
-        if lines := Scanner.read_cache(file_path):
-            if line_start == line_end <= len(lines) and 0 <= value_start < value_end:
-                # normal single line value
-                _line = lines[line_start - 1]
-                colored_line = (_line[:value_start] + Fore.LIGHTYELLOW_EX +
-                                _line[value_start:value_end] + Style.RESET_ALL + _line[value_end:])
-            elif line_start < line_end <= len(lines):
-                # multiline
-                colored_line = '\n'.join(lines[line_start - 1:line_end])
-            else:
-                # wrong line numeration (.xml e.g.)
-                colored_line = ''
-        else:
-            # no file
-            colored_line = f"Cannot read '{Fore.LIGHTMAGENTA_EX}{file_path}{Style.RESET_ALL}' file"
-        return colored_line
+    @property
+    def meta_index(self) -> MetaIntervalIndex:
+        return self.markup.meta_index
+
+    def _find_meta_rows(self, data_path: str, path_id: int, line_start: int, line_end: int) -> List[MetaRow]:
+        """Returns markup rows for the lines according to match mode. Exactly matched rows are preferred"""
+        if rows := self.meta.get((path_id, line_start, line_end)):
+            return rows
+        if MatchMode.CONTAIN == self.match_mode:
+            return self.meta_index.contain(data_path, line_start, line_end)
+        if MatchMode.OVERLAP == self.match_mode:
+            return self.meta_index.overlap(data_path, line_start, line_end)
+        return []
 
-    def check_line_from_meta(self,
-                             file_path: str,
-                             line_start: int,
-                             line_end: int,
-                             value_start: int = -1,
-                             value_end: int = -1,
-                             rule: str = "") -> Tuple[LineStatus, str, str]:
-        self.result_cnt += 1
-        data_path, repo_name, file_name, file_id = self.get_items_from_path(file_path)
-        # by default the cred is false positive
-        approximate = f"{self.meta_next_id},{file_id}" \
-                      f",GitHub,{repo_name},{data_path}" \
-                      f",{line_start},{line_end}" \
-                      f",{LABEL_FALSE},{value_start},{value_end}" \
-                      f",,,{rule}"
-        lost_meta = MetaRow({
+    def check_lines_from_meta(self, findings: Iterable[Finding]) -> None:
+        """Evaluates findings grouped by file against the markup of the file.
+
+        Findings of a file are resolved in the order of the report, so duplicates are the same as one by one.
+        Counters, diagnostics and suggested Ids are applied in the order of the report after all files.
+        Markup is added during the evaluation in fix mode, so each finding is evaluated at once in the mode.
+        """
+        if self.fix:
+            check_line_from_meta = self.check_line_from_meta
+            for finding in findings:
+                check_line_from_meta(*finding)
+            return
+        findings = list(findings)
+        # path id: indices of findings of the file
+        groups: Dict[int, List[int]] = {}
+        for index, finding in enumerate(findings):
+            self._check_finding(finding)
+            groups.setdefault(self._get_path_items(finding[0])[4], []).append(index)
+        resolutions: List[Resolution] = [_CHECKED_RESOLUTION] * len(findings)
+        for indices in groups.values():
+            data_path, _, _, _, path_id = self._get_path_items(findings[indices[0]][0])
+            # markup rows of lines in the file
+            file_rows: Dict[Tuple[int, int], List[MetaRow]] = {}
+            for index in indices:
+                finding = findings[index]
+                lines = (finding[1], finding[2])
+                if (rows := file_rows.get(lines)) is None:
+                    rows = file_rows[lines] = self._find_meta_rows(data_path, path_id, *lines)
+                resolutions[index] = self._resolve_finding(data_path, rows, finding)
+        apply_resolution = self._apply_resolution
+        for finding, resolution in zip(findings, resolutions):
+            apply_resolution(finding, resolution)
+
+    def _get_approximate(self, file_path: str, line_start: int, line_end: int, value_start: int, value_end: int,
+                         rule: str) -> str:
+        data_path, repo_name, _, file_id, _ = self._get_path_items(file_path)
+        return f"{self.meta_next_id},{file_id}" \
+               f",GitHub,{repo_name},{data_path}" \
+               f",{line_start},{line_end}" \
+               f",{LABEL_FALSE},{value_start},{value_end}" \
+               f",,,{rule}"
+
+    def _get_lost_meta(self, file_path: str, line_start: int, line_end: int, value_start: int, value_end: int,
+                       rule: str) -> MetaRow:
+        data_path, repo_name, _, file_id, _ = self._get_path_items(file_path)
+        return MetaRow({
             "Id": self.meta_next_id,
             "FileID": file_id,
             "Domain": "GitHub",
@@ -304,25 +644,51 @@ class Scanner(ABC):
             "Category": rule
         })
 
-        if not (rows := self.meta.get(MetaKey(data_path, line_start, line_end))):
-            self.lost_cnt += 1
-            print(f"NOT FOUND WITH KEY: {approximate}"
-                  f"\n{Scanner.get_colored_line(file_path, line_start, line_end, value_start, value_end)}", flush=True)
-            if self.fix:
-                with open(f"{self.cred_data_dir}/meta/{repo_name}.csv", "a") as f:
-                    f.write(f"{str(approximate)}\n")
-                self.meta[MetaKey(data_path, line_start, line_end)] = [lost_meta]
-            self.meta_next_id += 1
-            return LineStatus.NOT_IN_DB, repo_name, file_id
+    @staticmethod
+    def _check_finding(finding: Finding) -> None:
+        file_path, line_start, line_end = finding[:3]
+        if not isinstance(line_start, int) or not isinstance(line_end, int):
+            raise RuntimeError(f"Wrong values {file_path}, {line_start}, {line_end}")
+        if line_start > line_end:
+            raise RuntimeError(f"Wrong start-end values {line_start} > {line_end}")
 
+    def check_line_from_meta(self,
+                             file_path: str,
+                             line_start: int,
+                             line_end: int,
+                             value_start: int = -1,
+                             value_end: int = -1,
+                             rule: str = "") -> Tuple[LineStatus, str, str]:
+        finding = (file_path, line_start, line_end, value_start, value_end, rule)
+        self._check_finding(finding)
+        data_path, repo_name, file_name, file_id, path_id = self._get_path_items(file_path)
+        rows = self._find_meta_rows(data_path, path_id, line_start, line_end)
+        resolution = self._resolve_finding(data_path, rows, finding)
+        self._apply_resolution(finding, resolution)
+        if LineStatus.CHECKED == resolution[0]:
+            return LineStatus.CHECKED, repo_name, file_name
+        return resolution[0], repo_name, file_id
+
+    def _resolve_finding(self, data_path: str, rows: List[MetaRow], finding: Finding) -> Resolution:
+        """Matches the finding with markup rows of its lines. Only checked lines are registered here"""
+        if not rows:
+            return LineStatus.NOT_IN_DB, DiagnosticKind.NOT_FOUND, "NOT FOUND WITH KEY:", None, False
+        _, line_start, line_end, value_start, value_end, rule = finding
+        warnings: Optional[List[Tuple[DiagnosticKind, str]]] = None
+        lost_meta_added = False
         suggestion = "LOST:"
+        kind = DiagnosticKind.LOST
         for row in rows:
             # it means, all markups are the same file with line start-end
-            if 0 > row.ValueStart and 0 > row.ValueEnd:
+            if row.LineStart != line_start or row.LineEnd != line_end:
+                # value positions of the markup are for other lines - the lines match is enough
+                pass
+            elif 0 > row.ValueStart and 0 > row.ValueEnd:
                 # the markup is for whole line - any value_start, value_end match
                 if LABEL_TRUE == row.GroundTruth and row.LineStart == row.LineEnd:
                     # True markup has to be marked at least start value in single line
-                    print(f"WARNING True markup for whole line: {row}", flush=True)
+                    warnings = warnings or []
+                    warnings.append((DiagnosticKind.WARNING, f"WARNING True markup for whole line: {row}"))
                 pass
             elif row.ValueEnd < 0 <= row.ValueStart:
                 # the markup points only start value position
@@ -333,12 +699,14 @@ class Scanner(ABC):
                     or row.LineStart < row.LineEnd and 0 <= row.ValueStart and 0 <= row.ValueEnd:
                 # ! meta value_end may be less than start in multiline markup
                 suggestion = f"UNMATCH {row.ValueStart, row.ValueEnd}:"
+                kind = DiagnosticKind.UNMATCH
                 # both markers are available
                 if 0 <= value_start and row.ValueStart != value_start:
                     # given value_start does not match
                     continue
                 else:
                     suggestion = f"ALMOST {row.ValueStart, row.ValueEnd} {row.Category}:"
+                    kind = DiagnosticKind.ALMOST
                 # or ...
                 if 0 <= value_end and row.ValueEnd != value_end:
                     # for suggestion, padding for base64 encoded items
@@ -346,56 +714,80 @@ class Scanner(ABC):
                     if row.ValueEnd - delta <= value_end <= row.ValueEnd + delta \
                             or value_end - delta <= row.ValueEnd <= value_end + delta:
                         suggestion = f"NEARBY {row.ValueStart, row.ValueEnd}"
+                        kind = DiagnosticKind.NEARBY
                     # given value_end does not match
                     continue
                 # all checks have passed - there is precisely matching value markup
             else:
-                print(f"WARNING: check meta value start-end {row}", flush=True)
+                warnings = warnings or []
+                warnings.append((DiagnosticKind.WARNING, f"WARNING: check meta value start-end {row}"))
                 continue
 
             code = (data_path, row.LineStart, row.LineEnd, row.ValueStart, row.ValueEnd, rule)
             if code in self.line_checker:
-                self.result_cnt -= 1
                 if LABEL_TRUE == row.GroundTruth:
-                    print(f"WARNING: Already checked True! Duplicate? {code}", flush=True)
-                return LineStatus.CHECKED, repo_name, file_name
+                    warnings = warnings or []
+                    warnings.append((DiagnosticKind.DUPLICATE, f"WARNING: Already checked True! Duplicate? {code}"))
+                return (LineStatus.CHECKED, None, "", warnings, False) if warnings else _CHECKED_RESOLUTION
             else:
                 self.line_checker.add(code)
 
-            for meta_rule in row.Category.split(':'):
-                # increase the counter only for corresponded rule mentioned in markup
-                if meta_rule == rule:
-                    if LABEL_TRUE == row.GroundTruth:
-                        self._increase_result_dict_cnt(meta_rule, True)
-                        self.true_cnt += 1
-                        return LineStatus.FALSE, repo_name, file_id
-                    else:
-                        # MetaRow class checks the correctness of row.GroundTruth
-                        self._increase_result_dict_cnt(meta_rule, False)
-                        self.false_cnt += 1
-                        return LineStatus.TRUE, repo_name, file_id
-            else:
-                print(f"WARNING: '{rule}' is not mentioned in {row}")
-                if self.fix:
-                    subprocess.check_call(
-                        ["sed", "-i",
-                         f"s|{row.Id},\\(.*\\)|{row.Id},\\1:{rule}|",
-                         f"{self.cred_data_dir}/meta/{row.RepoName}.csv"])
-                    self.meta[MetaKey(data_path, line_start, line_end)].append(lost_meta)
-                    lost_meta = None
+            if rule in row.rules:
+                # the counter is increased only for corresponded rule mentioned in markup
+                # MetaRow class checks the correctness of row.GroundTruth
+                if warnings:
+                    return LineStatus.FALSE if LABEL_TRUE == row.GroundTruth else LineStatus.TRUE, None, "", \
+                        warnings, False
+                return _TRUE_RESOLUTION if LABEL_TRUE == row.GroundTruth else _FALSE_RESOLUTION
+            warnings = warnings or []
+            warnings.append((DiagnosticKind.WARNING, f"WARNING: '{rule}' is not mentioned in {row}"))
+            if self.fix:
+                # fix mode evaluates findings one by one, so the markup is changed before the next finding
+                self.meta_writer.add_category(row.RepoName, row.Id, rule)
+                if not lost_meta_added:
+                    self._add_meta_row(self._get_lost_meta(*finding))
+                    lost_meta_added = True
 
         # meta has no markup for given credential
-        self.lost_cnt += 1
-        print(f"{suggestion} {approximate}"
-              f"\n{Scanner.get_colored_line(file_path, line_start, line_end, value_start, value_end)}", flush=True)
-        self.meta_next_id += 1
-        if lost_meta and self.fix:
-            with open(f"{self.cred_data_dir}/meta/{repo_name}.csv", "a") as f:
-                f.write(f"{str(approximate)}\n")
-            self.meta[MetaKey(data_path, line_start, line_end)].append(lost_meta)
-        return LineStatus.NOT_IN_DB, repo_name, file_id
-
-    def analyze_result(self) -> None:
+        return LineStatus.NOT_IN_DB, kind, suggestion, warnings, lost_meta_added
+
+    def _apply_resolution(self, finding: Finding, resolution: Resolution) -> None:
+        """Counts the resolved finding, reports diagnostics and suggests markup for a lost finding"""
+        status, kind, suggestion, warnings, lost_meta_added = resolution
+        if warnings:
+            for warning_kind, message in warnings:
+                self.diagnostics.report(warning_kind, message)
+        if LineStatus.CHECKED == status:
+            return
+        self.result_cnt += 1
+        file_path, line_start, line_end, value_start, value_end, rule = finding
+        if LineStatus.NOT_IN_DB == status:
+            self.lost_cnt += 1
+            # by default the cred is false positive
+            approximate = self._get_approximate(*finding)
+            self.diagnostics.report(kind, f"{suggestion} {approximate}",
+                                    file_path, line_start, line_end, value_start, value_end)
+            if DiagnosticKind.NOT_FOUND == kind:
+                if self.fix:
+                    self.meta_writer.append(self._get_path_items(file_path)[1], approximate)
+                    self._add_meta_row(self._get_lost_meta(*finding))
+                self.meta_next_id += 1
+            else:
+                self.meta_next_id += 1
+                if not lost_meta_added and self.fix:
+                    self.meta_writer.append(self._get_path_items(file_path)[1], approximate)
+                    self._add_meta_row(self._get_lost_meta(*finding))
+            return
+        is_true = LineStatus.FALSE == status
+        self._increase_result_dict_cnt(rule, is_true)
+        if is_true:
+            self.true_cnt += 1
+        else:
+            self.false_cnt += 1
+        if self.outcomes is not None:
+            self.outcomes.add(self._get_path_items(file_path)[0], rule, is_true)
+
+    def analyze_result(self) -> List[Any]:
         print(
             f"{self.scanner_type} result_cnt : {self.result_cnt}, lost_cnt : {self.lost_cnt}"
             f", true_cnt : {self.true_cnt}, false_cnt : {self.false_cnt}"
@@ -466,28 +858,37 @@ class Scanner(ABC):
             Result.round_micro(total_result.f1),
         ])
         print(tabulate.tabulate(rows, header, floatfmt=".6f"))
+        return rows[-1]
+
+    def analyze_bootstrap(self) -> None:
+        """Prints the metrics with confidence intervals for resampling of repos or files of the markup"""
+        self.outcomes.add_markup(self.markup.meta_table)
+        intervals = self.outcomes.bootstrap(self.bootstrap, self.seed)
+        print(f"{self.scanner_type} bootstrap : {self.bootstrap} resamples of {len(self.outcomes.units)}"
+              f" {self.bootstrap_unit}s, 95% confidence intervals")
+        header = ["Rules"]
+        for metric_name in ("PRC", "RCL", "F1", "FPR"):
+            header.extend([metric_name, f"{metric_name} low", f"{metric_name} high"])
+        rows: List[List[Any]] = []
+        for rule in sorted(self.result_dict.keys()) + [""]:
+            if rule:
+                value = self.result_dict[rule]
+                result = Result(value.true_cnt, value.false_cnt, *self._get_total_true_false_count(rule))
+            else:
+                result = Result(self.true_cnt, self.false_cnt, self.total_true_cnt, self.total_false_cnt)
+            rule_intervals = intervals.get(rule, {})
+            row: List[Any] = [rule]
+            for metric, estimate in zip(METRICS, (result.precision, result.recall, result.f1,
+                                                  result.false_positive_rate)):
+                low, high = rule_intervals.get(metric, (None, None))
+                row.extend([Result.round_micro(estimate), Result.round_micro(low), Result.round_micro(high)])
+            rows.append(row)
+        print(tabulate.tabulate(rows, header, floatfmt=".6f"))
 
-    def _get_total_true_false_count(self, category: str) -> Tuple[int, int]:
-        total_line_cnt = self._get_total_line_cnt(category)
-        total_true_cnt = self._get_total_true_cnt(category)
-        total_false_cnt = total_line_cnt - total_true_cnt
-        return total_true_cnt, total_false_cnt
-
-    def _get_total_line_cnt(self, rule: str) -> int:
-        total_line_cnt = 0
-        for rows in self.meta.values():
-            for row in rows:
-                if row and rule in row.Category.split(':'):
-                    total_line_cnt += 1
-        return total_line_cnt
-
-    def _get_total_true_cnt(self, rule: str) -> int:
-        total_true_cnt = 0
-        for rows in self.meta.values():
-            for row in rows:
-                if row and LABEL_TRUE == row.GroundTruth and rule in row.Category.split(':'):
-                    total_true_cnt += 1
-        return total_true_cnt
+    def _get_total_true_false_count(self, rule: str) -> Tuple[int, int]:
+        if rule_total_counter := self.rules_total_counters.get(rule):
+            return rule_total_counter.true_cnt, rule_total_counter.false_cnt
+        return 0, 0
 
     def _increase_result_dict_cnt(self, rule: str, cnt_type: bool) -> None:
         if rule not in self.result_dict:
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from benchmark.common import ScannerType
 from benchmark.scanner import Scanner
+from benchmark.scanner.markup import Markup
 
 
 class ScannerFactory:
@@ -9,28 +12,29 @@ class ScannerFactory:
                        working_dir: str,
                        cred_data_dir: str,
                        preload: bool,
-                       fix: bool) -> Scanner:
+                       fix: bool,
+                       markup: Optional[Markup] = None) -> Scanner:
         if scanner_type == ScannerType.CREDSWEEPER:
             from benchmark.scanner import CredSweeper
-            return CredSweeper(working_dir, cred_data_dir, preload, fix)
+            return CredSweeper(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.DETECT_SECRETS:
             from benchmark.scanner import DetectSecrets
-            return DetectSecrets(working_dir, cred_data_dir, preload, fix)
+            return DetectSecrets(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.GITLEAKS:
             from benchmark.scanner import Gitleaks
-            return Gitleaks(working_dir, cred_data_dir, preload, fix)
+            return Gitleaks(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.SHHGIT:
             from benchmark.scanner import Shhgit
-            return Shhgit(working_dir, cred_data_dir, preload, fix)
+            return Shhgit(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.CREDENTIAL_DIGGER:
             from benchmark.scanner import CredentialDigger
-            return CredentialDigger(working_dir, cred_data_dir, preload, fix)
+            return CredentialDigger(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.WRAITH:
             from benchmark.scanner import Wraith
-            return Wraith(working_dir, cred_data_dir, preload, fix)
+            return Wraith(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.TRUFFLEHOG3:
             from benchmark.scanner import TruffleHog3
-            return TruffleHog3(working_dir, cred_data_dir, preload, fix)
+            return TruffleHog3(working_dir, cred_data_dir, preload, fix, markup)
         elif scanner_type == ScannerType.TRUFFLEHOG:
             from benchmark.scanner import TruffleHog
-            return TruffleHog(working_dir, cred_data_dir, preload, fix)
+            return TruffleHog(working_dir, cred_data_dir, preload, fix, markup)
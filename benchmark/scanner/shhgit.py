@@ -1,15 +1,21 @@
 import csv
 import os
-import subprocess
-from typing import Tuple
+from typing import Dict, Generator, List, Optional
 
-from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.constants import URL, ScannerType
+from benchmark.scanner.match_line_resolver import MatchLineResolver
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
 
 
 class Shhgit(Scanner):
-    def __init__(self, working_dir: str, cred_data_dir: str, preload: bool, fix: bool) -> None:
-        super().__init__(ScannerType.SHHGIT, URL.SHHGIT, working_dir, cred_data_dir, preload, fix)
+    def __init__(self,
+                 working_dir: str,
+                 cred_data_dir: str,
+                 preload: bool,
+                 fix: bool,
+                 markup: Optional[Markup] = None) -> None:
+        super().__init__(ScannerType.SHHGIT, URL.SHHGIT, working_dir, cred_data_dir, preload, fix, markup)
         self.output_dir = f"{self.scanner_dir}/output.csv"
 
     @property
@@ -22,30 +28,87 @@ class Shhgit(Scanner):
 
     def init_scanner(self) -> None:
         self.shhgit_path = f"{os.path.dirname(os.path.realpath(__file__))}/bin/shhgit/shhgit"
-        if os.path.exists(self.output_dir):
-            os.remove(self.output_dir)
+
+    def _scanner_version(self) -> Optional[str]:
+        # paths of the binary are set in init_scanner
+        self.init_scanner_once()
+        return self._files_version(self.shhgit_path)
 
     def run_scanner(self) -> None:
-        self.init_scanner()
-        subprocess.call(
-            [self.shhgit_path, "-silent", "--local", f"{self.cred_data_dir}/data", "--csv-path", self.output_dir],
-            cwd=self.scanner_dir)
+        self.init_scanner_once()
+        if os.path.exists(self.output_dir):
+            os.remove(self.output_dir)
+        self._scan_data()
 
-    def parse_result(self) -> None:
-        with open(self.output_dir, "r") as f:
-            reader = csv.DictReader(f)
+    @property
+    def partial_scan_supported(self) -> bool:
+        return True
 
-            for row in reader:
-                file_path = row["Matching file"][1:]
-                if file_path.split("/")[-1] == "LICENSE":
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        data_dir = f"{self.cred_data_dir}/data"
+        if repos is None:
+            self._run_command([self.shhgit_path, "-silent", "--local", data_dir, "--csv-path", output_path],
+                              cwd=self.scanner_dir)
+            return
+        # shhgit scans one directory, so the repos of the shard are scanned one after another
+        rows: List[Dict[str, str]] = []
+        fieldnames: List[str] = []
+        repo_output_path = f"{output_path}.repo"
+        try:
+            for repo in repos:
+                self._run_command(
+                    [self.shhgit_path, "-silent", "--local", f"{data_dir}/{repo}", "--csv-path", repo_output_path],
+                    cwd=self.scanner_dir)
+                if not os.path.exists(repo_output_path):
                     continue
-                for match in row["Matches"].split(", "):
-                    line_num = self._get_line_num(file_path, match)
-                    _, _, _ = self.check_line_from_meta(file_path, line_num, line_num)
-
-    def _get_line_num(self, file_path: str, match: str) -> int:
-        with open(f"{self.cred_data_dir}/data/{file_path}", "r") as f:
-            for line_num, line in enumerate(f.readlines()):
-                if match in line:
-                    return line_num + 1
-        return -1
+                with open(repo_output_path, "r", newline="") as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        # the matching file is relative to the scanned directory
+                        row["Matching file"] = f"/{repo}{row['Matching file']}"
+                        rows.append(row)
+                    fieldnames = fieldnames or list(reader.fieldnames or [])
+                os.remove(repo_output_path)
+        finally:
+            if os.path.exists(repo_output_path):
+                os.remove(repo_output_path)
+        self._write_csv(output_path, fieldnames, rows)
+
+    @staticmethod
+    def _write_csv(output_path: str, fieldnames: List[str], rows: List[Dict[str, str]]) -> None:
+        with open(output_path, "w", newline="") as f:
+            if fieldnames:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
+
+    def _merge_shards(self, shard_paths: List[str]) -> None:
+        rows: List[Dict[str, str]] = []
+        fieldnames: List[str] = []
+        for shard_path in shard_paths:
+            with open(shard_path, "r", newline="") as f:
+                reader = csv.DictReader(f)
+                rows.extend(reader)
+                fieldnames = fieldnames or list(reader.fieldnames or [])
+        rows.sort(key=lambda x: self._repo_index(f"{self.cred_data_dir}/data{x['Matching file']}"))
+        self._write_csv(self.output_dir, fieldnames, rows)
+
+    def iter_findings(self) -> Generator[Finding, None, None]:
+        with open(self.output_dir, "r") as f:
+            rows = [(x["Matching file"][1:], x["Matches"].split(", ")) for x in csv.DictReader(f)]
+        # matches of all rows of a file are found with one reading of the file
+        resolvers: Dict[str, MatchLineResolver] = {}
+        for file_path, matches in rows:
+            if file_path.split("/")[-1] == "LICENSE":
+                continue
+            if (resolver := resolvers.get(file_path)) is None:
+                resolver = resolvers[file_path] = MatchLineResolver(f"{self.cred_data_dir}/data/{file_path}")
+            for match in matches:
+                resolver.add(match)
+        for file_path, matches in rows:
+            if file_path.split("/")[-1] == "LICENSE":
+                continue
+            resolver = resolvers[file_path]
+            for match in matches:
+                line_num = resolver.line_num(match)
+                yield file_path, line_num, line_num, -1, -1, ""
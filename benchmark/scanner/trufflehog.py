@@ -1,16 +1,17 @@
 import base64
-import json
 import os
-import subprocess
-from typing import Tuple
+from typing import Generator, List, Optional
 
-from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.constants import URL, ScannerType
+from benchmark.scanner.match_line_resolver import MatchLineResolver
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
+from json_stream import iter_json_lines
 
 
 class TruffleHog(Scanner):
-    def __init__(self, working_dir, cred_data_dir, preload: bool, fix: bool):
-        super().__init__(ScannerType.TRUFFLEHOG, URL.TRUFFLEHOG, working_dir, cred_data_dir, preload, fix)
+    def __init__(self, working_dir, cred_data_dir, preload: bool, fix: bool, markup: Optional[Markup] = None):
+        super().__init__(ScannerType.TRUFFLEHOG, URL.TRUFFLEHOG, working_dir, cred_data_dir, preload, fix, markup)
         self.output_dir: str = f"{self.scanner_dir}/output.json"
 
     @property
@@ -24,33 +25,40 @@ class TruffleHog(Scanner):
     def init_scanner(self) -> None:
         self.trufflehog_path = f"{os.path.dirname(os.path.realpath(__file__))}/bin/trufflehog/trufflehog"
 
+    def _scanner_version(self) -> Optional[str]:
+        # paths of the binary are set in init_scanner
+        self.init_scanner_once()
+        return self._files_version(self.trufflehog_path)
+
     def run_scanner(self) -> None:
-        self.init_scanner()
+        self.init_scanner_once()
+        _, out = self._run_command(
+            [self.trufflehog_path, "filesystem", f"--directory={self.cred_data_dir}/data", "--json"],
+            cwd=self.scanner_dir,
+            capture_output=True)
         with open(self.output_dir, "w") as f:
-            f.write(
-                subprocess.Popen(
-                    [self.trufflehog_path, "filesystem", f"--directory={self.cred_data_dir}/data", "--json"],
-                    cwd=self.scanner_dir,
-                    stdout=subprocess.PIPE).communicate()[0].decode("utf-8"))
-
-    def parse_result(self) -> None:
-        data = []
+            f.write(out.decode("utf-8"))
+
+    def iter_findings(self) -> Generator[Finding, None, None]:
+        # findings of a file are reported one after another, so lines of the last file are resolved together
+        resolver: Optional[MatchLineResolver] = None
+        lines: List[str] = []
         with open(self.output_dir, "r") as f:
-            lines = f.readlines()
-            for line in lines:
-                data.append(json.loads(line))
-
-        for line_data in data:
-            file_path = line_data["SourceMetadata"]["Data"]["Filesystem"]["file"]
-            if file_path.split("/")[-1] == "LICENSE":
-                continue
-            line = base64.b64decode(line_data["Raw"]).decode("utf-8", "backslashreplace")
-            line_num = self._get_line_num(file_path, line)
-            _, _, _ = self.check_line_from_meta(file_path, line_num, line_num)
-
-    def _get_line_num(self, file_path: str, match: str) -> int:
-        with open(file_path, "r") as f:
-            for line_num, line in enumerate(f.readlines()):
-                if match in line:
-                    return line_num + 1
-        return -1
+            for line_data in iter_json_lines(f):
+                file_path = line_data["SourceMetadata"]["Data"]["Filesystem"]["file"]
+                if file_path.split("/")[-1] == "LICENSE":
+                    continue
+                line = base64.b64decode(line_data["Raw"]).decode("utf-8", "backslashreplace")
+                if resolver is None or resolver.file_path != file_path:
+                    yield from self._resolve_lines(resolver, lines)
+                    resolver = MatchLineResolver(file_path)
+                    lines = []
+                resolver.add(line)
+                lines.append(line)
+        yield from self._resolve_lines(resolver, lines)
+
+    @staticmethod
+    def _resolve_lines(resolver: Optional[MatchLineResolver], lines: List[str]) -> Generator[Finding, None, None]:
+        for line in lines:
+            line_num = resolver.line_num(line)
+            yield resolver.file_path, line_num, line_num, -1, -1, ""
@@ -1,15 +1,22 @@
 import json
 import os
 import subprocess
-from typing import Tuple
+from typing import Any, Dict, Generator, List, Optional
 
-from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.constants import URL, ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
+from json_stream import JsonStream
 
 
 class TruffleHog3(Scanner):
-    def __init__(self, working_dir: str, cred_data_dir: str, preload: bool, fix: bool) -> None:
-        super().__init__(ScannerType.TRUFFLEHOG3, URL.TRUFFLEHOG3, working_dir, cred_data_dir, preload, fix)
+    def __init__(self,
+                 working_dir: str,
+                 cred_data_dir: str,
+                 preload: bool,
+                 fix: bool,
+                 markup: Optional[Markup] = None) -> None:
+        super().__init__(ScannerType.TRUFFLEHOG3, URL.TRUFFLEHOG3, working_dir, cred_data_dir, preload, fix, markup)
         self.output_dir = f"{self.scanner_dir}/output.json"
         if os.path.exists(self.output_dir):
             os.remove(self.output_dir)
@@ -27,22 +34,39 @@ class TruffleHog3(Scanner):
         subprocess.call(["virtualenv", "venv"], cwd=self.scanner_dir)
         subprocess.call(["./venv/bin/python", "-m", "pip", "install", "trufflehog3==2.0.7"], cwd=self.scanner_dir)
 
+    def _scanner_version(self) -> Optional[str]:
+        return self._venv_package_version("trufflehog3")
+
     def run_scanner(self) -> None:
-        self.init_scanner()
-        subprocess.call([
-            "./venv/bin/trufflehog3", f"{self.cred_data_dir}/data/", "-o", self.output_dir, "-f", "json",
-            "--line-numbers"
-        ],
-            cwd=self.scanner_dir)
-
-    def parse_result(self) -> None:
+        self.init_scanner_once()
+        self._scan_data()
+
+    @property
+    def partial_scan_supported(self) -> bool:
+        return True
+
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        data_dir = f"{self.cred_data_dir}/data"
+        targets = [f"{data_dir}/"] if repos is None else [f"{data_dir}/{x}" for x in repos]
+        self._run_command(["./venv/bin/trufflehog3"] + targets + ["-o", output_path, "-f", "json", "--line-numbers"],
+                          cwd=self.scanner_dir)
+
+    def _merge_shards(self, shard_paths: List[str]) -> None:
+        issues: List[Dict[str, Any]] = []
+        for shard_path in shard_paths:
+            if os.path.exists(shard_path):
+                with open(shard_path, "r") as f:
+                    issues.extend(json.load(f))
+        # the order of the scan inside a repo is kept by the stable sort
+        issues.sort(key=lambda x: self._repo_index(x["path"]))
+        with open(self.output_dir, "w") as f:
+            json.dump(issues, f, indent=4)
+
+    def iter_findings(self) -> Generator[Finding, None, None]:
         with open(self.output_dir, "r") as f:
-            data_list = json.load(f)
-
-        for data in data_list:
-            for line in data["stringsFound"]:
-                line_data = {"path": data["path"], "line_number": int(line.split(" ")[0])}
-                if line_data["path"].split("/")[-1] == "LICENSE":
-                    continue
-                _, _, _ = self.check_line_from_meta(line_data["path"], line_data["line_number"],
-                                                    line_data["line_number"])
+            for data in JsonStream(f).iter_array():
+                for line in data["stringsFound"]:
+                    line_data = {"path": data["path"], "line_number": int(line.split(" ")[0])}
+                    if line_data["path"].split("/")[-1] == "LICENSE":
+                        continue
+                    yield line_data["path"], line_data["line_number"], line_data["line_number"], -1, -1, ""
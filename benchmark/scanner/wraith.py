@@ -1,15 +1,22 @@
-import json
+import io
 import os
 import subprocess
-from typing import Tuple
+from typing import Generator, Optional
 
-from benchmark.common.constants import URL, LineStatus, ScannerType
-from benchmark.scanner.scanner import Scanner
+from benchmark.common.constants import URL, ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner, Finding
+from json_stream import JsonStream
 
 
 class Wraith(Scanner):
-    def __init__(self, working_dir: str, cred_data_dir: str, preload: bool, fix: bool) -> None:
-        super().__init__(ScannerType.WRAITH, URL.WRAITH, working_dir, cred_data_dir, preload, fix)
+    def __init__(self,
+                 working_dir: str,
+                 cred_data_dir: str,
+                 preload: bool,
+                 fix: bool,
+                 markup: Optional[Markup] = None) -> None:
+        super().__init__(ScannerType.WRAITH, URL.WRAITH, working_dir, cred_data_dir, preload, fix, markup)
         self.output_dir = f"{self.scanner_dir}/output.json"
         self.working_dir = working_dir
 
@@ -29,29 +36,40 @@ class Wraith(Scanner):
     def working_dir(self, working_dir: str) -> None:
         self._working_dir = working_dir
 
+    @property
+    def jobs_supported(self) -> bool:
+        return True
+
     def init_scanner(self) -> None:
         self.scanner_path = f"{self.working_dir}/benchmark/scanner/bin/wraith/wraith"
         self.signature_path = f"{self.working_dir}/benchmark/scanner/bin/wraith/default.yaml"
 
+    def _scanner_version(self) -> Optional[str]:
+        # paths of the binary are set in init_scanner
+        self.init_scanner_once()
+        return self._files_version(self.scanner_path, self.signature_path)
+
     def run_scanner(self) -> None:
-        self.init_scanner()
-        self.output_lines = subprocess.check_output([
+        self.init_scanner_once()
+        args = [
             self.scanner_path, "--silent", "--signature-file", self.signature_path, "scanLocalPath", "--local-paths",
             f"{self.cred_data_dir}/data/", "--scan-tests", "--json", "--num-threads",
-            str(os.cpu_count() * 2)
-        ],
-            cwd=self.scanner_dir,
-            universal_newlines=True)
+            str(self.jobs or os.cpu_count() * 2)
+        ]
+        returncode, out = self._run_command(args, cwd=self.scanner_dir, capture_output=True)
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, args, out)
+        # decoded with universal newlines like subprocess.check_output(..., universal_newlines=True)
+        self.output_lines = io.TextIOWrapper(io.BytesIO(out)).read()
         with open(self.output_dir, "w") as f:
             f.write(self.output_lines)
 
-    def parse_result(self) -> None:
+    def iter_findings(self) -> Generator[Finding, None, None]:
         with open(self.output_dir, "r") as f:
-            data = json.loads(''.join(f.readlines()[:-1]))
-
-        for line_data in data:
-            if line_data["FilePath"].split("/")[-1] == "LICENSE":
-                continue
+            # the last line after the array is not JSON and is not read
+            for line_data in JsonStream(f).iter_array():
+                if line_data["FilePath"].split("/")[-1] == "LICENSE":
+                    continue
 
-            _, _, _ = self.check_line_from_meta(line_data["FilePath"], int(line_data["LineNumber"]),
-                                                int(line_data["LineNumber"]))
+                line_number = int(line_data["LineNumber"])
+                yield line_data["FilePath"], line_number, line_number, -1, -1, ""
@@ -9,3 +9,5 @@ PRIVATE_KEY_CATEGORY = "PEM Private Key"
 MULTI_PATTERN_RULES = ("AWS Multi", "Google Multi", "JWK")
 # the rules may be multiline
 MULTI_LINE_RULES = MULTI_PATTERN_RULES + (OTHER_CATEGORY, PRIVATE_KEY_CATEGORY)
+# location of persistent caches near meta and data directories
+CACHE_DIR = ".cache"
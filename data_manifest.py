@@ -0,0 +1,167 @@
+import dataclasses
+import functools
+import hashlib
+import mmap
+import os
+import pickle
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Generator, Union, List, Tuple, Iterator
+
+from constants import CACHE_DIR
+
+
+@dataclasses.dataclass
+class DataFileEntry:
+    """Statistics of a data file which are valid while size and modification time of the file are the same"""
+    size: int
+    mtime_ns: int
+    md5: bytes
+    # number of lines with 7 or more symbols without surrounding whitespaces. 0 for a file which is not UTF-8 text
+    valid_lines: int
+    # lower case extension of the file like in CredSweeper
+    extension: str
+
+
+# whitespaces of str.strip() in ASCII. Other whitespaces of str.strip() are not ASCII
+_ASCII_WHITESPACES = b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+# the data is counted by parts which end with a line feed, so only a part with non ASCII symbols is decoded
+_CHUNK_SIZE = 1 << 16
+
+
+def _count_valid_lines_chunk(chunk: bytes) -> int:
+    if chunk.isascii():
+        # bytes.splitlines() splits by \r, \n and \r\n only. Minimal length of detection is 7 e.g. pw:X3d!
+        return sum(1 for line in chunk.splitlines() if 7 <= len(line) and 7 <= len(line.strip(_ASCII_WHITESPACES)))
+    text = chunk.decode("utf8")
+    if '\r' in text:
+        text = text.replace("\r\n", '\n').replace('\r', '\n')
+    return sum(1 for line in text.split('\n') if 7 <= len(line.strip()))
+
+
+def count_valid_lines(data: Union[bytes, mmap.mmap]) -> int:
+    """Returns number of lines which may contain a credential. Line separators are like in CredSweeper.
+
+    ASCII lines are counted as bytes. A part with other symbols is decoded to strip unicode whitespaces
+    like str.strip(). 0 is returned when the data is not UTF-8 text.
+    """
+    valid_lines = 0
+    size = len(data)
+    start = 0
+    while start < size:
+        end = data.rfind(b'\n', start, start + _CHUNK_SIZE)
+        if -1 == end:
+            # a line longer than the chunk
+            end = data.find(b'\n', start + _CHUNK_SIZE)
+            if -1 == end:
+                end = size
+        try:
+            valid_lines += _count_valid_lines_chunk(data[start:end + 1])
+        except UnicodeDecodeError:
+            return 0
+        start = end + 1
+    return valid_lines
+
+
+def get_data_file_entry(file_path: str) -> DataFileEntry:
+    with open(file_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                md5 = hashlib.md5(data).digest()
+                valid_lines = count_valid_lines(data)
+        else:
+            # empty file cannot be mapped
+            md5 = hashlib.md5(b'').digest()
+            valid_lines = 0
+    return DataFileEntry(size=stat.st_size,
+                         mtime_ns=stat.st_mtime_ns,
+                         md5=md5,
+                         valid_lines=valid_lines,
+                         extension=os.path.splitext(file_path)[1].lower())
+
+
+@functools.cache
+def _schema_checksum() -> str:
+    """The manifest becomes obsolete when the calculation is changed"""
+    return hashlib.md5(Path(__file__).read_bytes()).hexdigest()
+
+
+class DataManifest:
+    """Persistent statistics of data files. Only new and changed files are read during the scan"""
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self.cache_path = data_dir.absolute().parent / CACHE_DIR / f"{data_dir.absolute().name}.manifest.pickle"
+        # relative path: entry
+        self.entries: Dict[str, DataFileEntry] = {}
+        self.changed = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, "rb") as f:
+                schema, data_dir, entries = pickle.load(f)
+        except Exception:
+            # no manifest or it is broken - will be rebuilt
+            return
+        if schema == _schema_checksum() and data_dir == str(self.data_dir.absolute()):
+            self.entries = entries
+
+    def scan(self, jobs: int = 1) -> Generator[DataFileEntry, None, None]:
+        """Yields entries of all data files in os.walk order. Removed files are dropped from the manifest.
+        New and changed files are read in a process pool when jobs > 1"""
+        data_files: List[Tuple[str, str]] = []
+        changed_files: List[str] = []
+        for root, dirs, files in os.walk(self.data_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                relative_path = os.path.relpath(file_path, self.data_dir)
+                data_files.append((relative_path, file_path))
+                entry = self.entries.get(relative_path)
+                if entry is not None:
+                    stat = os.stat(file_path)
+                    if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                        continue
+                    del self.entries[relative_path]
+                changed_files.append(file_path)
+        if changed_files:
+            self.changed = True
+        if 1 < jobs and 1 < len(changed_files):
+            jobs = min(jobs, len(changed_files))
+            with Pool(jobs) as pool:
+                changed_entries = pool.imap(get_data_file_entry, changed_files,
+                                            chunksize=max(1, len(changed_files) // (4 * jobs)))
+                yield from self._merge(data_files, changed_entries)
+        else:
+            yield from self._merge(data_files, map(get_data_file_entry, changed_files))
+
+    def _merge(self, data_files: List[Tuple[str, str]],
+               changed_entries: Iterator[DataFileEntry]) -> Generator[DataFileEntry, None, None]:
+        """Yields entries in order of data files. Changed entries are in the same order"""
+        scanned_paths = set()
+        for relative_path, _ in data_files:
+            scanned_paths.add(relative_path)
+            if (entry := self.entries.get(relative_path)) is None:
+                entry = self.entries[relative_path] = next(changed_entries)
+            yield entry
+        for relative_path in set(self.entries.keys()) - scanned_paths:
+            del self.entries[relative_path]
+            self.changed = True
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        os.makedirs(self.cache_path.parent, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((_schema_checksum(), str(self.data_dir.absolute()), self.entries), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+            self.changed = False
+        except OSError as exc:
+            # read-only location is not a reason to fail
+            print(f"WARNING: cannot save {self.cache_path}: {exc}", flush=True)
+            if tmp_path.exists():
+                tmp_path.unlink()
@@ -0,0 +1,120 @@
+import json
+from typing import Any, Generator, TextIO
+
+
+class JsonStream:
+    """Incremental reader of a JSON document. Only the current item is kept in memory.
+
+    iter_object() yields keys of an object and the caller must consume the value of each key
+    with read_value(), iter_array() or iter_object() before the next key is requested.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 16):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Reads next chunk. The chunk grows with the buffer to keep decoding of a huge value linear"""
+        if self._eof:
+            return False
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skips whitespaces and returns the next symbol or empty string at the end"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, symbol: str) -> None:
+        if symbol != (next_symbol := self._peek()):
+            raise json.JSONDecodeError(f"Expecting '{symbol}' but '{next_symbol}' found", self._buffer, self._pos)
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # a number may continue in the next chunk
+                if end < len(self._buffer) and self._buffer[end] not in ".eE+-" or not self._fill():
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def iter_array(self) -> Generator[Any, None, None]:
+        """Yields items of an array one by one"""
+        self._expect('[')
+        if ']' == self._peek():
+            self._pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if ',' == self._peek():
+                self._pos += 1
+            else:
+                self._expect(']')
+                return
+
+    def iter_object(self) -> Generator[str, None, None]:
+        """Yields keys of an object. The value of the key must be consumed before the next key"""
+        self._expect('{')
+        if '}' == self._peek():
+            self._pos += 1
+            return
+        while True:
+            if '"' != self._peek():
+                raise json.JSONDecodeError("Expecting property name", self._buffer, self._pos)
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            if ',' == self._peek():
+                self._pos += 1
+            else:
+                self._expect('}')
+                return
+
+
+def iter_json_lines(f: TextIO) -> Generator[Any, None, None]:
+    """Yields items of JSON Lines file"""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+class JsonArrayWriter:
+    """Writes items one by one in the same format as json.dump(items, f, indent=4)"""
+
+    def __init__(self, f: TextIO):
+        self._file = f
+        self._items_number = 0
+
+    def write(self, item: Any) -> None:
+        self._file.write(",\n    " if self._items_number else "[\n    ")
+        # new lines may be only between elements because they are escaped in strings
+        self._file.write(json.dumps(item, indent=4).replace('\n', "\n    "))
+        self._items_number += 1
+
+    def close(self) -> None:
+        self._file.write("\n]" if self._items_number else "[]")
+
+    def __enter__(self) -> "JsonArrayWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,174 @@
+import functools
+import hashlib
+import mmap
+import os
+import pickle
+import re
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, List, Union
+
+from constants import CACHE_DIR
+
+# line separators like in CredSweeper. \r\n is checked first
+LINE_SEPARATOR_PATTERN = re.compile(rb"\r\n|\r|\n")
+
+
+@functools.cache
+def _schema_checksum() -> str:
+    """Persisted indexes become obsolete when the calculation is changed"""
+    return hashlib.md5(Path(__file__).read_bytes()).hexdigest()
+
+
+def line_cache_path(data_dir: Path) -> Path:
+    """Location of persisted indexes near the data manifest"""
+    return data_dir.absolute().parent / CACHE_DIR / f"{data_dir.absolute().name}.lines.pickle"
+
+
+def build_line_index(data: Union[bytes, mmap.mmap]) -> array:
+    """Returns offsets of line starts. The data must be UTF-8 text"""
+    # the decoding only checks the text - separators are ASCII and cannot be a part of multibyte symbol
+    str(data, encoding="utf8")
+    # 4 bytes per line are enough for most of files
+    line_starts = array('I' if len(data) < (1 << 32) else 'Q', [0])
+    line_starts.extend(x.end() for x in LINE_SEPARATOR_PATTERN.finditer(data))
+    return line_starts
+
+
+class _MappedFile:
+    """Memory mapped file with offsets of line starts"""
+
+    def __init__(self, data: Union[bytes, mmap.mmap], line_starts: array):
+        self.data = data
+        self.line_starts = line_starts
+        # memory which is kept by the file in cache
+        self.size = len(data) + line_starts.itemsize * len(line_starts)
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+    def line(self, index: int) -> str:
+        """Returns the line with 0-based index without the separator"""
+        start = self.line_starts[index]
+        if index + 1 < len(self.line_starts):
+            end = self.line_starts[index + 1] - 1
+            if start < end and 0x0D == self.data[end - 1] and 0x0A == self.data[end]:
+                end -= 1
+        else:
+            end = len(self.data)
+        return str(self.data[start:end], encoding="utf8")
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+class LineCache:
+    """Access to lines of text files without keeping the text in memory.
+
+    The lines are the same as after text.replace("\\r\\n", '\\n').replace('\\r', '\\n').split('\\n').
+    Recently used files are kept mapped while the mapped size with indexes is in the budget.
+    Indexes of the files are persisted when the cache path is given.
+    OSError or UnicodeDecodeError is raised for a file which cannot be read as UTF-8 text.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None, budget: int = 1 << 28, max_files: int = 256):
+        self.cache_path = cache_path
+        self.budget = budget
+        self.max_files = max_files
+        self._files: OrderedDict[str, _MappedFile] = OrderedDict()
+        self._size = 0
+        # absolute path: size, mtime_ns, typecode of offsets, offsets bytes
+        self._indexes: Dict[str, Tuple[int, int, str, bytes]] = {}
+        self.changed = False
+        self._load()
+
+    def _load(self) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                schema, indexes = pickle.load(f)
+        except Exception:
+            # no indexes or they are broken - will be rebuilt
+            return
+        if schema == _schema_checksum():
+            self._indexes = indexes
+
+    def _open(self, file_path: str) -> _MappedFile:
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # empty file cannot be mapped
+                data = b''
+        try:
+            key = os.path.abspath(file_path)
+            index = self._indexes.get(key)
+            if index is not None and stat.st_size == index[0] and stat.st_mtime_ns == index[1]:
+                line_starts = array(index[2])
+                line_starts.frombytes(index[3])
+            else:
+                line_starts = build_line_index(data)
+                if self.cache_path is not None:
+                    self._indexes[key] = (stat.st_size, stat.st_mtime_ns, line_starts.typecode, line_starts.tobytes())
+                    self.changed = True
+        except Exception:
+            if isinstance(data, mmap.mmap):
+                data.close()
+            raise
+        return _MappedFile(data, line_starts)
+
+    def _get(self, file_path: str) -> _MappedFile:
+        if (mapped_file := self._files.get(file_path)) is not None:
+            self._files.move_to_end(file_path)
+            return mapped_file
+        mapped_file = self._open(file_path)
+        self._files[file_path] = mapped_file
+        self._size += mapped_file.size
+        # the last file is kept even it is over the budget
+        while 1 < len(self._files) and (self.budget < self._size or self.max_files < len(self._files)):
+            _, evicted = self._files.popitem(last=False)
+            self._size -= evicted.size
+            evicted.close()
+        return mapped_file
+
+    def lines_number(self, file_path: str) -> int:
+        return len(self._get(file_path))
+
+    def get_line(self, file_path: str, line_num: int) -> str:
+        """Returns lines[line_num - 1]"""
+        mapped_file = self._get(file_path)
+        index = line_num - 1
+        if not -len(mapped_file) <= index < len(mapped_file):
+            raise IndexError("list index out of range")
+        return mapped_file.line(index % len(mapped_file))
+
+    def get_lines(self, file_path: str, line_start: int, line_end: int) -> List[str]:
+        """Returns lines[line_start - 1:line_end]"""
+        mapped_file = self._get(file_path)
+        return [mapped_file.line(x) for x in range(len(mapped_file))[line_start - 1:line_end]]
+
+    def save(self) -> None:
+        if self.cache_path is None or not self.changed:
+            return
+        os.makedirs(self.cache_path.parent, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((_schema_checksum(), self._indexes), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+            self.changed = False
+        except OSError as exc:
+            # read-only location is not a reason to fail
+            print(f"WARNING: cannot save {self.cache_path}: {exc}", flush=True)
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def close(self) -> None:
+        for mapped_file in self._files.values():
+            mapped_file.close()
+        self._files.clear()
+        self._size = 0
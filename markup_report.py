@@ -5,21 +5,20 @@ The script performs updating CredSweeper report with according markup
 currently the row from meta is placed to "ml_validation" to keep the value at the position
 """
 
-import json
 import os
 import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+from json_stream import JsonStream, JsonArrayWriter
 from meta_cred import MetaCred
-from meta_row import MetaRow, _get_source_gen
+from meta_row import MetaRow, read_meta
 
 
 def prepare_meta(meta_dir: Path) -> Dict[Tuple[str, int, int, int, int], List[MetaRow]]:
     meta_dict: Dict[Tuple[str, int, int, int, int], List[MetaRow]] = {}
 
-    for row in _get_source_gen(meta_dir):
-        meta_row = MetaRow(row)
+    for meta_row in read_meta(meta_dir):
         markup_key = (meta_row.FilePath, meta_row.LineStart, meta_row.LineEnd, meta_row.ValueStart, meta_row.ValueEnd)
         if meta_list := meta_dict.get(markup_key):
             meta_list.append(meta_row)
@@ -33,35 +32,39 @@ def prepare_meta(meta_dir: Path) -> Dict[Tuple[str, int, int, int, int], List[Me
 def markup(report_file: Path, meta_dir: Path):
     errors = 0
 
-    with open(report_file) as f:
-        creds = json.load(f)
-
     meta_dict = prepare_meta(meta_dir)
 
-    for cred in creds:
-        meta_cred = MetaCred(cred)
-        key_variants = [
-            # exactly match
-            (meta_cred.path, meta_cred.line_start, meta_cred.line_end, meta_cred.value_start, meta_cred.value_end),
-            # meta markup only with start position
-            (meta_cred.path, meta_cred.line_start, meta_cred.line_end, meta_cred.value_start, -1),
-            # markup for whole line
-            (meta_cred.path, meta_cred.line_start, meta_cred.line_end, -1, -1)
-        ]
-        for key in key_variants:
-            if rows := meta_dict.get(key):
-                # to easy review true/false/template
-                cred["severity"] = ';'.join(x.GroundTruth for x in rows)
-                # full info will be placed above "line_data_list"
-                cred["confidence"] = ';'.join(str(x) for x in rows)
-                break
-        else:
-            cred["confidence"] = "not found in meta"
-            # something was wrong
-            errors += 1
-
-    with open(report_file, mode='w') as f:
-        json.dump(creds, f, indent=4)
+    # the report is rewritten item by item in the same format
+    tmp_file = report_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(report_file) as f_in, open(tmp_file, mode='w') as f_out, JsonArrayWriter(f_out) as writer:
+            for cred in JsonStream(f_in).iter_array():
+                meta_cred = MetaCred(cred)
+                key_variants = [
+                    # exactly match
+                    (meta_cred.path, meta_cred.line_start, meta_cred.line_end, meta_cred.value_start,
+                     meta_cred.value_end),
+                    # meta markup only with start position
+                    (meta_cred.path, meta_cred.line_start, meta_cred.line_end, meta_cred.value_start, -1),
+                    # markup for whole line
+                    (meta_cred.path, meta_cred.line_start, meta_cred.line_end, -1, -1)
+                ]
+                for key in key_variants:
+                    if rows := meta_dict.get(key):
+                        # to easy review true/false/template
+                        cred["severity"] = ';'.join(x.GroundTruth for x in rows)
+                        # full info will be placed above "line_data_list"
+                        cred["confidence"] = ';'.join(str(x) for x in rows)
+                        break
+                else:
+                    cred["confidence"] = "not found in meta"
+                    # something was wrong
+                    errors += 1
+                writer.write(cred)
+        os.replace(tmp_file, report_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
 
     return errors
 
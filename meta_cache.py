@@ -0,0 +1,166 @@
+import dataclasses
+import hashlib
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Any, FrozenSet, BinaryIO
+
+from constants import CACHE_DIR
+
+# footer is the offset of pickled index in the cache file
+_FOOTER = struct.Struct("<Q")
+
+
+@dataclasses.dataclass(frozen=True)
+class MetaSummary:
+    """Values which are present in a markup file. Used to skip files which cannot match a query"""
+    repos: FrozenSet[str]
+    labels: FrozenSet[str]
+    categories: FrozenSet[str]
+    rules: FrozenSet[str]
+    # sorted unique paths of the files
+    paths: tuple
+    line_min: int
+    line_max: int
+
+
+@dataclasses.dataclass
+class MetaCacheEntry:
+    """Stat of a markup file and position of its pickled rows in the cache file"""
+    size: int
+    mtime_ns: int
+    md5: bytes
+    offset: int
+    length: int
+    summary: Optional[MetaSummary] = None
+
+
+class MetaCache:
+    """Persistent storage of parsed and validated markup rows per meta/*.csv file
+
+    The cache file consists of pickled blobs with rows of each markup file and the index in the end.
+    A blob is valid while size and modification time of the markup file are the same.
+    When only the modification time differs, e.g. after a fresh checkout, md5 of the file is compared.
+    Only the index is read at start. Blobs are read on demand, so a query touches only required files.
+    """
+
+    def __init__(self, meta_dir: Path, schema: str):
+        self.meta_dir = meta_dir
+        self.schema = schema
+        self.cache_path = meta_dir.absolute().parent / CACHE_DIR / f"{meta_dir.absolute().name}.pickle"
+        self.index: Dict[str, MetaCacheEntry] = {}
+        # new blobs and blobs which were read from the cache file
+        self.blobs: Dict[str, bytes] = {}
+        self.changed = False
+        # opened cache file keeps the data even when another process replaces it
+        self._cache_file: Optional[BinaryIO] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            cache_file = open(self.cache_path, "rb")
+        except OSError:
+            # no cache - will be created
+            return
+        try:
+            file_size = cache_file.seek(0, os.SEEK_END)
+            cache_file.seek(file_size - _FOOTER.size)
+            index_offset, = _FOOTER.unpack(cache_file.read(_FOOTER.size))
+            cache_file.seek(index_offset)
+            schema, meta_dir, index = pickle.loads(cache_file.read(file_size - _FOOTER.size - index_offset))
+        except Exception:
+            # the cache is broken - will be rebuilt
+            cache_file.close()
+            return
+        if schema != self.schema or meta_dir != str(self.meta_dir.absolute()):
+            cache_file.close()
+            return
+        self.index.update(index)
+        self._cache_file = cache_file
+
+    def _blob(self, name: str) -> bytes:
+        if (blob := self.blobs.get(name)) is None:
+            entry = self.index[name]
+            self._cache_file.seek(entry.offset)
+            blob = self.blobs[name] = self._cache_file.read(entry.length)
+        return blob
+
+    def contains(self, name: str, stat: os.stat_result) -> bool:
+        """Checks whether the markup file is unchanged since it was cached"""
+        entry = self.index.get(name)
+        if entry is None or entry.size != stat.st_size:
+            return False
+        if entry.mtime_ns == stat.st_mtime_ns:
+            return True
+        try:
+            md5 = hashlib.md5((self.meta_dir / name).read_bytes()).digest()
+        except OSError:
+            return False
+        if md5 != entry.md5:
+            return False
+        # the same content is not checked again
+        entry.mtime_ns = stat.st_mtime_ns
+        self.changed = True
+        return True
+
+    def get(self, name: str, stat: os.stat_result) -> Optional[List[Any]]:
+        """Returns cached rows for the markup file or None when the file was changed"""
+        if not self.contains(name, stat):
+            return None
+        return pickle.loads(self._blob(name))
+
+    def summary(self, name: str, stat: os.stat_result) -> Optional[MetaSummary]:
+        """Returns summary of the markup file without reading of the rows"""
+        if not self.contains(name, stat):
+            return None
+        return self.index[name].summary
+
+    def put(self,
+            name: str,
+            stat: os.stat_result,
+            md5: bytes,
+            rows: List[Any],
+            summary: Optional[MetaSummary] = None) -> None:
+        blob = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+        self.index[name] = MetaCacheEntry(stat.st_size, stat.st_mtime_ns, md5, 0, len(blob), summary)
+        self.blobs[name] = blob
+        self.changed = True
+
+    def retain(self, names: set) -> None:
+        """Drops entries of removed markup files"""
+        for name in set(self.index.keys()) - names:
+            del self.index[name]
+            self.blobs.pop(name, None)
+            self.changed = True
+
+    def close(self) -> None:
+        if self._cache_file is not None:
+            self._cache_file.close()
+            self._cache_file = None
+
+    def save(self) -> None:
+        if not self.changed:
+            self.close()
+            return
+        os.makedirs(self.cache_path.parent, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            blobs = [self._blob(name) for name in self.index.keys()]
+            self.close()
+            with open(tmp_path, "wb") as f:
+                offset = 0
+                for entry, blob in zip(self.index.values(), blobs):
+                    entry.offset = offset
+                    f.write(blob)
+                    offset += len(blob)
+                f.write(pickle.dumps((self.schema, str(self.meta_dir.absolute()), self.index),
+                                     protocol=pickle.HIGHEST_PROTOCOL))
+                f.write(_FOOTER.pack(offset))
+            os.replace(tmp_path, self.cache_path)
+            self.changed = False
+        except OSError as exc:
+            # read-only location is not a reason to fail
+            print(f"WARNING: cannot save {self.cache_path}: {exc}", flush=True)
+            if tmp_path.exists():
+                tmp_path.unlink()
@@ -0,0 +1,85 @@
+import bisect
+from typing import Dict, List, Iterable, Optional
+
+from meta_row import MetaRow
+
+
+class _FileIntervals:
+    """Markup rows of a file sorted by LineStart with a segment tree of maximal LineEnd.
+
+    A query takes rows started not later than the end of the range and descends only into subtrees which reach
+    the start of the range, so a long block does not make the lookup linear. The tree is rebuilt after additions.
+    """
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.rows: List[MetaRow] = []
+        # leaves are LineEnd of sorted rows from position size, the node n is maximum of nodes 2n and 2n+1
+        self.max_ends: List[int] = []
+        self.size = 0
+        self.built = True
+
+    def add(self, meta_row: MetaRow) -> None:
+        self.rows.append(meta_row)
+        self.built = False
+
+    def _build(self) -> None:
+        # stable sort keeps the order of rows with the same LineStart
+        self.rows.sort(key=lambda x: x.LineStart)
+        self.starts = [x.LineStart for x in self.rows]
+        self.size = 1
+        while self.size < len(self.rows):
+            self.size <<= 1
+        self.max_ends = [-1] * (2 * self.size)
+        self.max_ends[self.size:self.size + len(self.rows)] = [x.LineEnd for x in self.rows]
+        for node in range(self.size - 1, 0, -1):
+            self.max_ends[node] = max(self.max_ends[2 * node], self.max_ends[2 * node + 1])
+        self.built = True
+
+    def _collect(self, node: int, low: int, high: int, line_start: int, right: int, result: List[MetaRow]) -> None:
+        """Appends rows of positions [low, high) before right which end not earlier than line_start"""
+        if right <= low or self.max_ends[node] < line_start:
+            return
+        if 1 == high - low:
+            result.append(self.rows[low])
+            return
+        middle = (low + high) // 2
+        self._collect(2 * node, low, middle, line_start, right, result)
+        self._collect(2 * node + 1, middle, high, line_start, right, result)
+
+    def overlap(self, line_start: int, line_end: int) -> List[MetaRow]:
+        if not self.built:
+            self._build()
+        result: List[MetaRow] = []
+        right = bisect.bisect_right(self.starts, line_end)
+        self._collect(1, 0, self.size, line_start, right, result)
+        return result
+
+
+class MetaIntervalIndex:
+    """Per-file index of markup line ranges [LineStart, LineEnd] to find rows which overlap or contain given lines"""
+
+    def __init__(self, meta_rows: Iterable[MetaRow] = ()):
+        self._files: Dict[str, _FileIntervals] = {}
+        for meta_row in meta_rows:
+            self.add(meta_row)
+
+    def add(self, meta_row: MetaRow) -> None:
+        if (file_intervals := self._files.get(meta_row.FilePath)) is None:
+            file_intervals = self._files[meta_row.FilePath] = _FileIntervals()
+        file_intervals.add(meta_row)
+
+    def overlap(self, file_path: str, line_start: int, line_end: Optional[int] = None) -> List[MetaRow]:
+        """Rows which have at least one common line with the range"""
+        if line_end is None:
+            line_end = line_start
+        if file_intervals := self._files.get(file_path):
+            return file_intervals.overlap(line_start, line_end)
+        return []
+
+    def contain(self, file_path: str, line_start: int, line_end: Optional[int] = None) -> List[MetaRow]:
+        """Rows which include all lines of the range"""
+        if line_end is None:
+            line_end = line_start
+        return [x for x in self.overlap(file_path, line_start, line_end)
+                if x.LineStart <= line_start and line_end <= x.LineEnd]
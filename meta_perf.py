@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+The script measures speed of markup loading in rows per second
+"""
+
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, List
+
+import tabulate
+
+from meta_query import query_meta, MetaQuery
+from meta_row import read_meta, MetaRow, _get_source_gen, _meta_rows_gen
+
+
+def _dict_reader_load(meta_path: Path) -> List[MetaRow]:
+    # the approach before MetaRowFactory
+    return [MetaRow(row) for row in _get_source_gen(meta_path)]
+
+
+def _factory_load(meta_path: Path) -> List[MetaRow]:
+    return list(_meta_rows_gen(meta_path))
+
+
+def _cache_load(meta_path: Path) -> List[MetaRow]:
+    return read_meta(meta_path)
+
+
+def _query_load(meta_path: Path) -> List[MetaRow]:
+    # single repo markup - other files are skipped with summary in the cache
+    return list(query_meta(meta_path, MetaQuery(repos=[min(x.stem for x in meta_path.glob("*.csv"))])))
+
+
+def measure(loader: Callable[[Path], List[MetaRow]], meta_path: Path, repeat: int) -> List[float]:
+    durations = []
+    rows_number = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        rows_number = len(loader(meta_path))
+        durations.append(time.perf_counter() - start_time)
+    best = min(durations)
+    return [rows_number, round(best, 6), round(rows_number / best) if best else None]
+
+
+def main(argv) -> int:
+    parser = ArgumentParser(prog="python meta_perf.py",
+                            description="Microbenchmark of markup loading")
+    parser.add_argument("meta_dir", help="Markup location", nargs='?', default="meta")
+    parser.add_argument("--repeat", help="Number of measurements, the best is shown", type=int, default=3)
+    _args = parser.parse_args(argv[1:])
+    meta_path = Path(_args.meta_dir)
+    # warm up the cache and OS buffers
+    read_meta(meta_path)
+    rows = []
+    for name, loader in [("DictReader+MetaRow", _dict_reader_load),
+                         ("csv.reader+MetaRowFactory", _factory_load),
+                         ("read_meta (cached)", _cache_load),
+                         ("query_meta (one repo)", _query_load)]:
+        rows.append([name] + measure(loader, meta_path, max(1, _args.repeat)))
+    print(tabulate.tabulate(rows, ["Loader", "Rows", "Seconds", "Rows/s"]), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,94 @@
+import bisect
+from pathlib import Path
+from typing import Optional, Iterable, Tuple, Generator, Union
+
+from constants import ALLOWED_LABELS
+from meta_cache import MetaSummary
+from meta_row import MetaRow, MetaRowFactory, _meta_values_from_dir_cached, _meta_rows_gen
+
+
+class MetaQuery:
+    """Predicates for markup rows. None means no filter, a row must match all given predicates"""
+
+    def __init__(self,
+                 repos: Optional[Iterable[str]] = None,
+                 labels: Optional[Iterable[str]] = None,
+                 categories: Optional[Iterable[str]] = None,
+                 rules: Optional[Iterable[str]] = None,
+                 path_prefixes: Optional[Iterable[str]] = None,
+                 line_range: Optional[Tuple[int, int]] = None):
+        self.repos = None if repos is None else frozenset(repos)
+        self.labels = None if labels is None else frozenset(labels)
+        if self.labels is not None and not self.labels.issubset(ALLOWED_LABELS):
+            raise ValueError(f"ERROR: GroundTruth must be in {ALLOWED_LABELS}")
+        # exactly the same Category
+        self.categories = None if categories is None else frozenset(categories)
+        # any of the rules is mentioned in Category
+        self.rules = None if rules is None else frozenset(rules)
+        # FilePath starts with any of the prefixes
+        self.path_prefixes = None if path_prefixes is None else tuple(path_prefixes)
+        if line_range is not None and line_range[0] > line_range[1]:
+            raise ValueError(f"ERROR: wrong line range {line_range}")
+        # inclusive range of lines which a row overlaps
+        self.line_range = line_range
+
+    def match_summary(self, summary: MetaSummary) -> bool:
+        """Returns False when none of rows of a markup file may match"""
+        if self.repos is not None and self.repos.isdisjoint(summary.repos):
+            return False
+        if self.labels is not None and self.labels.isdisjoint(summary.labels):
+            return False
+        if self.categories is not None and self.categories.isdisjoint(summary.categories):
+            return False
+        if self.rules is not None and self.rules.isdisjoint(summary.rules):
+            return False
+        if self.path_prefixes is not None:
+            for path_prefix in self.path_prefixes:
+                # paths are sorted, so the first path which is not less than the prefix is enough to check
+                n = bisect.bisect_left(summary.paths, path_prefix)
+                if n < len(summary.paths) and summary.paths[n].startswith(path_prefix):
+                    break
+            else:
+                return False
+        if self.line_range is not None \
+                and (self.line_range[1] < summary.line_min or summary.line_max < self.line_range[0]):
+            return False
+        return True
+
+    def match(self, meta_row: MetaRow) -> bool:
+        if self.repos is not None and meta_row.RepoName not in self.repos:
+            return False
+        if self.labels is not None and meta_row.GroundTruth not in self.labels:
+            return False
+        if self.categories is not None and meta_row.Category not in self.categories:
+            return False
+        if self.rules is not None and self.rules.isdisjoint(meta_row.rules):
+            return False
+        if self.path_prefixes is not None and not meta_row.FilePath.startswith(self.path_prefixes):
+            return False
+        if self.line_range is not None \
+                and (self.line_range[1] < meta_row.LineStart or meta_row.LineEnd < self.line_range[0]):
+            return False
+        return True
+
+
+def query_meta(meta_dir: Union[str, Path],
+               query: Optional[MetaQuery] = None,
+               jobs: int = 1) -> Generator[MetaRow, None, None]:
+    """Yields rows matched the query in the same order as read_meta does.
+
+    Rows of a directory are taken from persistent cache where summary of each markup file is kept,
+    so files which cannot match are skipped without reading. Duplicate Ids are not checked - use read_meta for that.
+    """
+    if query is None:
+        query = MetaQuery()
+    meta_path = Path(meta_dir)
+    if meta_path.is_dir():
+        for values in _meta_values_from_dir_cached(meta_path, jobs, query.match_summary):
+            for meta_row in map(MetaRowFactory.from_values, values):
+                if query.match(meta_row):
+                    yield meta_row
+    else:
+        for meta_row in _meta_rows_gen(meta_path):
+            if query.match(meta_row):
+                yield meta_row
@@ -1,11 +1,17 @@
 import csv
 import dataclasses
+import functools
+import hashlib
+import io
+import operator
 import os
 import sys
 from pathlib import Path
-from typing import Union, List, Generator, Any
+from multiprocessing import Pool
+from typing import Union, List, Generator, Any, Iterable, Callable, Iterator, Tuple, FrozenSet, Optional
 
 from constants import ALLOWED_LABELS, OTHER_CATEGORY
+from meta_cache import MetaCache, MetaSummary
 
 
 def _get_annotations(cls) -> dict[str, Any]:
@@ -16,10 +22,19 @@ def _get_annotations(cls) -> dict[str, Any]:
     return cls.__annotations__
 
 
+@functools.cache
+def rule_set(category: str) -> FrozenSet[str]:
+    """Returns rules of Category. The same object is shared by all rows with the category"""
+    return frozenset(category.split(':'))
+
+
 # dataclass is required for csv writer
 @dataclasses.dataclass
 class MetaRow:
-    """Class represented meta markup row structure"""
+    """Class represented meta markup row structure.
+
+    Attribute 'rules' is not a field of the markup - it is the set of rules from Category for fast membership checks
+    """
 
     Id: int
     FileID: str
@@ -59,6 +74,11 @@ class MetaRow:
                 else:
                     raise ValueError(f"ERROR: Unsupported {typ}")
                 self.__setattr__(key, val)
+        self._check(row)
+        self.rules = rule_set(self.Category)
+
+    def _check(self, row: Any) -> None:
+        """Validates values of the markup. The row is used only for error message"""
         if not hasattr(self, "Category") or not self.Category:
             raise ValueError(f"ERROR: Category must be set {row}")
         if ':' in self.Category:
@@ -79,7 +99,7 @@ class MetaRow:
             raise ValueError(f"ERROR: ValueStart must be lower than ValueEnd for single line {row}")
 
     def __str__(self) -> str:
-        dict_values = self.__dict__.values()
+        dict_values = (self.__dict__[x.name] for x in dataclasses.fields(self))
         _str = ','.join(str(x) for x in dict_values)
         return _str
 
@@ -87,6 +107,65 @@ class MetaRow:
         return str(self)
 
 
+class MetaRowFactory:
+    """Builds MetaRow from csv.reader rows. Column schema is resolved once for the header of a file"""
+
+    FIELDS = tuple(x.name for x in dataclasses.fields(MetaRow))
+
+    def __init__(self, header: List[str]):
+        if sorted(header) != sorted(self.FIELDS):
+            raise ValueError(f"ERROR: wrong header {header}")
+        # takes MetaRow fields from csv row in the order
+        self.positions = tuple(header.index(x) for x in self.FIELDS)
+        self.getter = operator.itemgetter(*self.positions)
+        self.int_positions = []
+        for n, field in enumerate(dataclasses.fields(MetaRow)):
+            if field.type is int:
+                self.int_positions.append(n)
+            elif field.type is not str:
+                raise ValueError(f"ERROR: Unsupported {field.type}")
+
+    def __call__(self, values: List[str]) -> MetaRow:
+        if len(self.positions) != len(values):
+            raise ValueError(f"ERROR: wrong row {values}")
+        row_values = list(self.getter(values))
+        for n in self.int_positions:
+            row_values[n] = int(row_values[n]) if row_values[n] else -1
+        meta_row = object.__new__(MetaRow)
+        meta_row.__dict__.update(zip(self.FIELDS, row_values))
+        meta_row._check(values)
+        meta_row.rules = rule_set(meta_row.Category)
+        return meta_row
+
+    @staticmethod
+    def from_values(values: Union[List[Any], tuple]) -> MetaRow:
+        """Creates MetaRow from converted values in fields order without validation"""
+        meta_row = object.__new__(MetaRow)
+        meta_row.__dict__.update(zip(MetaRowFactory.FIELDS, values))
+        meta_row.rules = rule_set(meta_row.Category)
+        return meta_row
+
+    @staticmethod
+    def to_values(meta_row: MetaRow) -> tuple:
+        return tuple(meta_row.__dict__[x] for x in MetaRowFactory.FIELDS)
+
+
+def _meta_rows_from_lines(meta_path: Path, lines: Iterable[str]) -> Generator[MetaRow, None, None]:
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    meta_row_factory = MetaRowFactory(header)
+    for values in reader:
+        if not values:
+            # DictReader skips empty lines too
+            continue
+        try:
+            yield meta_row_factory(values)
+        except ValueError as exc:
+            raise ValueError(f"{exc} in {meta_path}") from exc
+
+
 def _meta_from_file(meta_path: Path) -> Generator[dict, None, None]:
     if ".csv" != meta_path.suffix:
         # *.csv.orig artifacts after git merge
@@ -100,16 +179,34 @@ def _meta_from_file(meta_path: Path) -> Generator[dict, None, None]:
             yield row
 
 
-def _meta_from_dir(meta_path: Path) -> Generator[dict, None, None]:
+def _meta_dir_files(meta_path: Path) -> List[Path]:
+    """Returns files of the flat meta dir in os.walk order"""
     for root, dirs, files in os.walk(meta_path):
         root_path = Path(root)
-        for file in files:
-            yield from _meta_from_file(root_path / file)
-        # meta dir is flat
-        break
+        return [root_path / file for file in files]
+    return []
+
+
+def _map_files(func: Callable[[Path], Any], file_paths: List[Path], jobs: int) -> Iterator[Any]:
+    """Applies the function to the files in a process pool. Results are in the order of files"""
+    if 1 < jobs and 1 < len(file_paths):
+        jobs = min(jobs, len(file_paths))
+        with Pool(jobs) as pool:
+            yield from pool.imap(func, file_paths, chunksize=max(1, len(file_paths) // (4 * jobs)))
+    else:
+        yield from map(func, file_paths)
+
+
+def _dict_rows_from_file(meta_path: Path) -> List[dict]:
+    return list(_meta_from_file(meta_path))
 
 
-def _get_source_gen(meta_path: Union[Path]) -> Generator[dict, None, None]:
+def _meta_from_dir(meta_path: Path, jobs: int = 1) -> Generator[dict, None, None]:
+    for rows in _map_files(_dict_rows_from_file, _meta_dir_files(meta_path), jobs):
+        yield from rows
+
+
+def _get_source_gen(meta_path: Union[Path], jobs: int = 1) -> Generator[dict, None, None]:
     if not isinstance(meta_path, Path):
         raise ValueError(f"ERROR: unsupported source {meta_path} type {type(meta_path)}")
 
@@ -117,23 +214,133 @@ def _get_source_gen(meta_path: Union[Path]) -> Generator[dict, None, None]:
         raise ValueError(f"ERROR: {meta_path} does not exist")
 
     if meta_path.is_dir():
-        source_gen = _meta_from_dir
+        yield from _meta_from_dir(meta_path, jobs)
     elif meta_path.is_file():
-        source_gen = _meta_from_file
+        yield from _meta_from_file(meta_path)
     else:
         raise ValueError(f"ERROR: unsupported {meta_path} file type")
-    yield from source_gen(meta_path)
 
 
-def read_meta(meta_dir: Union[str, Path]) -> List[MetaRow]:
-    """Returns list of MetaRow read from file or directory. The same approach may be used to obtain a dict."""
+@functools.cache
+def _schema_checksum() -> str:
+    """Cached rows become obsolete when the validation or constants are changed"""
+    checksum = hashlib.md5()
+    for module_name in ("meta_row.py", "constants.py", "meta_cache.py"):
+        checksum.update((Path(__file__).parent / module_name).read_bytes())
+    return checksum.hexdigest()
+
+
+def _meta_rows_from_file(meta_path: Path) -> Generator[MetaRow, None, None]:
+    if ".csv" != meta_path.suffix:
+        # *.csv.orig artifacts after git merge
+        print(f"WARNING: skip {meta_path} file")
+        return
+    with open(meta_path) as f:
+        yield from _meta_rows_from_lines(meta_path, f)
+
+
+def _meta_summary(values: List[tuple]) -> MetaSummary:
+    """Collects values of the rows which are used by queries to skip whole files"""
+    repo_position, path_position, line_start_position, line_end_position, label_position, category_position = \
+        (MetaRowFactory.FIELDS.index(x)
+         for x in ("RepoName", "FilePath", "LineStart", "LineEnd", "GroundTruth", "Category"))
+    categories = frozenset(x[category_position] for x in values)
+    return MetaSummary(repos=frozenset(x[repo_position] for x in values),
+                       labels=frozenset(x[label_position] for x in values),
+                       categories=categories,
+                       rules=frozenset().union(*map(rule_set, categories)),
+                       paths=tuple(sorted(set(x[path_position] for x in values))),
+                       line_min=min((x[line_start_position] for x in values), default=0),
+                       line_max=max((x[line_end_position] for x in values), default=0))
+
+
+def _parse_meta_file(meta_path: Path) -> Tuple[bytes, List[tuple], MetaSummary]:
+    """Returns md5 of the file, values of validated rows and their summary.
+    Plain values are cheap to pass between processes"""
+    data = meta_path.read_bytes()
+    meta_rows = _meta_rows_from_lines(meta_path, io.StringIO(data.decode(), newline=None))
+    values = [MetaRowFactory.to_values(x) for x in meta_rows]
+    return hashlib.md5(data).digest(), values, _meta_summary(values)
+
+
+def _meta_rows_gen(meta_path: Path, jobs: int = 1) -> Generator[MetaRow, None, None]:
+    """The same as _get_source_gen but yields validated MetaRow"""
+    if not meta_path.exists():
+        raise ValueError(f"ERROR: {meta_path} does not exist")
+    if meta_path.is_dir():
+        meta_files = []
+        for file_path in _meta_dir_files(meta_path):
+            if ".csv" != file_path.suffix:
+                # *.csv.orig artifacts after git merge
+                print(f"WARNING: skip {file_path} file")
+                continue
+            meta_files.append(file_path)
+        for _, values, _ in _map_files(_parse_meta_file, meta_files, jobs):
+            yield from map(MetaRowFactory.from_values, values)
+    elif meta_path.is_file():
+        yield from _meta_rows_from_file(meta_path)
+    else:
+        raise ValueError(f"ERROR: unsupported {meta_path} file type")
+
+
+def _meta_values_from_dir_cached(meta_path: Path,
+                                 jobs: int = 1,
+                                 summary_filter: Optional[Callable[[MetaSummary], bool]] = None
+                                 ) -> Generator[List[tuple], None, None]:
+    """Yields values of validated rows for each file of the directory.
+    Only changed files are parsed, others are loaded from cache.
+    Cached files which summary does not pass the filter are skipped without reading of rows."""
+    meta_cache = MetaCache(meta_path, _schema_checksum())
+    try:
+        meta_files = []
+        for file_path in _meta_dir_files(meta_path):
+            if ".csv" != file_path.suffix:
+                # *.csv.orig artifacts after git merge
+                print(f"WARNING: skip {file_path} file")
+                continue
+            meta_files.append((file_path, file_path.stat()))
+        changed_files = [file_path for file_path, stat in meta_files if not meta_cache.contains(file_path.name, stat)]
+        parsed_files = _map_files(_parse_meta_file, changed_files, jobs)
+        for file_path, stat in meta_files:
+            if meta_cache.contains(file_path.name, stat):
+                summary = meta_cache.summary(file_path.name, stat)
+                if summary_filter and summary and not summary_filter(summary):
+                    continue
+                values = meta_cache.get(file_path.name, stat)
+            else:
+                # changed files are parsed in the same order
+                md5, values, summary = next(parsed_files)
+                meta_cache.put(file_path.name, stat, md5, values, summary)
+                if summary_filter and not summary_filter(summary):
+                    continue
+            yield values
+        meta_cache.retain(set(file_path.name for file_path, _ in meta_files))
+        meta_cache.save()
+    finally:
+        meta_cache.close()
+
+
+def _meta_rows_from_dir_cached(meta_path: Path, jobs: int = 1) -> Generator[MetaRow, None, None]:
+    """Yields validated rows of the directory. Only changed files are parsed, others are loaded from cache"""
+    for values in _meta_values_from_dir_cached(meta_path, jobs):
+        yield from map(MetaRowFactory.from_values, values)
+
+
+def read_meta(meta_dir: Union[str, Path], use_cache: bool = True, jobs: int = 1) -> List[MetaRow]:
+    """Returns list of MetaRow read from file or directory. The same approach may be used to obtain a dict.
+    Rows of a directory are stored in persistent cache to skip parsing of unchanged files next time.
+    Files of a directory are parsed in a process pool when jobs > 1. The order of rows is the same."""
     meta = []
     meta_ids = set()
 
-    for row in _get_source_gen(Path(meta_dir)):
-        meta_row = MetaRow(row)
+    meta_path = Path(meta_dir)
+    if use_cache and meta_path.is_dir():
+        meta_rows_gen = _meta_rows_from_dir_cached(meta_path, jobs)
+    else:
+        meta_rows_gen = _meta_rows_gen(meta_path, jobs)
+    for meta_row in meta_rows_gen:
         if meta_row.Id in meta_ids:
-            raise ValueError(f"ERROR: duplicate Id row {row}")
+            raise ValueError(f"ERROR: duplicate Id row {meta_row}")
         meta_ids.add(meta_row.Id)
 
         meta.append(meta_row)
@@ -0,0 +1,241 @@
+import operator
+import os
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Generator, Union
+
+from constants import ALLOWED_LABELS
+from meta_row import MetaRow, MetaRowFactory, read_meta
+
+
+class StringTable:
+    """Interns strings to integer ids"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        if (value_id := self.ids.get(value)) is None:
+            value_id = len(self.values)
+            self.ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+    def get(self, value: str) -> Optional[int]:
+        return self.ids.get(value)
+
+    def __getitem__(self, value_id: int) -> str:
+        return self.values[value_id]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class MetaTable:
+    """Column-oriented markup storage. Integer columns are kept in arrays, strings are interned.
+
+    Filters produce bitmasks (python int) where bit N corresponds to row N,
+    so combination of filters and counting are bulk operations on the masks.
+    """
+
+    # MetaRow field: column attribute
+    INT_COLUMNS = {"Id": "id",
+                   "LineStart": "line_start",
+                   "LineEnd": "line_end",
+                   "ValueStart": "value_start",
+                   "ValueEnd": "value_end"}
+    STR_COLUMNS = {"FileID": "file_id",
+                   "Domain": "domain",
+                   "RepoName": "repo_name",
+                   "FilePath": "file_path",
+                   "CryptographyKey": "cryptography_key",
+                   "PredefinedPattern": "predefined_pattern",
+                   "Category": "category"}
+
+    def __init__(self, meta_rows: Iterable[MetaRow] = ()):
+        self.strings = StringTable()
+        self.id = array('q')
+        self.line_start = array('i')
+        self.line_end = array('i')
+        self.value_start = array('i')
+        self.value_end = array('i')
+        self.ground_truth = bytearray()
+        # interned string columns
+        self.file_id = array('I')
+        self.domain = array('I')
+        self.repo_name = array('I')
+        self.file_path = array('I')
+        self.cryptography_key = array('I')
+        self.predefined_pattern = array('I')
+        self.category = array('I')
+        # lazy bitmasks: column name -> value -> mask
+        self._masks: Optional[Dict[str, Dict[Union[str, int], int]]] = None
+        self.extend(meta_rows)
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def extend(self, meta_rows: Iterable[MetaRow]) -> None:
+        """Appends the rows column by column"""
+        meta_rows = list(meta_rows)
+        start = len(self)
+        for field, column_name in self.INT_COLUMNS.items():
+            getattr(self, column_name).extend(map(operator.attrgetter(field), meta_rows))
+        for field, column_name in self.STR_COLUMNS.items():
+            getattr(self, column_name).extend(map(self.strings.intern, map(operator.attrgetter(field), meta_rows)))
+        self.ground_truth.extend(map(ord, map(operator.attrgetter("GroundTruth"), meta_rows)))
+        if self._masks is not None and meta_rows:
+            # built masks are updated with the added rows only instead of rebuilding for the whole table
+            for column_name, column_masks in self._build_masks(start).items():
+                masks = self._masks[column_name]
+                for value, mask in column_masks.items():
+                    masks[value] = masks.get(value, 0) | mask << start
+
+    def append(self, meta_row: MetaRow) -> None:
+        self.extend([meta_row])
+
+    def row(self, n: int) -> MetaRow:
+        strings = self.strings.values
+        return MetaRowFactory.from_values((self.id[n],
+                                           strings[self.file_id[n]],
+                                           strings[self.domain[n]],
+                                           strings[self.repo_name[n]],
+                                           strings[self.file_path[n]],
+                                           self.line_start[n],
+                                           self.line_end[n],
+                                           chr(self.ground_truth[n]),
+                                           self.value_start[n],
+                                           self.value_end[n],
+                                           strings[self.cryptography_key[n]],
+                                           strings[self.predefined_pattern[n]],
+                                           strings[self.category[n]]))
+
+    def rows(self, mask: Optional[int] = None) -> Generator[MetaRow, None, None]:
+        for n in (range(len(self)) if mask is None else self.indices(mask)):
+            yield self.row(n)
+
+    @staticmethod
+    def indices(mask: int) -> Generator[int, None, None]:
+        """Yields row numbers of set bits in ascending order"""
+        mask_bytes = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        for byte_number, byte in enumerate(mask_bytes):
+            while byte:
+                low_bit = byte & -byte
+                yield (byte_number << 3) + low_bit.bit_length() - 1
+                byte ^= low_bit
+
+    @staticmethod
+    def count(mask: int) -> int:
+        return mask.bit_count()
+
+    @property
+    def all_mask(self) -> int:
+        return (1 << len(self)) - 1
+
+    def _build_masks(self, start: int = 0) -> Dict[str, Dict[Union[str, int], int]]:
+        """Sets bits of rows for each value of indexed columns at once with bytearray bitmaps.
+
+        Only rows from start are indexed and bit 0 of the masks corresponds to row start.
+        """
+        bitmaps: Dict[str, Dict[Union[str, int], bytearray]] = {
+            "label": {}, "category": {}, "repo": {}, "extension": {}}
+        size = (len(self) - start + 7) // 8
+        extensions: Dict[int, str] = {}
+        for column_name, column in (("label", self.ground_truth),
+                                    ("category", self.category),
+                                    ("repo", self.repo_name),
+                                    ("extension", self.file_path)):
+            column_bitmaps = bitmaps[column_name]
+            for n, value in enumerate(column[start:]):
+                if "extension" == column_name:
+                    if (extension := extensions.get(value)) is None:
+                        # get file extension like in CredSweeper
+                        extension = os.path.splitext(self.strings[value])[1].lower()
+                        extensions[value] = extension
+                    value = extension
+                if (bitmap := column_bitmaps.get(value)) is None:
+                    bitmap = column_bitmaps[value] = bytearray(size)
+                bitmap[n >> 3] |= 1 << (n & 7)
+        masks = {column_name: {value: int.from_bytes(bitmap, "little") for value, bitmap in column_bitmaps.items()}
+                 for column_name, column_bitmaps in bitmaps.items()}
+        masks["label"] = {chr(key): value for key, value in masks["label"].items()}
+        masks["category"] = {self.strings[key]: value for key, value in masks["category"].items()}
+        masks["repo"] = {self.strings[key]: value for key, value in masks["repo"].items()}
+        # categories are combined to rules and numbers of rules per row
+        rules_masks: Dict[str, int] = {}
+        rules_number_masks: Dict[int, int] = {}
+        for category, category_mask in masks["category"].items():
+            rules = category.split(':')
+            for rule in rules:
+                rules_masks[rule] = rules_masks.get(rule, 0) | category_mask
+            rules_number_masks[len(rules)] = rules_number_masks.get(len(rules), 0) | category_mask
+        masks["rule"] = rules_masks
+        masks["rules_number"] = rules_number_masks
+        return masks
+
+    def _get_masks(self, column_name: str) -> Dict[Union[str, int], int]:
+        if self._masks is None:
+            self._masks = self._build_masks()
+        return self._masks[column_name]
+
+    def _mask(self, column_name: str, values: Iterable[Union[str, int]]) -> int:
+        column_masks = self._get_masks(column_name)
+        mask = 0
+        for value in values:
+            mask |= column_masks.get(value, 0)
+        return mask
+
+    def label_mask(self, *labels: str) -> int:
+        for label in labels:
+            if label not in ALLOWED_LABELS:
+                raise ValueError(f"ERROR: GroundTruth must be in {ALLOWED_LABELS}")
+        return self._mask("label", labels)
+
+    def category_mask(self, *categories: str) -> int:
+        """Rows with exactly the same Category"""
+        return self._mask("category", categories)
+
+    def rule_mask(self, *rules: str) -> int:
+        """Rows which mention any of the rules in Category"""
+        return self._mask("rule", rules)
+
+    def repo_mask(self, *repos: str) -> int:
+        return self._mask("repo", repos)
+
+    def extension_mask(self, *extensions: str) -> int:
+        return self._mask("extension", (x.lower() for x in extensions))
+
+    @property
+    def rule_names(self) -> List[str]:
+        return list(self._get_masks("rule").keys())
+
+    @property
+    def extension_names(self) -> List[str]:
+        return list(self._get_masks("extension").keys())
+
+    def rules_number_masks(self) -> Dict[int, int]:
+        """Masks of rows grouped by number of rules in Category"""
+        return dict(self._get_masks("rules_number"))
+
+    def select(self,
+               labels: Optional[Iterable[str]] = None,
+               rules: Optional[Iterable[str]] = None,
+               repos: Optional[Iterable[str]] = None,
+               extensions: Optional[Iterable[str]] = None) -> int:
+        """Returns mask of rows which match all given filters. None means no filter"""
+        mask = self.all_mask
+        if labels is not None:
+            mask &= self.label_mask(*labels)
+        if rules is not None:
+            mask &= self.rule_mask(*rules)
+        if repos is not None:
+            mask &= self.repo_mask(*repos)
+        if extensions is not None:
+            mask &= self.extension_mask(*extensions)
+        return mask
+
+
+def read_meta_table(meta_dir: Union[str, Path]) -> MetaTable:
+    """Returns MetaTable read from file or directory"""
+    return MetaTable(read_meta(meta_dir))
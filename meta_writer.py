@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Union
+
+
+class MetaWriter:
+    """Collects changes of markup CSV files and writes each changed file once.
+
+    New rows are appended to the end of a file and categories are added to the end of rows with given Id.
+    A file is rewritten with a temporary file and atomic rename, so it is never seen partially written.
+    """
+
+    def __init__(self, meta_dir: Union[str, Path]):
+        self.meta_dir = Path(meta_dir)
+        # repo name: lines to append
+        self._appended: Dict[str, List[str]] = {}
+        # repo name: Id: categories to add in order of the calls
+        self._amended: Dict[str, Dict[int, List[str]]] = {}
+
+    def append(self, repo_name: str, line: str) -> None:
+        """Appends the line without the line separator to the CSV of the repo"""
+        self._appended.setdefault(repo_name, []).append(line)
+
+    def add_category(self, repo_name: str, row_id: int, category: str) -> None:
+        """Adds the category to the row with the Id: Category -> Category:category"""
+        self._amended.setdefault(repo_name, {}).setdefault(row_id, []).append(category)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self._appended or self._amended)
+
+    def _update(self, repo_name: str) -> None:
+        meta_path = self.meta_dir / f"{repo_name}.csv"
+        text = ""
+        if meta_path.exists():
+            with open(meta_path, "r", encoding="utf8", newline="") as f:
+                text = f.read()
+        text += "".join(f"{x}\n" for x in self._appended.get(repo_name, []))
+        if amendments := self._amended.get(repo_name):
+            # only '\n' separates rows - other line boundaries of str.splitlines may be in values
+            lines = text.split('\n')
+            for n, line in enumerate(lines):
+                row_id, _, _ = line.partition(',')
+                if row_id.isdigit() and (categories := amendments.get(int(row_id))):
+                    line_end = len(line.rstrip('\r'))
+                    lines[n] = line[:line_end] + "".join(f":{x}" for x in categories) + line[line_end:]
+            text = '\n'.join(lines)
+        tmp_path = meta_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf8", newline="") as f:
+                f.write(text)
+            os.replace(tmp_path, meta_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def flush(self) -> None:
+        """Writes all collected changes"""
+        for repo_name in sorted(set(self._appended.keys()) | set(self._amended.keys())):
+            self._update(repo_name)
+        self._appended.clear()
+        self._amended.clear()
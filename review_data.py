@@ -18,9 +18,11 @@ from typing import List, Optional, Tuple, Dict
 
 from colorama import Fore, Back, Style
 
-from constants import LABEL_OTHER, LABEL_FALSE, LABEL_TRUE, OTHER_CATEGORY, MULTI_LINE_RULES
+from constants import LABEL_OTHER, LABEL_FALSE, LABEL_TRUE, OTHER_CATEGORY, MULTI_LINE_RULES, ALLOWED_LABELS
+from line_cache import LineCache, line_cache_path
 from meta_cred import MetaCred
 from meta_row import read_meta, MetaRow
+from meta_table import MetaTable
 
 EXIT_SUCCESS = 0
 EXIT_FAILURE = 1
@@ -34,20 +36,14 @@ def get_excluding_extensions() -> set[str]:
     return set(result["exclude"]["containers"] + result["exclude"]["documents"] + result["exclude"]["extension"])
 
 
-@functools.cache
-def read_cache(path) -> list[str]:
-    with open(path, "r", encoding="utf8") as f:
-        return f.read().replace("\r\n", '\n').replace('\r', '\n').split('\n')
-
-
-def read_data(path, line_start, line_end, value_start, value_end, ground_truth, creds: List[MetaCred]):
-    lines = read_cache(path)
+def read_data(line_cache: LineCache, path, line_start, line_end, value_start, value_end, ground_truth,
+              creds: List[MetaCred]):
     if line_start == line_end:
-        data_line = lines[line_start - 1]
+        data_line = line_cache.get_line(path, line_start)
         multiline_end_offset = 0
     elif line_start < line_end:
-        data_line = '\n'.join(lines[line_start - 1:line_end])
-        multiline_end_offset = len(data_line) - len(lines[line_end - 1])
+        data_line = '\n'.join(line_cache.get_lines(path, line_start, line_end))
+        multiline_end_offset = len(data_line) - len(line_cache.get_line(path, line_end))
     else:
         raise RuntimeError(f"Line start must be less than end. {path},{line_start},{line_end}")
 
@@ -132,7 +128,8 @@ def review(meta_dir: str,
            check_only: bool,
            data_filter: dict,
            load_json: Optional[str] = None,
-           category: Optional[str] = None) -> int:
+           category: Optional[str] = None,
+           jobs: int = 1) -> int:
     errors = 0
     duplicates = 0
     if not os.path.exists(meta_dir):
@@ -144,17 +141,17 @@ def review(meta_dir: str,
         with open(load_json, "r") as f:
             creds.extend([MetaCred(x) for x in json.load(f)])
 
-    meta = read_meta(meta_dir)
-    meta.sort(key=lambda x: (x.FilePath, x.LineStart, x.LineEnd, x.ValueStart, x.ValueEnd))
+    meta = read_meta(meta_dir, jobs=jobs)
+    line_cache = LineCache(line_cache_path(pathlib.Path(data_dir)))
+    meta_table = MetaTable(meta)
+    selected_mask = meta_table.select(labels=[x for x in ALLOWED_LABELS if data_filter[x]],
+                                      rules=[category] if category else None)
+    selected_meta = [meta[x] for x in MetaTable.indices(selected_mask)]
+    selected_meta.sort(key=lambda x: (x.FilePath, x.LineStart, x.LineEnd, x.ValueStart, x.ValueEnd))
     displayed_rows = 0
     shown_whole_line: Dict[Tuple[str, int], MetaRow] = {}
     shown_markup: Dict[Tuple[str, int, int, int, int], MetaRow] = {}
-    for row in meta:
-        if not data_filter[row.GroundTruth]:
-            continue
-        if category and category not in row.Category.split(':'):
-            continue
-
+    for row in selected_meta:
         if pathlib.Path(row.FilePath).suffix in get_excluding_extensions():
             # the file extension will be excluded during default scan
             print(f"File {row.FilePath} is excluded by default config with extension filter!", flush=True)
@@ -164,7 +161,8 @@ def review(meta_dir: str,
         if not check_only:
             print(str(row), flush=True)
             try:
-                read_data(row.FilePath,
+                read_data(line_cache,
+                          row.FilePath,
                           row.LineStart,
                           row.LineEnd,
                           row.ValueStart,
@@ -179,7 +177,7 @@ def review(meta_dir: str,
                 print(f"Missed ValueStart for TRUE markup!\n{row}", flush=True)
                 errors += 1
             if 0 < row.ValueEnd:
-                categories = row.Category.split(':')
+                categories = row.rules
                 min_length = 6
                 if any(x in categories for x in ["Key"]) and 1 == len(categories):
                     min_length = 8
@@ -201,7 +199,7 @@ def review(meta_dir: str,
                 print(f"Too long for Password TRUE markup!\n{row}", flush=True)
                 errors += 1
 
-        if row.LineStart != row.LineEnd and not any(x in row.Category.split(':') for x in MULTI_LINE_RULES):
+        if row.LineStart != row.LineEnd and row.rules.isdisjoint(MULTI_LINE_RULES):
             print(f"Check multiline markup - may be not suitable for the category!\n{row}", flush=True)
             errors += 1
 
@@ -227,6 +225,8 @@ def review(meta_dir: str,
             duplicates += 1
         else:
             shown_markup[markup_key] = row
+    line_cache.save()
+    line_cache.close()
     for row in shown_markup.values():
         if row.LineStart == row.LineEnd and 0 <= row.ValueStart and (row.FilePath, row.LineStart) in shown_whole_line:
             print(f"Duplicate whole line!\n{row}", flush=True)
@@ -249,6 +249,7 @@ def main(argv) -> int:
     parser.add_argument("-X", help="Show X markup", action="store_true")
     parser.add_argument("--load", help="Load json report from CredSweeper", nargs='?')
     parser.add_argument("--category", help="Filter only with the category", nargs='?')
+    parser.add_argument("--jobs", help="Jobs for multiprocessing of markup", type=int, default=1)
     _args = parser.parse_args(argv[1:])
 
     _data_filter = {OTHER_CATEGORY: False}
@@ -260,7 +261,8 @@ def main(argv) -> int:
         _data_filter["T"] = _args.T
         _data_filter["F"] = _args.F
         _data_filter["X"] = _args.X
-    return review(_args.meta_dir, _args.data_dir, bool(_args.check_only), _data_filter, _args.load, _args.category)
+    return review(_args.meta_dir, _args.data_dir, bool(_args.check_only), _data_filter, _args.load, _args.category,
+                  max(1, _args.jobs))
 
 
 if __name__ == """__main__""":
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+from benchmark.common.bootstrap import FIELDS_NUMBER, METRICS, Outcomes, metrics, unit_of
+from meta_table import read_meta_table
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+
+def unpack(value: int, width: int, fields_number: int) -> List[int]:
+    fields = []
+    for _ in range(fields_number):
+        fields.append(value & ((1 << width) - 1))
+        value >>= width
+    return fields
+
+
+class BootstrapTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.meta_dir = Path(self.tmp_dir) / "meta"
+        os.makedirs(self.meta_dir)
+        self.meta_next_id = 1
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_meta(self, repo: str, rows: List[str]) -> None:
+        (self.meta_dir / f"{repo}.csv").write_text(HEADER + "".join(
+            f"{self.meta_next_id + n},1d02852d,GitHub,{repo},data/{repo}/src/1d02852d.py,{n + 1},{n + 1},{x},,,,,{y}\n"
+            for n, (x, y) in enumerate(x.split(',') for x in rows)))
+        self.meta_next_id += len(rows)
+
+    def test_unit_of(self):
+        self.assertEqual("00408ef6", unit_of("data/00408ef6/src/1d02852d.py", "repo"))
+        self.assertEqual("data/00408ef6/src/1d02852d.py", unit_of("data/00408ef6/src/1d02852d.py", "file"))
+        with self.assertRaises(ValueError):
+            Outcomes("line")
+
+    def test_one_unit(self):
+        # every resample of one unit is the unit, so the interval is the point estimate
+        self.write_meta("00408ef6", ["F,Password", "T,Password:Secret", "T,Password", "F,Secret"])
+        outcomes = Outcomes()
+        outcomes.add_markup(read_meta_table(self.meta_dir))
+        for rule, is_true in [("Password", True), ("Password", False), ("Secret", True), ("Token", False)]:
+            outcomes.add("data/00408ef6/src/1d02852d.py", rule, is_true)
+        intervals = outcomes.bootstrap(50, seed=1)
+        expected = {
+            "": metrics(2, 2, 3, 2),
+            "Password": metrics(1, 1, 2, 1),
+            "Secret": metrics(1, 0, 1, 1),
+            "Token": metrics(0, 1, 0, 0),
+        }
+        self.assertSetEqual(set(expected), set(intervals))
+        for group, point in expected.items():
+            for metric, value in zip(METRICS, point):
+                self.assertEqual((value, value), intervals[group][metric], (group, metric))
+
+    def test_pack_max_value(self):
+        # the unit holds the maximal value in every field of the total and of the rule
+        self.write_meta("0a1b2c3d", ["T,Password"] * 3 + ["F,Password"] * 3)
+        self.write_meta("2c3d4e5f", ["F,Password"])
+        outcomes = Outcomes()
+        outcomes.add_markup(read_meta_table(self.meta_dir))
+        for is_true in [True, False] * 3:
+            outcomes.add("data/0a1b2c3d/src/1d02852d.py", "Password", is_true)
+        outcomes.add("data/1b2c3d4e/src/1d02852d.py", "Password", True)
+        packed, width = outcomes._pack()
+        fields_number = FIELDS_NUMBER * (1 + len(outcomes.rules))
+        self.assertEqual(3, len(packed))
+        max_unit = packed[outcomes.units.get("0a1b2c3d")]
+        self.assertListEqual([3] * fields_number, unpack(max_unit, width, fields_number))
+        # a resample of the unit drawn for each unit does not carry to the next field
+        self.assertListEqual([9] * fields_number, unpack(max_unit * len(packed), width, fields_number))
+        self.assertListEqual([4, 3, 3, 4] * 2, unpack(sum(packed), width, fields_number))
+
+    def test_seed(self):
+        for n, repo in enumerate(["0a1b2c3d", "1b2c3d4e", "2c3d4e5f", "3d4e5f6a"]):
+            self.write_meta(repo, ["T,Password"] * (n + 1) + ["F,Secret"] * (4 - n))
+        outcomes = Outcomes()
+        outcomes.add_markup(read_meta_table(self.meta_dir))
+        for n, repo in enumerate(["0a1b2c3d", "1b2c3d4e", "2c3d4e5f", "3d4e5f6a"]):
+            for m in range(4):
+                outcomes.add(f"data/{repo}/src/1d02852d.py", "Password" if m <= n else "Secret", m <= n)
+        intervals = outcomes.bootstrap(200, seed=7)
+        self.assertDictEqual(intervals, outcomes.bootstrap(200, seed=7))
+        low, high = intervals[""]["precision"]
+        self.assertLessEqual(low, high)
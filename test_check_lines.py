@@ -0,0 +1,74 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmark.common import ScannerType
+from benchmark.common.diagnostics import Diagnostics
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner_factory import ScannerFactory
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+# findings of two files in turn with duplicates, lost and unmatched values, and a rule out of the markup
+FINDINGS = [
+    ("data/00408ef6/src/1d02852d.py", 2, 2, 12, 16, "Password"),
+    ("data/0064e882/src/7ce0d401.py", 1, 1, 7, 13, "Token"),
+    ("data/00408ef6/src/1d02852d.py", 2, 2, 12, 16, "Password"),
+    ("data/00408ef6/src/1d02852d.py", 3, 3, -1, -1, "Password"),
+    ("data/0064e882/src/7ce0d401.py", 2, 2, 0, 5, "Secret"),
+    ("data/00408ef6/src/1d02852d.py", 1, 1, 0, 1, "Password"),
+    ("data/0064e882/src/7ce0d401.py", 1, 1, 7, 14, "Token"),
+    ("data/0064e882/src/7ce0d401.py", 3, 3, 1, 5, "Key"),
+    ("data/00408ef6/src/1d02852d.py", 4, 4, 0, 3, "Password"),
+]
+
+
+class CheckLinesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(Path(self.tmp_dir) / "meta")
+        os.makedirs(Path(self.tmp_dir) / "data" / "00408ef6" / "src")
+        os.makedirs(Path(self.tmp_dir) / "data" / "0064e882" / "src")
+        (Path(self.tmp_dir) / "meta" / "00408ef6.csv").write_text(
+            HEADER + "1,1d02852d,GitHub,00408ef6,data/00408ef6/src/1d02852d.py,2,2,T,12,16,,,Password\n"
+            "2,1d02852d,GitHub,00408ef6,data/00408ef6/src/1d02852d.py,3,3,F,,,,,Password\n"
+            "3,1d02852d,GitHub,00408ef6,data/00408ef6/src/1d02852d.py,4,4,T,0,8,,,Password\n")
+        (Path(self.tmp_dir) / "meta" / "0064e882.csv").write_text(
+            HEADER + "4,7ce0d401,GitHub,0064e882,data/0064e882/src/7ce0d401.py,1,1,T,7,13,,,Token\n"
+            "5,7ce0d401,GitHub,0064e882,data/0064e882/src/7ce0d401.py,2,2,F,0,5,,,Password\n")
+        (Path(self.tmp_dir) / "data" / "00408ef6" / "src" / "1d02852d.py").write_text(
+            "x = 1\npassword = 'X3d!'\npassword = 'dummy'\npassword\n")
+        (Path(self.tmp_dir) / "data" / "0064e882" / "src" / "7ce0d401.py").write_text(
+            "token: 'qwerty'\nsecret = '12345'\nkey\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def evaluate(self, name: str, one_by_one: bool) -> tuple:
+        with contextlib.redirect_stdout(io.StringIO()):
+            markup = Markup(self.tmp_dir)
+        scanner = ScannerFactory.create_scanner(ScannerType.CREDSWEEPER, self.tmp_dir, self.tmp_dir, True, False,
+                                                markup)
+        diagnostics_path = str(Path(self.tmp_dir) / f"{name}.jsonl")
+        scanner.diagnostics = Diagnostics(quiet=True, path=diagnostics_path, line_cache=scanner.line_cache)
+        if one_by_one:
+            for finding in FINDINGS:
+                scanner.check_line_from_meta(*finding)
+        else:
+            scanner.check_lines_from_meta(iter(FINDINGS))
+        scanner.diagnostics.close()
+        return (scanner.result_cnt, scanner.lost_cnt, scanner.true_cnt, scanner.false_cnt, scanner.meta_next_id,
+                [(k, v.true_cnt, v.false_cnt) for k, v in scanner.result_dict.items()],
+                Path(diagnostics_path).read_text())
+
+    def test_check_lines_from_meta(self):
+        expected = self.evaluate("one_by_one", True)
+        self.assertTupleEqual((8, 5, 2, 1), expected[:4])
+        self.assertEqual(11, expected[4])
+        self.assertIn("Duplicate?", expected[-1])
+        self.assertTupleEqual(expected, self.evaluate("grouped", False))
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from data_manifest import DataManifest, count_valid_lines
+
+
+class DataManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.tmp_dir) / "data"
+        os.makedirs(self.data_dir / "00408ef6" / "src")
+        self.files = {
+            "00408ef6/src/1d02852d.py": b"password = 'X3d!X3d!'\r\nshort\rtoken = 'qwerty123'\n\n",
+            "00408ef6/src/7ce0d401.BIN": b"\xff\xfe binary data which is not UTF-8",
+            "00408ef6/src/empty.txt": b"",
+        }
+        for name, data in self.files.items():
+            (self.data_dir / name).write_bytes(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_count_valid_lines(self):
+        self.assertEqual(2, count_valid_lines(self.files["00408ef6/src/1d02852d.py"]))
+        self.assertEqual(0, count_valid_lines(self.files["00408ef6/src/7ce0d401.BIN"]))
+        self.assertEqual(0, count_valid_lines(b""))
+        self.assertEqual(1, count_valid_lines(b"  \t1234567 \x1c"))
+        # symbols are counted and unicode whitespaces are stripped like in decoded text
+        self.assertEqual(1, count_valid_lines("\u3000\xa0\u2028123\u20ac567\x85\n123456\u2029\n".encode()))
+        self.assertEqual(0, count_valid_lines("\u20ac\u20ac\u20ac".encode()))
+        self.assertEqual(2, count_valid_lines("\x1d1234\x1e567\r\n\ufeff123456".encode()))
+        self.assertEqual(0, count_valid_lines(b"1234567\n\xc2"))
+
+    def test_count_valid_lines_chunks(self):
+        data = "password = 'X3d!X3d!'\r\n\u20ac\u20ac\u20ac\u20ac\u20ac\u20ac\u20ac\r\n" \
+               "short\rtoken = 'qwerty123'\n\n\u3000 abc \u3000\n".encode() * 3
+        for chunk_size in [1, 2, 5, 23, 1 << 16]:
+            with mock.patch("data_manifest._CHUNK_SIZE", chunk_size):
+                self.assertEqual(9, count_valid_lines(data), chunk_size)
+                self.assertEqual(0, count_valid_lines(data + b"\n\xff" + data), chunk_size)
+
+    def test_scan(self):
+        data_manifest = DataManifest(self.data_dir)
+        entries = {x.extension: x for x in data_manifest.scan()}
+        self.assertSetEqual({".py", ".bin", ".txt"}, set(entries.keys()))
+        self.assertEqual(2, entries[".py"].valid_lines)
+        self.assertEqual(hashlib.md5(self.files["00408ef6/src/7ce0d401.BIN"]).digest(), entries[".bin"].md5)
+        data_manifest.save()
+        self.assertTrue((Path(self.tmp_dir) / ".cache" / "data.manifest.pickle").exists())
+        # unchanged files are not read again
+        data_manifest = DataManifest(self.data_dir)
+        self.assertEqual(3, len(list(data_manifest.scan())))
+        self.assertFalse(data_manifest.changed)
+        # changed and removed files are updated
+        (self.data_dir / "00408ef6/src/empty.txt").write_bytes(b"1234567\n")
+        os.remove(self.data_dir / "00408ef6/src/7ce0d401.BIN")
+        data_manifest = DataManifest(self.data_dir)
+        entries = {x.extension: x for x in data_manifest.scan()}
+        self.assertTrue(data_manifest.changed)
+        self.assertEqual(1, entries[".txt"].valid_lines)
+        self.assertEqual(2, len(data_manifest.entries))
+
+    def test_scan_jobs(self):
+        for n in range(8):
+            (self.data_dir / "00408ef6" / "src" / f"{n}.txt").write_bytes(b"1234567\r\n" * n)
+        expected = list(DataManifest(self.data_dir).scan())
+        self.assertListEqual(expected, list(DataManifest(self.data_dir).scan(jobs=3)))
+        # empty.txt has no valid lines too
+        self.assertListEqual([0] + list(range(8)), sorted(x.valid_lines for x in expected if ".txt" == x.extension))
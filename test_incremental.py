@@ -0,0 +1,129 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List, Optional
+from unittest import mock
+
+from benchmark.scanner.credsweeper import CredSweeper
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner import Scanner
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+# repo: lines of its file and markup of the lines. The last password of a repo is not marked up
+REPOS = {
+    "0a1b2c3d": ("password = 'X3d!'\ntoken = 'qwerty'\npassword = 'unknown'\n", [(1, 'T', 12, 16)]),
+    "1b2c3d4e": ("x = 1\npassword = 'dummy'\npassword = 'Pr0d!'\n", [(2, 'F', 12, 17), (3, 'T', 12, 17)]),
+    "2c3d4e5f": ("password = 'test'\n", [(1, 'F', 12, 16)]),
+}
+
+
+class StubScanner(CredSweeper):
+    """Reports each line with a password in CredSweeper format and counts reported credentials like the adapter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scanned: List[Optional[List[str]]] = []
+
+    def init_scanner(self) -> None:
+        pass
+
+    def _scanner_key(self) -> Optional[str]:
+        return "stub"
+
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        self.scanned.append(repos)
+        self._run_command([sys.executable, "-c", "pass"])
+        data_dir = Path(self.cred_data_dir) / "data"
+        report = []
+        for repo in sorted(os.listdir(data_dir) if repos is None else repos):
+            for file_path in sorted((data_dir / repo).rglob("*.py")):
+                for line_num, line in enumerate(file_path.read_text().splitlines(), start=1):
+                    if line.startswith("password"):
+                        line_data = {"path": str(file_path), "line_num": line_num, "line": line,
+                                     "variable": "password", "variable_start": 0, "variable_end": 8,
+                                     "value": line[12:-1], "value_start": 12, "value_end": len(line) - 1}
+                        report.append({"rule": "Password", "line_data_list": [line_data]})
+        with open(output_path, "w") as f:
+            json.dump(report, f)
+
+
+class IncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(Path(self.tmp_dir) / "meta")
+        for n, (repo, (text, rows)) in enumerate(REPOS.items()):
+            os.makedirs(Path(self.tmp_dir) / "data" / repo / "src")
+            (Path(self.tmp_dir) / "data" / repo / "src" / "1d02852d.py").write_text(text)
+            self.write_meta(repo, rows, 10 * n)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_meta(self, repo: str, rows, first_id: int) -> None:
+        (Path(self.tmp_dir) / "meta" / f"{repo}.csv").write_text(HEADER + "".join(
+            f"{first_id + n},1d02852d,GitHub,{repo},data/{repo}/src/1d02852d.py,{line},{line},{label},{start},{end}"
+            ",,,Password\n" for n, (line, label, start, end) in enumerate(rows, start=1)))
+
+    def create_scanner(self) -> StubScanner:
+        with contextlib.redirect_stdout(io.StringIO()):
+            markup = Markup(self.tmp_dir)
+        scanner = StubScanner(self.tmp_dir, self.tmp_dir, True, False, markup)
+        scanner.output_dir = str(Path(self.tmp_dir) / "output.json")
+        scanner.diagnostics.quiet = True
+        return scanner
+
+    def run_incremental(self, scanner: StubScanner) -> list:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scanner.run_incremental()
+
+    def assert_same_as_full_run(self, scanner: StubScanner, summary_row: list) -> None:
+        full_scanner = self.create_scanner()
+        full_scanner.report_cache = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertListEqual(full_scanner.run_benchmark(False), summary_row)
+        self.assertDictEqual(full_scanner.reported, scanner.reported)
+
+    def test_full_run(self):
+        scanner = self.create_scanner()
+        summary_row = self.run_incremental(scanner)
+        self.assertListEqual([sorted(REPOS)], [sorted(x) for x in scanner.scanned])
+        self.assertDictEqual({"Password": 5}, scanner.reported)
+        self.assertEqual((2, 2), (scanner.true_cnt, scanner.false_cnt))
+        self.assert_same_as_full_run(scanner, summary_row)
+
+    def test_changed_meta(self):
+        self.run_incremental(self.create_scanner())
+        self.write_meta("1b2c3d4e", [(2, 'F', 12, 17), (3, 'F', 12, 17)], 10)
+        scanner = self.create_scanner()
+        with mock.patch.object(Scanner, "_evaluate_repo", autospec=True,
+                               side_effect=Scanner._evaluate_repo) as evaluate_repo:
+            summary_row = self.run_incremental(scanner)
+        self.assertListEqual([], scanner.scanned)
+        self.assertEqual(1, evaluate_repo.call_count)
+        self.assertSetEqual({"data/1b2c3d4e/src/1d02852d.py"}, {x[0] for x in evaluate_repo.call_args[0][1]})
+        self.assertEqual((1, 3), (scanner.true_cnt, scanner.false_cnt))
+        self.assert_same_as_full_run(scanner, summary_row)
+
+    def test_changed_data(self):
+        self.run_incremental(self.create_scanner())
+        data_path = Path(self.tmp_dir) / "data" / "2c3d4e5f" / "src" / "1d02852d.py"
+        data_path.write_text(data_path.read_text() + "password = 'new'\n")
+        scanner = self.create_scanner()
+        with mock.patch.object(Scanner, "_evaluate_repo", autospec=True,
+                               side_effect=Scanner._evaluate_repo) as evaluate_repo:
+            summary_row = self.run_incremental(scanner)
+        self.assertListEqual([["2c3d4e5f"]], scanner.scanned)
+        self.assertEqual(1, evaluate_repo.call_count)
+        self.assertDictEqual({"Password": 6}, scanner.reported)
+        self.assert_same_as_full_run(scanner, summary_row)
+        # throughput is computed for the rescanned repo
+        files_per_second = scanner.performance_row()[5]
+        self.assertAlmostEqual(1.0, files_per_second * scanner.process_stat.wall_time)
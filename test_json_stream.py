@@ -0,0 +1,48 @@
+import io
+import json
+import unittest
+
+from json_stream import JsonStream, JsonArrayWriter, iter_json_lines
+
+ITEMS = [{"rule": "Password", "line_data_list": [{"line": "pw = 'X3d!\\n'", "line_num": 12345678901234}]},
+         [], {}, "text with [brackets], {braces} and \"quotes\"", 3.14, -7, True, False, None, "Ж"]
+
+
+class JsonStreamTest(unittest.TestCase):
+    def test_iter_array(self):
+        text = json.dumps(ITEMS, indent=4)
+        for chunk_size in (1, 2, 3, 7, 1 << 16):
+            self.assertListEqual(ITEMS, list(JsonStream(io.StringIO(text), chunk_size).iter_array()))
+        self.assertListEqual([], list(JsonStream(io.StringIO(" [ ] ")).iter_array()))
+        self.assertListEqual([123456], list(JsonStream(io.StringIO("[123456]"), 2).iter_array()))
+        # trailing data after the array is not read
+        self.assertListEqual([1, 2], list(JsonStream(io.StringIO("[1,2]\nsummary line"), 1).iter_array()))
+        for wrong in ["", "{}", "[1 2]", "[1,", "[tru]"]:
+            with self.assertRaises(json.JSONDecodeError):
+                list(JsonStream(io.StringIO(wrong), 1).iter_array())
+
+    def test_iter_object(self):
+        data = {"version": "1.0", "plugins_used": [{"name": "x"}],
+                "results": {"data/a.py": [{"line_number": 1}, {"line_number": 2}], "data/b.py": []},
+                "generated_at": "now"}
+        json_stream = JsonStream(io.StringIO(json.dumps(data, indent=2)), 5)
+        results = {}
+        for key in json_stream.iter_object():
+            if "results" != key:
+                self.assertEqual(data[key], json_stream.read_value())
+                continue
+            for path in json_stream.iter_object():
+                results[path] = list(json_stream.iter_array())
+        self.assertDictEqual(data["results"], results)
+
+    def test_iter_json_lines(self):
+        text = '{"a": 1}\n\n{"b": [2]}\n'
+        self.assertListEqual([{"a": 1}, {"b": [2]}], list(iter_json_lines(io.StringIO(text))))
+
+    def test_array_writer(self):
+        for items in (ITEMS, [], [{}], [[1, [2]]]):
+            f = io.StringIO()
+            with JsonArrayWriter(f) as writer:
+                for item in items:
+                    writer.write(item)
+            self.assertEqual(json.dumps(items, indent=4), f.getvalue())
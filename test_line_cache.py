@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from line_cache import LineCache, line_cache_path
+
+
+class LineCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.tmp_dir) / "data"
+        os.makedirs(self.data_dir)
+        self.files = {
+            "mixed.txt": "password = 'X3d!'\r\n\r\rtoken\n\r\n\r\r\nЖ = 'qwerty'\r",
+            "plain.py": "first\nsecond\n",
+            "empty.txt": "",
+        }
+        for name, text in self.files.items():
+            (self.data_dir / name).write_bytes(text.encode())
+        (self.data_dir / "binary.bin").write_bytes(b"\xff\xfe\n1234567")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def check_lines(self, line_cache: LineCache):
+        for name, text in self.files.items():
+            path = str(self.data_dir / name)
+            lines = text.replace("\r\n", '\n').replace('\r', '\n').split('\n')
+            self.assertEqual(len(lines), line_cache.lines_number(path))
+            for n in range(-len(lines) + 1, len(lines) + 1):
+                self.assertEqual(lines[n - 1], line_cache.get_line(path, n))
+                for m in range(n, len(lines) + 2):
+                    self.assertListEqual(lines[n - 1:m], line_cache.get_lines(path, n, m))
+            with self.assertRaises(IndexError):
+                line_cache.get_line(path, len(lines) + 1)
+
+    def test_lines(self):
+        line_cache = LineCache(budget=1, max_files=1)
+        self.check_lines(line_cache)
+        with self.assertRaises(UnicodeDecodeError):
+            line_cache.get_line(str(self.data_dir / "binary.bin"), 1)
+        with self.assertRaises(OSError):
+            line_cache.get_line(str(self.data_dir / "not_exists.txt"), 1)
+        line_cache.close()
+
+    def test_persistence(self):
+        cache_path = line_cache_path(self.data_dir)
+        line_cache = LineCache(cache_path)
+        self.check_lines(line_cache)
+        line_cache.save()
+        line_cache.close()
+        self.assertTrue(cache_path.exists())
+        # persisted indexes are used for unchanged files
+        line_cache = LineCache(cache_path)
+        self.check_lines(line_cache)
+        self.assertFalse(line_cache.changed)
+        line_cache.close()
+        # changed file is indexed again
+        self.files["plain.py"] = "first\r\nsecond\rthird"
+        (self.data_dir / "plain.py").write_bytes(self.files["plain.py"].encode())
+        line_cache = LineCache(cache_path)
+        self.check_lines(line_cache)
+        self.assertTrue(line_cache.changed)
+        line_cache.close()
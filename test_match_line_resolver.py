@@ -0,0 +1,152 @@
+import base64
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from benchmark.common import ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.match_line_resolver import MatchLineResolver, find_first
+from benchmark.scanner.scanner_factory import ScannerFactory
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+
+def get_line_num(file_path: str, match: str) -> int:
+    """The search which was used by the adapters before the resolver"""
+    with open(file_path, "r") as f:
+        for line_num, line in enumerate(f.readlines()):
+            if match in line:
+                return line_num + 1
+    return -1
+
+
+class MatchLineResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.files = {
+            "crlf.txt": b"first\r\npassword = 'X3d!'\r\n\r\ntoken = 'qwerty'\r\n",
+            "cr.txt": b"first\rpassword = 'X3d!'\r\rtoken = 'qwerty'\r",
+            "mixed.txt": b"first\r\npassword = 'X3d!'\r\rtoken\n\r\n\r\r\ntoken = 'qwerty'",
+            "no_newline.txt": b"first\npassword = 'X3d!'\ntoken = 'qwerty'",
+            "repeated.txt": b"token = 'qwerty'\nfirst\ntoken = 'qwerty'\n",
+            "empty.txt": b"",
+        }
+        for name, data in self.files.items():
+            (Path(self.tmp_dir) / name).write_bytes(data)
+        self.matches = ["first", "password = 'X3d!'", "'X3d!'", "token", "token = 'qwerty'", "'qwerty'",
+                        "qwerty'\n", "first\npassword", "absent", "\n", ""]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_line_num(self):
+        for name in self.files:
+            file_path = str(Path(self.tmp_dir) / name)
+            resolver = MatchLineResolver(file_path)
+            for match in self.matches:
+                self.assertEqual(get_line_num(file_path, match), resolver.line_num(match), (name, match))
+            # all matches are found together
+            resolver = MatchLineResolver(file_path)
+            for match in self.matches:
+                resolver.add(match)
+            for match in self.matches:
+                self.assertEqual(get_line_num(file_path, match), resolver.line_num(match), (name, match))
+
+    def test_find_first(self):
+        text = "she sells sea shells\nhers ushers his\n"
+        patterns = ["he", "she", "his", "hers", "s", "sea shells\nhers", "ell", "absent", "", "rs u", "\n"]
+        expected = {x: text.find(x) for x in patterns if x and 0 <= text.find(x)}
+        self.assertDictEqual(expected, find_first(text, patterns))
+        self.assertDictEqual({}, find_first(text, []))
+        self.assertDictEqual({}, find_first("", ["he"]))
+        rnd = random.Random(1)
+        for _ in range(200):
+            text = "".join(rnd.choice("ab\n") for _ in range(rnd.randint(0, 40)))
+            patterns = ["".join(rnd.choice("ab\n") for _ in range(rnd.randint(1, 4))) for _ in range(5)]
+            expected = {x: text.find(x) for x in patterns if 0 <= text.find(x)}
+            self.assertDictEqual(expected, find_first(text, patterns), (text, patterns))
+
+    def test_last_line(self):
+        resolver = MatchLineResolver(str(Path(self.tmp_dir) / "no_newline.txt"))
+        self.assertEqual(3, resolver.line_num("'qwerty'"))
+        self.assertEqual(-1, resolver.line_num("'qwerty'\n"))
+        resolver = MatchLineResolver(str(Path(self.tmp_dir) / "crlf.txt"))
+        self.assertEqual(4, resolver.line_num("'qwerty'"))
+        self.assertEqual(4, resolver.line_num("'qwerty'\n"))
+
+    def test_empty(self):
+        resolver = MatchLineResolver(str(Path(self.tmp_dir) / "empty.txt"))
+        self.assertEqual(-1, resolver.line_num("token"))
+        self.assertEqual(-1, resolver.line_num(""))
+
+    def test_memo(self):
+        file_path = Path(self.tmp_dir) / "repeated.txt"
+        resolver = MatchLineResolver(str(file_path))
+        for match in ["token", "first", "'qwerty'", "absent", "token"]:
+            resolver.add(match)
+        self.assertEqual(1, resolver.line_num("token"))
+        # the file is read once for the added matches and the found lines are remembered
+        file_path.write_bytes(b"")
+        self.assertEqual(2, resolver.line_num("first"))
+        self.assertEqual(1, resolver.line_num("'qwerty'"))
+        self.assertEqual(-1, resolver.line_num("absent"))
+        self.assertEqual(1, resolver.line_num("token"))
+        self.assertDictEqual({"token": 1, "first": 2, "'qwerty'": 1, "absent": -1}, resolver._line_nums)
+        # a new match reads the file again
+        self.assertEqual(-1, resolver.line_num("first\n"))
+
+
+class AdapterLineNumTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(Path(self.tmp_dir) / "meta")
+        os.makedirs(Path(self.tmp_dir) / "data" / "00408ef6" / "src")
+        (Path(self.tmp_dir) / "meta" / "00408ef6.csv").write_text(
+            HEADER + "1,1d02852d,GitHub,00408ef6,data/00408ef6/src/1d02852d.py,2,2,T,12,16,,,Password\n")
+        self.files = {"1d02852d.py": "x = 1\npassword = 'X3d!'\ntoken = 'qwerty'\n",
+                      "7ce0d401.py": "token = 'qwerty'\npassword = 'X3d!'\n"}
+        for name, text in self.files.items():
+            (Path(self.tmp_dir) / "data" / "00408ef6" / "src" / name).write_text(text)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.markup = Markup(self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def iter_findings(self, scanner_type: ScannerType, report: str) -> list:
+        scanner = ScannerFactory.create_scanner(scanner_type, self.tmp_dir, self.tmp_dir, True, False, self.markup)
+        scanner.output_dir = str(Path(self.tmp_dir) / "report")
+        Path(scanner.output_dir).write_text(report)
+        with mock.patch.object(MatchLineResolver, "_resolve", autospec=True,
+                               side_effect=MatchLineResolver._resolve) as resolve:
+            findings = list(scanner.iter_findings())
+        # each file is read once
+        self.assertListEqual(sorted(self.files), sorted(Path(x[0][0].file_path).name for x in resolve.call_args_list))
+        return findings
+
+    def test_shhgit(self):
+        rows = [("1d02852d.py", "password = 'X3d!'"), ("7ce0d401.py", "password = 'X3d!', token"),
+                ("1d02852d.py", "token, x = 1"), ("7ce0d401.py", "absent")]
+        report = "Repository name,Signature name,Matching file,Matches\n" + "".join(
+            f'local,password,/00408ef6/src/{x},"{y}"\n' for x, y in rows)
+        self.assertListEqual([("00408ef6/src/1d02852d.py", 2), ("00408ef6/src/7ce0d401.py", 2),
+                              ("00408ef6/src/7ce0d401.py", 1), ("00408ef6/src/1d02852d.py", 3),
+                              ("00408ef6/src/1d02852d.py", 1), ("00408ef6/src/7ce0d401.py", -1)],
+                             [(x[0], x[1]) for x in self.iter_findings(ScannerType.SHHGIT, report)])
+
+    def test_trufflehog(self):
+        data_dir = Path(self.tmp_dir) / "data" / "00408ef6" / "src"
+        lines = [("1d02852d.py", "token"), ("1d02852d.py", "password"), ("7ce0d401.py", "password"),
+                 ("7ce0d401.py", "token = 'qwerty'")]
+        report = "".join(json.dumps({"SourceMetadata": {"Data": {"Filesystem": {"file": str(data_dir / x)}}},
+                                     "Raw": base64.b64encode(y.encode()).decode()}) + "\n" for x, y in lines)
+        self.assertListEqual([("1d02852d.py", 3), ("1d02852d.py", 2), ("7ce0d401.py", 2), ("7ce0d401.py", 1)],
+                             [(Path(x[0]).name, x[1]) for x in self.iter_findings(ScannerType.TRUFFLEHOG, report)])
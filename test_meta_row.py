@@ -0,0 +1,207 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from constants import LABEL_TRUE
+from meta_cache import MetaCache
+from meta_row import read_meta, MetaRowFactory, MetaRow, _get_source_gen, _schema_checksum
+from meta_index import MetaIntervalIndex
+from meta_query import MetaQuery, query_meta
+from meta_table import MetaTable
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd" \
+         ",CryptographyKey,PredefinedPattern,Category\n"
+
+
+class MetaRowTest(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        self.tmp_dir = tempfile.mkdtemp()
+        self.meta_dir = Path(self.tmp_dir) / "meta"
+        os.makedirs(self.meta_dir)
+        with open(self.meta_dir / "00408ef6.csv", "w") as f:
+            f.write(HEADER)
+            f.write("1,1d02852d,GitHub,00408ef6,data/00408ef6/sample/1d02852d.c,475,475,F,,,,,Password\n")
+            f.write("2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,10,22,,,Password:Secret\n")
+        with open(self.meta_dir / "0064e882.csv", "w") as f:
+            f.write(HEADER)
+            f.write("3,7ce0d401,GitHub,0064e882,data/0064e882/key/7ce0d401.pem,1,27,T,0,64,,,PEM Private Key\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read_meta_cache(self):
+        expected = read_meta(self.meta_dir, use_cache=False)
+        self.assertEqual(3, len(expected))
+        self.assertFalse((Path(self.tmp_dir) / ".cache").exists())
+        # the first read creates the cache
+        self.assertListEqual(expected, read_meta(self.meta_dir))
+        self.assertTrue((Path(self.tmp_dir) / ".cache" / "meta.pickle").exists())
+        # the second read uses the cache
+        self.assertListEqual(expected, read_meta(self.meta_dir))
+        # touched file with the same content is not parsed again
+        stat = (self.meta_dir / "0064e882.csv").stat()
+        os.utime(self.meta_dir / "0064e882.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        with mock.patch("meta_row._parse_meta_file", side_effect=AssertionError):
+            self.assertListEqual(expected, read_meta(self.meta_dir))
+        meta_cache = MetaCache(self.meta_dir, _schema_checksum())
+        self.assertEqual(stat.st_mtime_ns + 10 ** 9, meta_cache.index["0064e882.csv"].mtime_ns)
+        meta_cache.close()
+        # the same size with other content is parsed again
+        text = (self.meta_dir / "0064e882.csv").read_text()
+        (self.meta_dir / "0064e882.csv").write_text(text.replace(",T,0,64,", ",F,0,64,"))
+        os.utime(self.meta_dir / "0064e882.csv", ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+        self.assertEqual("F", read_meta(self.meta_dir)[2].GroundTruth)
+        (self.meta_dir / "0064e882.csv").write_text(text)
+        # changed file is parsed again
+        with open(self.meta_dir / "0064e882.csv", "a") as f:
+            f.write("4,7ce0d401,GitHub,0064e882,data/0064e882/key/7ce0d401.pem,30,30,F,,,,,Key\n")
+        meta = read_meta(self.meta_dir)
+        self.assertEqual(4, len(meta))
+        self.assertListEqual(read_meta(self.meta_dir, use_cache=False), meta)
+        # removed file is dropped from the cache
+        os.remove(self.meta_dir / "00408ef6.csv")
+        self.assertListEqual([3, 4], [x.Id for x in read_meta(self.meta_dir)])
+
+    def test_read_meta_duplicate_id(self):
+        read_meta(self.meta_dir)
+        with open(self.meta_dir / "0064e882.csv", "a") as f:
+            f.write("1,7ce0d401,GitHub,0064e882,data/0064e882/key/7ce0d401.pem,30,30,F,,,,,Key\n")
+        with self.assertRaises(ValueError):
+            read_meta(self.meta_dir)
+
+    def test_read_meta_jobs(self):
+        expected = read_meta(self.meta_dir, use_cache=False)
+        self.assertListEqual(expected, read_meta(self.meta_dir, use_cache=False, jobs=2))
+        self.assertListEqual(expected, read_meta(self.meta_dir, jobs=2))
+        self.assertListEqual(expected, read_meta(self.meta_dir, jobs=2))
+        self.assertListEqual(list(_get_source_gen(self.meta_dir)), list(_get_source_gen(self.meta_dir, jobs=2)))
+        # duplicates are detected between files parsed in different processes
+        with open(self.meta_dir / "0064e882.csv", "a") as f:
+            f.write("1,7ce0d401,GitHub,0064e882,data/0064e882/key/7ce0d401.pem,30,30,F,,,,,Key\n")
+        with self.assertRaises(ValueError):
+            read_meta(self.meta_dir, use_cache=False, jobs=2)
+
+    def test_meta_row_factory(self):
+        header = HEADER.strip().split(',')
+        factory = MetaRowFactory(header)
+        values = "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,10,,,,Password:Secret".split(',')
+        meta_row = factory(values)
+        self.assertEqual(MetaRow(dict(zip(header, values))), meta_row)
+        self.assertEqual(','.join(values).replace(",,,,", ",-1,,,"), str(meta_row))
+        self.assertEqual(frozenset(["Password", "Secret"]), meta_row.rules)
+        # rule sets are shared by rows with the same category
+        self.assertIs(meta_row.rules, MetaRowFactory.from_values(MetaRowFactory.to_values(meta_row)).rules)
+        # the same validations like in MetaRow
+        for wrong in ["2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,Y,10,22,,,Password",
+                      "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,120,T,10,22,,,Password",
+                      "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,22,10,,,Password",
+                      "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,10,22,,,Key:Key",
+                      "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,10,22,,,Key:Other",
+                      "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,10,22,,,",
+                      "2,7ce0d401,GitHub,00408ef6,data/00408ef6/_/7ce0d401.c,121,121,T,10,22,,Password"]:
+            with self.assertRaises(ValueError):
+                factory(wrong.split(','))
+        with self.assertRaises(ValueError):
+            MetaRowFactory(header[:-1])
+
+    def test_meta_table(self):
+        meta = read_meta(self.meta_dir)
+        meta_table = MetaTable(meta)
+        self.assertEqual(3, len(meta_table))
+        self.assertListEqual(meta, list(meta_table.rows()))
+        self.assertEqual(0b110, meta_table.label_mask(LABEL_TRUE))
+        self.assertEqual(0b011, meta_table.rule_mask("Password"))
+        self.assertEqual(0b010, meta_table.category_mask("Password:Secret"))
+        self.assertEqual(0b100, meta_table.repo_mask("0064e882"))
+        self.assertEqual(0b100, meta_table.extension_mask(".PEM"))
+        self.assertEqual(0, meta_table.rule_mask("Token"))
+        mask = meta_table.select(labels=[LABEL_TRUE], rules=["Password", "PEM Private Key"])
+        self.assertEqual(2, MetaTable.count(mask))
+        self.assertListEqual([1, 2], list(MetaTable.indices(mask)))
+        self.assertListEqual(["Password", "Secret", "PEM Private Key"], meta_table.rule_names)
+        self.assertDictEqual({1: 0b101, 2: 0b010}, meta_table.rules_number_masks())
+        self.assertListEqual([0, 5, 9, 64], list(MetaTable.indices(1 | 1 << 5 | 1 << 9 | 1 << 64)))
+
+    def test_meta_table_append(self):
+        meta = read_meta(self.meta_dir)
+        meta_table = MetaTable(meta[:1])
+        self.assertEqual(0b1, meta_table.rule_mask("Password"))
+        # the built masks are updated with appended rows
+        for meta_row in meta[1:]:
+            meta_table.append(meta_row)
+            expected = MetaTable(meta[:len(meta_table)])
+            for rule in expected.rule_names:
+                self.assertEqual(expected.rule_mask(rule), meta_table.rule_mask(rule))
+            for extension in expected.extension_names:
+                self.assertEqual(expected.extension_mask(extension), meta_table.extension_mask(extension))
+            self.assertEqual(expected.label_mask(LABEL_TRUE), meta_table.label_mask(LABEL_TRUE))
+            self.assertEqual(expected.repo_mask("0064e882"), meta_table.repo_mask("0064e882"))
+            self.assertEqual(expected.category_mask("Password:Secret"), meta_table.category_mask("Password:Secret"))
+            self.assertDictEqual(expected.rules_number_masks(), meta_table.rules_number_masks())
+        self.assertListEqual(["Password", "Secret", "PEM Private Key"], meta_table.rule_names)
+        self.assertEqual(0b110, meta_table.label_mask(LABEL_TRUE))
+        meta_table.extend([])
+        self.assertEqual(0b011, meta_table.rule_mask("Password"))
+
+    def test_query_meta(self):
+        self.assertListEqual(read_meta(self.meta_dir), list(query_meta(self.meta_dir)))
+        self.assertListEqual([3], [x.Id for x in query_meta(self.meta_dir, MetaQuery(repos=["0064e882"]))])
+        self.assertListEqual([2, 3], [x.Id for x in query_meta(self.meta_dir, MetaQuery(labels=[LABEL_TRUE]))])
+        self.assertListEqual([1, 2], [x.Id for x in query_meta(self.meta_dir, MetaQuery(rules=["Password"]))])
+        self.assertListEqual([1], [x.Id for x in query_meta(self.meta_dir, MetaQuery(categories=["Password"]))])
+        self.assertListEqual([2],
+                             [x.Id for x in query_meta(self.meta_dir, MetaQuery(path_prefixes=["data/00408ef6/_/"]))])
+        self.assertListEqual([2, 3], [x.Id for x in query_meta(self.meta_dir, MetaQuery(line_range=(20, 121)))])
+        self.assertListEqual([], list(query_meta(self.meta_dir, MetaQuery(repos=["0064e882"], rules=["Password"]))))
+        self.assertListEqual([3], [x.Id for x in query_meta(self.meta_dir / "0064e882.csv", MetaQuery(labels="T"))])
+        with self.assertRaises(ValueError):
+            MetaQuery(labels=["Y"])
+        # a file which cannot match is not read from cache
+        meta_cache = MetaCache(self.meta_dir, _schema_checksum())
+        summary = meta_cache.summary("00408ef6.csv", (self.meta_dir / "00408ef6.csv").stat())
+        meta_cache.close()
+        self.assertSetEqual({"Password", "Secret"}, summary.rules)
+        self.assertTupleEqual(("data/00408ef6/_/7ce0d401.c", "data/00408ef6/sample/1d02852d.c"), summary.paths)
+        self.assertFalse(MetaQuery(repos=["0064e882"]).match_summary(summary))
+        self.assertFalse(MetaQuery(path_prefixes=["data/00408ef6/key/"]).match_summary(summary))
+        self.assertTrue(MetaQuery(path_prefixes=["data/0064e882/", "data/00408ef6/"]).match_summary(summary))
+
+    def test_meta_interval_index(self):
+        meta = read_meta(self.meta_dir)
+        meta_index = MetaIntervalIndex(meta)
+        pem_path = "data/0064e882/key/7ce0d401.pem"
+        self.assertListEqual([3], [x.Id for x in meta_index.overlap(pem_path, 1)])
+        self.assertListEqual([3], [x.Id for x in meta_index.contain(pem_path, 10, 12)])
+        self.assertListEqual([], meta_index.contain(pem_path, 20, 30))
+        self.assertListEqual([3], [x.Id for x in meta_index.overlap(pem_path, 20, 30)])
+        self.assertListEqual([], meta_index.overlap(pem_path, 28, 30))
+        self.assertListEqual([], meta_index.overlap("data/0064e882/key/other.pem", 1))
+        # rows added out of order are found as well
+        values = list(MetaRowFactory.to_values(meta[2]))
+        for values[0], values[5], values[6] in [(4, 5, 6), (5, 2, 3)]:
+            meta_index.add(MetaRowFactory.from_values(values))
+        self.assertListEqual([3, 5], [x.Id for x in meta_index.contain(pem_path, 2, 3)])
+        self.assertListEqual([3, 5, 4], [x.Id for x in meta_index.overlap(pem_path, 3, 5)])
+        self.assertListEqual([3], [x.Id for x in meta_index.contain(pem_path, 4, 5)])
+
+    def test_meta_interval_index_long_block(self):
+        values = list(MetaRowFactory.to_values(read_meta(self.meta_dir)[2]))
+        meta_rows = []
+        # a long block and many short rows after it in the same file
+        for values[0], values[5], values[6] in [(1, 1, 500)] + [(n, n, n + n % 3) for n in range(2, 1000)]:
+            meta_rows.append(MetaRowFactory.from_values(values))
+        meta_index = MetaIntervalIndex(reversed(meta_rows))
+        pem_path = meta_rows[0].FilePath
+        for line_start, line_end in [(1, 1), (250, 250), (499, 503), (600, 600), (998, 2000), (0, 0), (1001, 1001)]:
+            expected = sorted((x for x in meta_rows if line_start <= x.LineEnd and x.LineStart <= line_end),
+                              key=lambda x: x.LineStart)
+            self.assertListEqual(expected, meta_index.overlap(pem_path, line_start, line_end))
+        # the lookup does not visit the rows between the long block and the line
+        file_intervals = meta_index._files[pem_path]
+        with mock.patch.object(file_intervals, "_collect", wraps=file_intervals._collect) as collect:
+            self.assertListEqual([1, 398, 400], [x.Id for x in meta_index.overlap(pem_path, 400)])
+        self.assertGreater(100, collect.call_count)
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from meta_writer import MetaWriter
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+
+class MetaWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.meta_dir = Path(self.tmp_dir) / "meta"
+        os.makedirs(self.meta_dir)
+        (self.meta_dir / "00408ef6.csv").write_text(HEADER +
+                                                   "12,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,12,12,F,"
+                                                   "2,5,,,Password\n"
+                                                   "112,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,7,7,T,"
+                                                   "2,5,,,Key\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_flush(self):
+        meta_writer = MetaWriter(self.meta_dir)
+        meta_writer.add_category("00408ef6", 12, "Token")
+        meta_writer.append("00408ef6", "113,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,9,9,F,-1,-1,,,Secret")
+        meta_writer.add_category("00408ef6", 113, "Key")
+        meta_writer.add_category("00408ef6", 12, "Secret")
+        meta_writer.append("1e3c4d5a", "114,2f3a4b5c,GitHub,1e3c4d5a,data/1e3c4d5a/2f3a4b5c.py,1,1,F,-1,-1,,,Key")
+        self.assertTrue(meta_writer.changed)
+        # nothing is written before flush
+        self.assertFalse((self.meta_dir / "1e3c4d5a.csv").exists())
+        meta_writer.flush()
+        self.assertFalse(meta_writer.changed)
+        self.assertEqual(HEADER +
+                         "12,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,12,12,F,2,5,,,Password:Token:Secret\n"
+                         "112,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,7,7,T,2,5,,,Key\n"
+                         "113,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,9,9,F,-1,-1,,,Secret:Key\n",
+                         (self.meta_dir / "00408ef6.csv").read_text())
+        self.assertEqual("114,2f3a4b5c,GitHub,1e3c4d5a,data/1e3c4d5a/2f3a4b5c.py,1,1,F,-1,-1,,,Key\n",
+                         (self.meta_dir / "1e3c4d5a.csv").read_text())
+        self.assertListEqual(["00408ef6.csv", "1e3c4d5a.csv"], sorted(os.listdir(self.meta_dir)))
+
+    def test_flush_line_boundaries(self):
+        # str.splitlines() boundaries which are not '\n' are kept in rows
+        (self.meta_dir / "1e3c4d5a.csv").write_bytes((HEADER +
+                                                      "7,2f3a4b5c,GitHub,1e3c4d5a,data/1e3c4d5a/2f3a4b5c.py,1,1,F,"
+                                                      "-1,-1,,\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029,Key\r\n"
+                                                      "8,2f3a4b5c,GitHub,1e3c4d5a,data/1e3c4d5a/2f3a4b5c.py,2,2,T,"
+                                                      "-1,-1,,,Password\r\n").encode())
+        meta_writer = MetaWriter(self.meta_dir)
+        meta_writer.add_category("1e3c4d5a", 7, "Secret")
+        meta_writer.add_category("1e3c4d5a", 8, "Token")
+        meta_writer.flush()
+        self.assertEqual(HEADER +
+                         "7,2f3a4b5c,GitHub,1e3c4d5a,data/1e3c4d5a/2f3a4b5c.py,1,1,F,"
+                         "-1,-1,,\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029,Key:Secret\r\n"
+                         "8,2f3a4b5c,GitHub,1e3c4d5a,data/1e3c4d5a/2f3a4b5c.py,2,2,T,-1,-1,,,Password:Token\r\n",
+                         (self.meta_dir / "1e3c4d5a.csv").read_bytes().decode())
@@ -0,0 +1,118 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List, Optional
+from unittest import mock
+
+from benchmark.app import Benchmark
+from benchmark.common.perf import PerfSeries, jobs_sweep, percentile
+from benchmark.common.process_monitor import ProcessStat
+from benchmark.scanner.credsweeper import CredSweeper
+from benchmark.scanner.scanner_factory import ScannerFactory
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+
+class StubScanner(CredSweeper):
+    """Runs an empty python process instead of the scanner"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.init_calls = 0
+        self.jobs_runs: List[Optional[int]] = []
+
+    def init_scanner(self) -> None:
+        self.init_calls += 1
+
+    def _scan_shard(self, repos: Optional[List[str]], output_path: str) -> None:
+        self.jobs_runs.append(self.jobs)
+        self._run_command([sys.executable, "-c", "pass"])
+
+
+class PerfTest(unittest.TestCase):
+    def test_percentile(self):
+        self.assertEqual(7, percentile([7], 50))
+        self.assertEqual(7, percentile([7], 95))
+        self.assertEqual(1, percentile([2, 1], 50))
+        self.assertEqual(2, percentile([2, 1], 95))
+        self.assertEqual(1, percentile([2, 1], 0))
+        values = [3, 1, 5, 2, 4]
+        self.assertEqual(1, percentile(values, 20))
+        self.assertEqual(2, percentile(values, 21))
+        self.assertEqual(3, percentile(values, 50))
+        self.assertEqual(5, percentile(values, 95))
+        self.assertEqual(5, percentile(values, 100))
+
+    def test_jobs_sweep(self):
+        self.assertListEqual([1], jobs_sweep(0))
+        self.assertListEqual([1], jobs_sweep(1))
+        self.assertListEqual([1, 2], jobs_sweep(2))
+        self.assertListEqual([1, 2, 3], jobs_sweep(3))
+        self.assertListEqual([1, 2, 4], jobs_sweep(4))
+        self.assertListEqual([1, 2, 4, 6], jobs_sweep(6))
+        self.assertListEqual([1, 2, 4, 8, 16, 24], jobs_sweep(24))
+        for cpu_count in range(1, 70):
+            sweep = jobs_sweep(cpu_count)
+            self.assertEqual(cpu_count, sweep[-1])
+            self.assertListEqual(sorted(set(sweep)), sweep)
+            self.assertTrue(all(x == 1 << n for n, x in enumerate(sweep[:-1])))
+
+    def test_perf_series(self):
+        series = PerfSeries(2)
+        for wall_time, cpu_time, peak_rss in [(3.0, 5.0, 100), (1.0, 2.0, 300), (2.0, 4.0, 200)]:
+            series.add(ProcessStat(wall_time=wall_time, cpu_time=cpu_time, peak_rss=peak_rss))
+        self.assertEqual(2.0, series.median)
+        self.assertEqual(3.0, series.p95)
+        self.assertEqual(4.0, series.cpu_median)
+        self.assertDictEqual({"jobs": 2,
+                              "wall_times": [3.0, 1.0, 2.0],
+                              "cpu_times": [5.0, 2.0, 4.0],
+                              "median": 2.0,
+                              "p95": 3.0,
+                              "min": 1.0,
+                              "cpu_median": 4.0,
+                              "peak_rss": 300}, series.to_dict())
+
+
+class PerfRunTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(Path(self.tmp_dir) / "meta")
+        os.makedirs(Path(self.tmp_dir) / "data" / "00408ef6")
+        (Path(self.tmp_dir) / "meta" / "00408ef6.csv").write_text(
+            HEADER + "1,1d02852d,GitHub,00408ef6,data/00408ef6/1d02852d.py,1,1,T,-1,-1,,,Password\n")
+        (Path(self.tmp_dir) / "data" / "00408ef6" / "1d02852d.py").write_text("password = 'X3d!'\n")
+        os.chdir(self.tmp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_perf(self):
+        scanners: List[StubScanner] = []
+
+        def create_scanner(scanner_type, working_dir, cred_data_dir, preload, fix, markup=None):
+            scanners.append(StubScanner(working_dir, cred_data_dir, True, fix, markup))
+            return scanners[-1]
+
+        perf_json = str(Path(self.tmp_dir) / "perf.json")
+        with mock.patch.object(ScannerFactory, "create_scanner", side_effect=create_scanner):
+            with contextlib.redirect_stdout(io.StringIO()):
+                Benchmark().perf("credsweeper", repeat=2, warmup=1, jobs=[1, 2], perf_json=perf_json)
+        self.assertEqual(1, len(scanners))
+        # the scanner is installed once for each jobs value, not for each run
+        self.assertEqual(2, scanners[0].init_calls)
+        self.assertListEqual([1, 1, 1, 2, 2, 2], scanners[0].jobs_runs)
+        with open(perf_json) as f:
+            perf = json.load(f)
+        self.assertListEqual([1, 2], [x["jobs"] for x in perf["series"]])
+        self.assertListEqual([2, 2], [len(x["wall_times"]) for x in perf["series"]])
+        self.assertTrue(all(0 < x for series in perf["series"] for x in series["wall_times"]))
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+import unittest
+
+from benchmark.common.process_monitor import ProcessStat, run_monitored
+
+# prints to stdout and stderr after some CPU work and exits with code 3
+SCRIPT = "import sys; sum(x * x for x in range(3000000)); print('out'); print('err', file=sys.stderr); sys.exit(3)"
+
+
+class ProcessMonitorTest(unittest.TestCase):
+    def test_run_monitored(self):
+        returncode, output, process_stat = run_monitored([sys.executable, "-c", SCRIPT], capture_output=True)
+        self.assertEqual(3, returncode)
+        self.assertEqual(b"out\n", output.replace(b"\r\n", b"\n"))
+        self.assertLess(0, process_stat.wall_time)
+        self.assertLess(0, process_stat.cpu_time)
+        self.assertLess(0, process_stat.peak_rss)
+
+    def test_stderr(self):
+        # stderr of the command is inherited even stdout is captured
+        code = "import sys; from benchmark.common.process_monitor import run_monitored;" \
+               f"run_monitored([sys.executable, '-c', {SCRIPT!r}], capture_output=True);" \
+               f"run_monitored([sys.executable, '-c', {SCRIPT!r}], capture_output=True, discard_stderr=True)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+        self.assertEqual(b"", result.stdout)
+        self.assertEqual(b"err\n", result.stderr.replace(b"\r\n", b"\n"))
+
+    def test_add(self):
+        process_stat = ProcessStat(wall_time=1.0, cpu_time=2.0, peak_rss=100, read_bytes=10)
+        process_stat.add(ProcessStat(wall_time=3.0, cpu_time=1.0, peak_rss=50, read_bytes=5))
+        self.assertEqual(ProcessStat(wall_time=4.0, cpu_time=3.0, peak_rss=100, read_bytes=15), process_stat)
+        process_stat.add_concurrent(ProcessStat(wall_time=2.0, cpu_time=1.0, peak_rss=50, read_bytes=5))
+        self.assertEqual(ProcessStat(wall_time=4.0, cpu_time=4.0, peak_rss=150, read_bytes=20), process_stat)
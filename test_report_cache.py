@@ -0,0 +1,109 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from benchmark.common import ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner_factory import ScannerFactory
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+
+class ReportCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(Path(self.tmp_dir) / "meta")
+        os.makedirs(Path(self.tmp_dir) / "data" / "00408ef6" / "src")
+        (Path(self.tmp_dir) / "meta" / "00408ef6.csv").write_text(
+            HEADER + "1,1d02852d,GitHub,00408ef6,data/00408ef6/src/1d02852d.py,2,2,T,12,16,,,Password\n")
+        (Path(self.tmp_dir) / "data" / "00408ef6" / "src" / "1d02852d.py").write_text("x = 1\npassword = 'X3d!'\n")
+        self.report = Path(self.tmp_dir) / "empty_report.json"
+        self.report.write_text("[]")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.markup = Markup(self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_scanner(self, scanner_type: ScannerType):
+        scanner = ScannerFactory.create_scanner(scanner_type, self.tmp_dir, self.tmp_dir, True, False, self.markup)
+        scanner.output_dir = str(self.report)
+        scanner.diagnostics.quiet = True
+        return scanner
+
+    def run_benchmark(self, scanner_type: ScannerType) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.create_scanner(scanner_type).run_benchmark(True)
+        return output.getvalue()
+
+    def test_result_key(self):
+        credsweeper = self.create_scanner(ScannerType.CREDSWEEPER)
+        gitleaks = self.create_scanner(ScannerType.GITLEAKS)
+        self.assertEqual(credsweeper._result_key(), self.create_scanner(ScannerType.CREDSWEEPER)._result_key())
+        self.assertNotEqual(credsweeper._result_key(), gitleaks._result_key())
+
+    def test_result_of_scanner(self):
+        credsweeper_output = self.run_benchmark(ScannerType.CREDSWEEPER)
+        self.assertTrue(credsweeper_output.startswith("credsweeper result_cnt : 0"), credsweeper_output)
+        # the same report of other scanner is not taken from the cache
+        gitleaks_output = self.run_benchmark(ScannerType.GITLEAKS)
+        self.assertTrue(gitleaks_output.startswith("gitleaks result_cnt : 0"), gitleaks_output)
+        # the cached result is reused for the same scanner
+        self.assertEqual(credsweeper_output, self.run_benchmark(ScannerType.CREDSWEEPER))
+        self.assertEqual(2, len(os.listdir(Path(self.tmp_dir) / ".cache" / "benchmark" / "results")))
+
+    def test_scanner_version(self):
+        detect_secrets = self.create_scanner(ScannerType.DETECT_SECRETS)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertIsNone(detect_secrets._scanner_key())
+        self.assertIn("WARNING: version of detect_secrets is unknown", output.getvalue())
+        # the version of the package in the virtual environment of the scanner
+        dist_info = Path(detect_secrets.scanner_dir) / "venv" / "lib" / "python3.10" / "site-packages" / \
+            "detect_secrets-1.4.0.dist-info"
+        os.makedirs(dist_info)
+        (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: detect-secrets\nVersion: 1.4.0\n")
+        self.assertEqual("1.4.0", detect_secrets._scanner_version())
+        key = detect_secrets._scanner_key()
+        self.assertIsNotNone(key)
+        (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: detect-secrets\nVersion: 1.5.0\n")
+        self.assertNotEqual(key, detect_secrets._scanner_key())
+        # checksum of the binary
+        gitleaks = self.create_scanner(ScannerType.GITLEAKS)
+        gitleaks.scanner_initialized = True
+        gitleaks.gitleaks_path = str(Path(self.tmp_dir) / "gitleaks")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(gitleaks._scanner_key())
+        Path(gitleaks.gitleaks_path).write_bytes(b"v1")
+        key = gitleaks._scanner_key()
+        self.assertIsNotNone(key)
+        Path(gitleaks.gitleaks_path).write_bytes(b"v2")
+        self.assertNotEqual(key, gitleaks._scanner_key())
+
+    def test_report_of_binary_scanner(self):
+        gitleaks = self.create_scanner(ScannerType.GITLEAKS)
+        gitleaks.scanner_initialized = True
+        gitleaks.gitleaks_path = str(Path(self.tmp_dir) / "gitleaks")
+        Path(gitleaks.gitleaks_path).write_bytes(b"v1")
+        gitleaks.output_dir = str(Path(self.tmp_dir) / "gitleaks.json")
+
+        def run_scanner():
+            Path(gitleaks.output_dir).write_text("[]")
+
+        with mock.patch.object(gitleaks, "run_scanner", side_effect=run_scanner) as run:
+            gitleaks.prepare_report()
+            os.remove(gitleaks.output_dir)
+            # the report is taken from the cache
+            gitleaks.prepare_report()
+            self.assertEqual(1, run.call_count)
+            self.assertEqual("[]", Path(gitleaks.output_dir).read_text())
+            Path(gitleaks.gitleaks_path).write_bytes(b"v2")
+            gitleaks.prepare_report()
+            self.assertEqual(2, run.call_count)
@@ -0,0 +1,164 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from benchmark.common import ScannerType
+from benchmark.scanner.markup import Markup
+from benchmark.scanner.scanner_factory import ScannerFactory
+
+HEADER = "Id,FileID,Domain,RepoName,FilePath,LineStart,LineEnd,GroundTruth,ValueStart,ValueEnd," \
+         "CryptographyKey,PredefinedPattern,Category\n"
+
+# repo: size of its file
+REPO_SIZES = {"0a1b2c3d": 1000, "1b2c3d4e": 600, "2c3d4e5f": 500, "3d4e5f6a": 300, "4e5f6a7b": 200}
+
+# stand-in of shhgit which reports each file of the scanned directory with paths relative to the directory
+SHHGIT_STUB = f"""#!{sys.executable}
+import csv
+import os
+import sys
+
+local = sys.argv[sys.argv.index("--local") + 1]
+with open(sys.argv[sys.argv.index("--csv-path") + 1], "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(["Repository name", "Signature name", "Matching file", "Matches"])
+    for root, dirs, files in os.walk(local):
+        for file in files:
+            path = os.path.join(root, file)
+            writer.writerow(["local", "password", path[len(local):], "password"])
+"""
+
+
+class ScanShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.tmp_dir) / "data"
+        os.makedirs(Path(self.tmp_dir) / "meta")
+        (Path(self.tmp_dir) / "meta" / "0a1b2c3d.csv").write_text(
+            HEADER + "1,1d02852d,GitHub,0a1b2c3d,data/0a1b2c3d/src/1d02852d.py,1,1,T,-1,-1,,,Password\n")
+        for repo, size in REPO_SIZES.items():
+            os.makedirs(self.data_dir / repo / "src")
+            (self.data_dir / repo / "src" / "1d02852d.py").write_text("password = 'X3d!'\n".ljust(size, '#'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.markup = Markup(self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_scanner(self, scanner_type: ScannerType):
+        return ScannerFactory.create_scanner(scanner_type, self.tmp_dir, self.tmp_dir, True, False, self.markup)
+
+    def write(self, name: str, text: str) -> str:
+        path = Path(self.tmp_dir) / name
+        path.write_text(text)
+        return str(path)
+
+    def test_make_shards(self):
+        scanner = self.create_scanner(ScannerType.DETECT_SECRETS)
+        shards = scanner.make_shards(2)
+        self.assertListEqual(shards, scanner.make_shards(2))
+        self.assertListEqual(sorted(REPO_SIZES), sorted(x for shard in shards for x in shard))
+        # the largest repo goes to the smallest shard: 1000 + 300 and 600 + 500 + 200
+        self.assertListEqual([1300, 1300], [sum(REPO_SIZES[x] for x in shard) for shard in shards])
+        self.assertSetEqual({"0a1b2c3d", "3d4e5f6a"}, set(shards[0]))
+        for shard in shards:
+            self.assertListEqual(sorted(shard, key=scanner._repos_order.__getitem__), shard)
+        # a shard per repo at most
+        self.assertListEqual(sorted([x] for x in REPO_SIZES), sorted(scanner.make_shards(100)))
+        self.assertEqual(1, len(scanner.make_shards(0)))
+
+    def test_detect_secrets_merge(self):
+        scanner = self.create_scanner(ScannerType.DETECT_SECRETS)
+        scanner.output_dir = str(Path(self.tmp_dir) / "output.json")
+        shard_paths = [
+            self.write("0.shard", json.dumps({"version": "1.4.0",
+                                               "results": {"data/1b2c3d4e/b.py": [{"line_number": 2}],
+                                                           "data/1b2c3d4e/a.py": [{"line_number": 1}]}})),
+            self.write("1.shard", json.dumps({"version": "1.4.0",
+                                               "results": {"data/0a1b2c3d/c.py": [{"line_number": 3}]}})),
+        ]
+        scanner._merge_shards(shard_paths)
+        report = {
+            "version": "1.4.0",
+            "results": {
+                "data/0a1b2c3d/c.py": [{"line_number": 3}],
+                "data/1b2c3d4e/a.py": [{"line_number": 1}],
+                "data/1b2c3d4e/b.py": [{"line_number": 2}],
+            }
+        }
+        self.assertEqual(json.dumps(report, indent=2) + "\n", Path(scanner.output_dir).read_text())
+
+    def test_trufflehog3_merge(self):
+        scanner = self.create_scanner(ScannerType.TRUFFLEHOG3)
+        scanner.output_dir = str(Path(self.tmp_dir) / "output.json")
+        scanner.make_shards(2)
+        repos = sorted(REPO_SIZES, key=scanner._repos_order.__getitem__)
+        issues = [{"path": f"{self.data_dir}/{x}/src/{y}.py", "stringsFound": [f"{n} password"]}
+                  for x in repos for n, y in enumerate(["b", "a"])]
+        # shards have repos in any order, the missing shard has no findings
+        shard_paths = [self.write("0.shard", json.dumps(issues[4:] + issues[:2])),
+                       self.write("1.shard", json.dumps(issues[2:4])),
+                       str(Path(self.tmp_dir) / "2.shard")]
+        scanner._merge_shards(shard_paths)
+        self.assertEqual(json.dumps(issues, indent=4), Path(scanner.output_dir).read_text())
+
+    def test_shhgit_shards(self):
+        scanner = self.create_scanner(ScannerType.SHHGIT)
+        scanner.init_scanner()
+        scanner.shhgit_path = self.write("shhgit", SHHGIT_STUB)
+        os.chmod(scanner.shhgit_path, os.stat(scanner.shhgit_path).st_mode | stat.S_IEXEC)
+        scanner.output_dir = str(Path(self.tmp_dir) / "output.csv")
+        scanner._scan_shard(None, scanner.output_dir)
+        single_report = Path(scanner.output_dir).read_text()
+        with open(scanner.output_dir, newline="") as f:
+            self.assertListEqual(sorted(f"/{x}/src/1d02852d.py" for x in REPO_SIZES),
+                                 sorted(x["Matching file"] for x in csv.DictReader(f)))
+        # repos of a shard are scanned one by one with the repo prefix of matching files
+        os.remove(scanner.output_dir)
+        scanner.shards = 3
+        scanner._scan_data()
+        self.assertEqual(single_report, Path(scanner.output_dir).read_text())
+        self.assertListEqual([], [x for x in os.listdir(self.tmp_dir) if x.endswith(".shard")])
+
+    def test_shhgit_merge(self):
+        scanner = self.create_scanner(ScannerType.SHHGIT)
+        scanner.output_dir = str(Path(self.tmp_dir) / "output.csv")
+        scanner.make_shards(2)
+        repos = sorted(REPO_SIZES, key=scanner._repos_order.__getitem__)
+        header = "Repository name,Signature name,Matching file,Matches\r\n"
+        rows = [f"local,password,/{x}/src/{y}.py,password\r\n" for x in repos for y in ["b", "a"]]
+        shard_paths = [self.write("0.shard", header + "".join(rows[6:] + rows[:2])),
+                       self.write("1.shard", header + "".join(rows[2:6]))]
+        scanner._merge_shards(shard_paths)
+        with open(scanner.output_dir, newline="") as f:
+            self.assertEqual(header + "".join(rows), f.read())
+
+    def test_unsharded_scanner(self):
+        scanner = self.create_scanner(ScannerType.GITLEAKS)
+        scanner.output_dir = str(Path(self.tmp_dir) / "output.json")
+        self.assertFalse(scanner.partial_scan_supported)
+        self.assertFalse(scanner.sharding_supported)
+        self.assertTrue(self.create_scanner(ScannerType.SHHGIT).sharding_supported)
+        with mock.patch.object(type(scanner), "run_scanner", autospec=True,
+                               side_effect=lambda x: Path(x.output_dir).write_text("[]")) as run_scanner:
+            # the scanner runs once for whole data without shards
+            scanner.shards = 3
+            scanner._scan_data()
+            self.assertEqual(1, run_scanner.call_count)
+            self.assertEqual("[]", Path(scanner.output_dir).read_text())
+            self.assertListEqual([], [x for x in os.listdir(self.tmp_dir) if x.endswith(".shard")])
+            shard_path = str(Path(self.tmp_dir) / "0.shard")
+            scanner._scan_shard(["0a1b2c3d"], shard_path)
+            self.assertEqual("[]", Path(shard_path).read_text())
+        os.remove(scanner.output_dir)
+        scanner._merge_shards([shard_path, shard_path])
+        self.assertEqual("[]", Path(scanner.output_dir).read_text())